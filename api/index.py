@@ -1,61 +1,124 @@
-from http.server import BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import hmac
 import json
 import os
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # In-memory storage for multi-account support
 # cache["bots"] will store bot_id: data mapping
+# cache["_serialized"] holds the encoded GET body and cache["_etag"] its validator;
+# both are cleared whenever a bot posts
 cache = {
-    "bots": {}
+    "bots": {},
+    "_serialized": None,
+    "_etag": None
 }
+_cache_lock = threading.Lock()
+
+# Resolved once per process instead of on every request
+_API_KEY = os.environ.get('DASHBOARD_API_KEY', 'propbot-secret').encode('utf-8')
+
+# Standalone server limits: requests waiting for a worker beyond this are refused with a
+# 503, and a client that stalls mid-request is dropped after the socket timeout
+MAX_QUEUED_REQUESTS = 64
+REQUEST_TIMEOUT_SECS = 10
+
+# Pre-encoded static response bodies
+_UNAUTHORIZED = b'{"error": "Unauthorized"}'
+_SUCCESS = b'{"status": "success"}'
+_BUSY_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                  b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+
+
+def _dumps(obj) -> bytes:
+    """Encodes to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _loads(data: bytes):
+    """Decodes JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _is_authorized(headers) -> bool:
+    """Constant-time comparison of the X-API-Key header against the configured key."""
+    api_key = headers.get('X-API-Key', '').encode('utf-8')
+    return hmac.compare_digest(api_key, _API_KEY)
+
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         # API Key authentication
-        api_key = self.headers.get('X-API-Key')
-        env_key = os.environ.get('DASHBOARD_API_KEY', 'propbot-secret')
-        
-        if api_key != env_key:
+        if not _is_authorized(self.headers):
             self.send_response(403)
             self.send_header('Content-type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
-            self.wfile.write(b'{"error": "Unauthorized"}')
+            self.wfile.write(_UNAUTHORIZED)
             return
         
+        # Return all bots. Frontend will handle selection.
+        with _cache_lock:
+            body = cache["_serialized"]
+            if body is None:
+                response = cache["bots"] if cache["bots"] else {"error": "No bots connected"}
+                body = cache["_serialized"] = _dumps(response)
+                cache["_etag"] = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            etag = cache["_etag"]
+
+        # Nothing posted since the dashboard's last poll: no body to send, parse or re-render
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Expose-Headers', 'ETag')
+            self.end_headers()
+            return
+
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
+        self.send_header('ETag', etag)
         self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
         self.end_headers()
-        
-        # Return all bots. Frontend will handle selection.
-        response = cache["bots"] if cache["bots"] else {"error": "No bots connected"}
-        self.wfile.write(json.dumps(response).encode('utf-8'))
+        self.wfile.write(body)
 
     def do_POST(self):
+        # Simple API Key check (before reading or parsing the body)
+        if not _is_authorized(self.headers):
+            self.send_response(403)
+            self.end_headers()
+            self.wfile.write(_UNAUTHORIZED)
+            return
+
         content_length = int(self.headers['Content-Length'])
         post_data = self.rfile.read(content_length)
         
         try:
-            data = json.loads(post_data.decode('utf-8'))
+            data = _loads(post_data)
             bot_id = data.get("bot_id", "default")
-            
-            # Simple API Key check
-            api_key = self.headers.get('X-API-Key')
-            env_key = os.environ.get('DASHBOARD_API_KEY', 'propbot-secret')
-            
-            if api_key != env_key:
-                self.send_response(403)
-                self.end_headers()
-                self.wfile.write(b'{"error": "Unauthorized"}')
-                return
 
             # Store data keyed by bot_id
-            cache["bots"][bot_id] = data
+            with _cache_lock:
+                cache["bots"][bot_id] = data
+                cache["_serialized"] = None
+                cache["_etag"] = None
             
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
             self.end_headers()
-            self.wfile.write(b'{"status": "success"}')
+            self.wfile.write(_SUCCESS)
         except Exception as e:
             self.send_response(400)
             self.end_headers()
@@ -65,5 +128,61 @@ class handler(BaseHTTPRequestHandler):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'X-API-Key, Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'X-API-Key, Content-Type, If-None-Match')
         self.end_headers()
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles each request on a bounded worker pool, so concurrent
+    bot POSTs and dashboard polls don't queue behind one another. At most
+    `max_workers + max_queued` connections are held at once; further ones get an
+    immediate 503 instead of piling up open sockets.
+    Only used when this module runs as a standalone server (not on Vercel).
+    """
+    def __init__(self, server_address, handler_class, max_workers: int = 16,
+                 max_queued: int = MAX_QUEUED_REQUESTS):
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # One slot per connection being handled or waiting for a worker
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(_BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        request.settimeout(REQUEST_TIMEOUT_SECS)
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def serve(port: int = 8000):
+    """Runs the dashboard API locally."""
+    server = PooledHTTPServer(('', port), handler)
+    print(f"Dashboard API listening on port {port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve(int(os.environ.get('PORT', 8000)))
@@ -2,242 +2,420 @@ import yfinance as yf
 from src.utils.logger import setup_logger
 from src.utils.config_loader import load_config, load_credentials
 from src.data.mt5_loader import MT5DataLoader
+from src.data.bar_cache import read_cached, write_cached
 from src.strategies.liquidity_wick_strategy import LiquidityWickStrategy
-from src.models import SignalType
+from src.backtest.trade_book import TradeBook, PRICE_DTYPE, warmup_kernels
+from src.backtest.signals import cached_signals, apply_smc_filter
+from src.strategies.smc_detector import warmup_smc_kernels
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import os
+from collections import defaultdict
 import logging
 
-def run_backtest(friday_exit_enabled=True):
-    config = load_config()
-    creds = load_credentials()
+logger = logging.getLogger("PropBot.Backtest")
+
+# MT5 timeframe -> yfinance interval (H4 is not offered, so H1 bars stand in)
+YF_INTERVALS = {"M1": "1m", "M5": "5m", "M15": "15m", "M30": "30m", "H1": "1h", "H4": "1h", "D1": "1d"}
+YF_ENTRY_PERIOD = "6mo"
+YF_TREND_PERIOD = "1y"
+# Bars of history fetched per MT5 series
+FETCH_BARS = 10000
+# Bar length per MT5 timeframe; cached MT5 history is reused for one bar period
+TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
+# Columns kept after loading; everything else (volume, spread, ...) is unused by the backtest
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'time']
+NS_PER_HOUR = 3600 * 1_000_000_000
+# Pending stop orders expire after 4 hours (integer nanoseconds, compared against bar times)
+PENDING_EXPIRY_NS = 4 * NS_PER_HOUR
+
+def _cached_yf_download(tickers, period, interval, **kwargs):
+    """
+    yf.download backed by the on-disk bar cache.
+    Keys include today's date, so a re-run on the same day (e.g. both Friday-exit
+    modes) reads from disk while a new day pulls fresh bars.
+    """
+    key = ("yfinance", tickers, period, interval, tuple(sorted(kwargs.items())), date.today().isoformat())
+    df = read_cached(key)
+    if df is None:
+        df = yf.download(tickers=tickers, period=period, interval=interval, progress=False, **kwargs)
+        if df is not None and not df.empty:
+            write_cached(key, df)
+    return df
+
+def _cached_mt5_fetch(loader, symbol, timeframe, n_bars):
+    """
+    loader.fetch_data backed by the on-disk bar cache.
+    An entry stays valid until a new bar of its timeframe could have formed.
+    """
+    key = ("mt5", symbol, timeframe, n_bars)
+    df = read_cached(key, max_age=TF_SECONDS.get(timeframe, 3600))
+    if df is None:
+        # One terminal connection: fetch_data serializes live fetches on MT5_LOCK
+        df = loader.fetch_data(symbol, timeframe, n_bars)
+        if df is not None and not df.empty:
+            write_cached(key, df)
+    return df
+
+def _download_yfinance_batch(requests):
+    """
+    Downloads yfinance bars for many (ticker, period, interval) requests at once.
+    Issues one multi-ticker yf.download per unique (period, interval) combination.
+    Returns a dict keyed by (ticker, period, interval).
+    """
+    tickers_by_combo = defaultdict(set)
+    for ticker, period, interval in requests:
+        tickers_by_combo[(period, interval)].add(ticker)
+
+    frames = {}
+    for (period, interval), tickers in tickers_by_combo.items():
+        tickers = sorted(tickers)
+        try:
+            df_all = _cached_yf_download(" ".join(tickers), period, interval,
+                                         group_by='ticker', threads=True)
+        except Exception as e:
+            logger.debug(f"Batch download failed for {tickers} ({period}/{interval}): {e}")
+            continue
+        if df_all is None or df_all.empty:
+            continue
+        for ticker in tickers:
+            if ticker in df_all.columns.get_level_values(0):
+                # Tickers share one index in the batch; drop rows where this one had no bar
+                frames[(ticker, period, interval)] = df_all[ticker].dropna(how='all')
+    return frames
+
+def _lower_columns(columns):
+    """Lower-cased column names; MultiIndex columns (single-ticker yf.download) keep level 0."""
+    if isinstance(columns, pd.MultiIndex):
+        columns = columns.get_level_values(0)
+    return columns.str.lower()
+
+def _drop_tz(df):
+    """Makes a DataFrame's index timezone-naive in place (no-op if already naive)."""
+    if getattr(df.index, 'tz', None) is not None:
+        df.index = df.index.tz_localize(None)
+    return df
+
+def _weekday_hour(ts_ns):
+    """Weekday (Monday=0) and hour arrays from int64 epoch nanoseconds; 1970-01-01 was a Thursday."""
+    hours = ts_ns // NS_PER_HOUR
+    return (hours // 24 + 3) % 7, hours % 24
+
+def _resolve_pair(tf_data):
+    """Returns (label, entry_tf, trend_tf) for a config dict or legacy label string."""
+    if isinstance(tf_data, dict):
+        return tf_data.get('label', 'UNKNOWN'), tf_data.get('low', "H1"), tf_data.get('high', "H4")
+    label = tf_data
+    tf_entry = "M30" if label == "SCALP" else ("H1" if label == "DAY" else "H4")
+    tf_trend = "H4"  if label == "SCALP" else ("H4" if label == "DAY" else "D1")
+    return label, tf_entry, tf_trend
+
+def _load_pair(symbol, tf_data, mt5_frames, ticker_map, fetch_bars, yf_frames):
+    """
+    Normalizes entry/trend bars for one (symbol, timeframe pair) combination, taking them
+    from the prefetched MT5 frames or falling back to yfinance.
+    Returns (label, df_entry, df_trend), or None if no data could be loaded.
+    """
+    # Handle config dict vs legacy string
+    label, tf_entry, tf_trend = _resolve_pair(tf_data)
+
+    logger.debug(f"Processing {fetch_bars} bars for {symbol} {label} ({tf_entry}/{tf_trend})...")
+
+    # --- FETCH DATA ---
+    # Try MT5 first
+    df_entry = mt5_frames.get((symbol, tf_entry))
+    df_trend = mt5_frames.get((symbol, tf_trend))
     
-    # Enable logging for strategy debugging
-    setup_logger("PropBot.Strategy", logging.INFO)
-    setup_logger("PropBot.Risk", logging.INFO)
+    # Fallback to yfinance if MT5 data missing
+    if df_entry is None or df_trend is None:
+        yf_ticker = ticker_map.get(symbol)
+        if not yf_ticker:
+            print(f"Skipping {symbol} - No yfinance mapping")
+            return None
+            
+        try:
+            entry_key = (yf_ticker, YF_ENTRY_PERIOD, YF_INTERVALS.get(tf_entry, "1h"))
+            trend_key = (yf_ticker, YF_TREND_PERIOD, YF_INTERVALS.get(tf_trend, "1d"))
+            if entry_key in yf_frames and trend_key in yf_frames:
+                # Copies, since the frames are normalized in place below and may be shared
+                df_entry = yf_frames[entry_key].copy()
+                df_trend = yf_frames[trend_key].copy()
+            else:
+                logger.debug(f"Downloading data for {symbol}...")
+                df_entry = _cached_yf_download(yf_ticker, entry_key[1], entry_key[2])
+                df_trend = _cached_yf_download(yf_ticker, trend_key[1], trend_key[2])
+            if df_entry is None or df_entry.empty or df_trend is None or df_trend.empty:
+                return None
+            logger.debug(f"Data downloaded. Entry={len(df_entry)}, Trend={len(df_trend)}")
+            df_entry.columns = _lower_columns(df_entry.columns)
+            df_trend.columns = _lower_columns(df_trend.columns)
+            _drop_tz(df_entry)
+            _drop_tz(df_trend)
+            # Add 'time' column from index for compatibility
+            df_entry['time'] = df_entry.index
+            df_trend['time'] = df_trend.index
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Failed to load yfinance data for {symbol} {label}: {e}")
+            return None
+
+    if df_entry is None or df_entry.empty or df_trend is None or df_trend.empty:
+        return None
+    return label, _normalize_bars(df_entry), _normalize_bars(df_trend)
+
+def _normalize_bars(df):
+    """
+    Gives a bar frame a sorted DatetimeIndex and keeps only the columns the
+    strategy reads, so every slice and worker hand-off moves less data.
+    """
+    # Only set index if 'time' column exists and index is not already datetime
+    if 'time' in df.columns and not isinstance(df.index, pd.DatetimeIndex):
+        df = df.set_index('time', drop=False)
+    if not isinstance(df.index, pd.DatetimeIndex):
+        df.index = pd.to_datetime(df.index)
+    # Bars are aligned by position (searchsorted), which needs a sorted index
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df[[c for c in BAR_COLUMNS if c in df.columns]]
+
+
+def _bar_arrays(df):
+    """
+    Converts a normalized bar frame into the flat NumPy arrays the simulation reads:
+    int64 epoch-ns times, PRICE_DTYPE high/low/close and the Friday-close mask.
+    Per-bar iloc/label lookups would dominate the loop otherwise.
+    """
+    ts_ns = df.index.values.astype('datetime64[ns]').view(np.int64)
+    # Friday-close bars as a mask too, so the loop never builds a Timestamp per bar
+    weekday, hour = _weekday_hour(ts_ns)
+    return {
+        'ts_ns': ts_ns,
+        'high': df['high'].to_numpy(dtype=PRICE_DTYPE),
+        'low': df['low'].to_numpy(dtype=PRICE_DTYPE),
+        'close': df['close'].to_numpy(dtype=PRICE_DTYPE),
+        'friday_close': (weekday == 4) & (hour >= 21),
+    }
+
+
+def _simulate_pair(symbol, label, df_entry, df_trend, strategy, config, modes):
+    """
+    Backtests one (symbol, timeframe pair) combination on already-loaded bars.
+    Signals are computed once and replayed for every (friday_exit_enabled, smc_filter)
+    mode in `modes`; the SMC-filtered set is just the baseline set with some signals dropped.
+    The frames are only read, so the same data can back several runs.
+    Returns (label, {mode: (wins, trades, total_r)}).
+    """
+    pip_unit = 0.1 if "XAU" in symbol else 1.0
+    # Loop invariants: trailing distances only depend on the symbol
+    trailing_activation = config['risk'].get('trailing_stop_activation_pips', 50) * pip_unit
+    trailing_step = config['risk'].get('trailing_step_pips', 25) * pip_unit
     
+    # Define trading window start
+    trading_start = pd.Timestamp.now() - pd.Timedelta(days=180)
+    print(f"   -> Backtesting from {trading_start} to {pd.Timestamp.now()}")
+
+    # The simulation only reads these arrays; the frames are kept for the strategy
+    arr = _bar_arrays(df_entry)
+    ts_ns = arr['ts_ns']
+
+    # Evaluate the strategy for every tradable bar up front
+    # Bars are sorted, so the window is a suffix starting at the first bar >= trading_start
+    start_idx = max(100, int(np.searchsorted(ts_ns, trading_start.as_unit('ns').value)))
+    eligible = np.zeros(len(df_entry), dtype=bool)
+    eligible[start_idx:] = True
+    signals = cached_signals(df_entry, df_trend, strategy, symbol, eligible)
+
+    signal_sets = {False: signals}
+    if any(smc_filter for _, smc_filter in modes):
+        # Same SMC confluence gate as the live loop in main.py
+        smc_min_score = config['strategy'].get('smc_min_confluence_score', 20)
+        signal_sets[True] = apply_smc_filter(signals, df_entry, smc_min_score) if smc_min_score > 0 else signals
+    # Only bars inside the trading window (and past the indicator warm-up) are simulated
+    bars = np.flatnonzero(eligible)
+
+    results = {}
+    for friday_exit_enabled, smc_filter in modes:
+        trades = TradeBook()
+        trades.simulate(bars, arr['high'], arr['low'], arr['close'], ts_ns,
+                        friday_exit_enabled & arr['friday_close'], signal_sets[smc_filter],
+                        trailing_activation, trailing_step, PENDING_EXPIRY_NS)
+        wins, n_closed, _, total_r = trades.summary()
+        results[(friday_exit_enabled, smc_filter)] = (wins, n_closed, total_r)
+    return label, results
+
+
+# Yahoo Finance ticker mapping
+TICKER_MAP = {
+    "XAUUSD": "GC=F",      # Gold Futures
+    "US30": "YM=F",        # Dow Jones Futures
+    "NAS100": "NQ=F",      # Nasdaq Futures
+    "USTECH100": "NQ=F",
+}
+
+def load_backtest_data(config=None):
+    """
+    Fetches and normalizes bars for every configured (symbol, pair) combination.
+    Returns a list of (symbol, label, df_entry, df_trend) in config order, which can be
+    passed to run_backtest() as prefetched_data so several runs share one fetch.
+    """
+    if config is None:
+        config = load_config()
+    creds = load_credentials()
+
+    # Without a terminal connection every pair falls back to yfinance below
     loader = MT5DataLoader(config)
-    if not loader.connect(creds):
-        pass
-    
-    # symbols = config['system'].get('symbol_list', ["XAUUSD", "US30", "NAS100"])
+    loader.connect(creds)
+
     symbols = config['system'].get('symbol_list', ["XAUUSD", "US30", "NAS100"])
-    # symbols = ["US30"]
-    # symbols = config['system'].get('symbol_list', ["XAUUSD", "US30", "NAS100"])
     active_pairs = config['strategy'].get('active_pairs', [])
+
+    jobs = [(symbol, tf_data) for symbol in symbols for tf_data in active_pairs]
+
+    # Without MT5 every pair falls back to yfinance; fetch all of it in batched requests
+    yf_frames = {}
+    if not loader.connected:
+        yf_requests = set()
+        for symbol, tf_data in jobs:
+            yf_ticker = TICKER_MAP.get(symbol)
+            if not yf_ticker:
+                continue
+            _, tf_entry, tf_trend = _resolve_pair(tf_data)
+            yf_requests.add((yf_ticker, YF_ENTRY_PERIOD, YF_INTERVALS.get(tf_entry, "1h")))
+            yf_requests.add((yf_ticker, YF_TREND_PERIOD, YF_INTERVALS.get(tf_trend, "1d")))
+        logger.debug(f"Batch downloading {len(yf_requests)} yfinance series...")
+        yf_frames = _download_yfinance_batch(yf_requests)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(jobs)))) as executor:
+        # Pairs often share a timeframe (e.g. H4 as one pair's trend and another's entry),
+        # so each (symbol, timeframe) series is fetched once and shared between its pairs
+        mt5_frames = {}
+        if loader.connected:
+            series = sorted({(symbol, tf) for symbol, tf_data in jobs for tf in _resolve_pair(tf_data)[1:]})
+            fetched = executor.map(lambda key: _cached_mt5_fetch(loader, *key, FETCH_BARS), series)
+            mt5_frames = dict(zip(series, fetched))
+
+        futures = [
+            executor.submit(_load_pair, symbol, tf_data, mt5_frames, TICKER_MAP,
+                            FETCH_BARS, yf_frames)
+            for symbol, tf_data in jobs
+        ]
+        data = []
+        for (symbol, _), future in zip(jobs, futures):
+            result = future.result()
+            if result is not None:
+                data.append((symbol, *result))
+    return data
+
+def _setup_backtest_logging(queued=True):
+    # Enable logging for strategy debugging
+    setup_logger("PropBot.Strategy", logging.INFO, queued=queued)
+    setup_logger("PropBot.Risk", logging.INFO, queued=queued)
+
+# Bars handed to each backtest worker once at start-up (see _init_worker)
+_worker_data = None
+
+def _init_worker(data, strategy, config):
+    """
+    Process-pool initializer. Initargs are passed once per worker rather than once per
+    task, and with the fork start method they are inherited without being pickled at all.
+    """
+    global _worker_data
+    _worker_data = (data, strategy, config)
+    # Workers exit without running atexit hooks, which would drop whatever a queue
+    # listener had not written yet, so they log through direct handlers
+    _setup_backtest_logging(queued=False)
+
+def _simulate_job(index, modes):
+    data, strategy, config = _worker_data
+    symbol, label, df_entry, df_trend = data[index]
+    return _simulate_pair(symbol, label, df_entry, df_trend, strategy, config, modes)
+
+def _run_modes(modes, prefetched_data, config):
+    """
+    Simulates every (symbol, pair) once for all `modes` in a process pool.
+    Returns [(symbol, label, {mode: (wins, trades, total_r)})] in data order.
+    """
+    _setup_backtest_logging()
+
+    if prefetched_data is None:
+        prefetched_data = load_backtest_data(config)
     strategy = LiquidityWickStrategy(config)
-    
-    # Yahoo Finance ticker mapping
-    ticker_map = {
-        "XAUUSD": "GC=F",      # Gold Futures
-        "US30": "YM=F",        # Dow Jones Futures
-        "NAS100": "NQ=F",      # Nasdaq Futures
-        "USTECH100": "NQ=F",
-    }
 
-    mode_str = "FRIDAY EXIT" if friday_exit_enabled else "WEEKEND HOLDING"
+    # Each (symbol, pair) run is independent and CPU-bound (strategy evaluation holds the GIL),
+    # so they run in separate processes. Tasks only carry an index into the bars shared at
+    # worker start-up; workers also re-create the loggers for spawn-based platforms.
+    workers = max(1, min(os.cpu_count() or 1, len(prefetched_data)))
+    warmup_kernels()
+    if any(smc_filter for _, smc_filter in modes):
+        warmup_smc_kernels()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(prefetched_data, strategy, config)) as executor:
+        futures = [executor.submit(_simulate_job, index, tuple(modes))
+                   for index in range(len(prefetched_data))]
+        return [(symbol, *future.result()) for (symbol, *_), future in zip(prefetched_data, futures)]
+
+def _report_mode(pair_results, mode, mode_str):
+    """Prints per-pair and combined results for one mode; returns the combined win rate."""
     print(f"\n--- {mode_str} BACKTEST ---")
 
     total_trades = 0
     total_wins = 0
+    for symbol, label, results in pair_results:
+        wins, n_closed, total_r = results[mode]
+        total_wins += wins
+        total_trades += n_closed
+        if n_closed > 0:
+            wr_sym = (wins / n_closed) * 100
+            print(f"   -> {symbol} ({label}): {n_closed} Trades | {wr_sym:.1f}% WR | {total_r:+.1f}R")
+        else:
+            print(f"   -> {symbol} ({label}): No trades found in this period.")
 
-    # Define fetch_bars here, as it's used in the new loop structure
-    fetch_bars = 10000 # Example value, adjust as needed
-
-    for symbol in symbols:
-        yf_ticker = ticker_map.get(symbol, "GC=F") # Keep this for yfinance fallback
-        for tf_data in active_pairs:
-            # Handle config dict vs legacy string
-            if isinstance(tf_data, dict):
-                label = tf_data.get('label', 'UNKNOWN')
-                tf_entry = tf_data.get('low', "H1")
-                tf_trend = tf_data.get('high', "H4")
-            else:
-                label = tf_data
-                tf_entry = "M30" if label == "SCALP" else ("H1" if label == "DAY" else "H4")
-                tf_trend = "H4"  if label == "SCALP" else ("H4" if label == "DAY" else "D1")
+    if total_trades == 0:
+        return 0
+    combined_wr = (total_wins / total_trades) * 100
+    print(f"[{mode_str}] Total Trades: {total_trades} | Combined Win Rate: {combined_wr:.2f}%")
+    return combined_wr
 
-            print(f"DEBUG: Processing {fetch_bars} bars for {symbol} {label} ({tf_entry}/{tf_trend})...")
+def run_backtests(friday_modes=(True, False), prefetched_data=None):
+    """
+    Backtests every configured (symbol, pair) once per Friday-exit mode,
+    sharing data and signal generation between the modes.
+    Returns {friday_exit_enabled: combined win rate}.
+    """
+    config = load_config()
+    smc_filter = bool(config['strategy'].get('smc_filter_enabled', False))
+    pair_results = _run_modes([(flag, smc_filter) for flag in friday_modes], prefetched_data, config)
 
-            # --- FETCH DATA ---
-            # Try MT5 first
-            df_entry = loader.fetch_data(symbol, tf_entry, fetch_bars)
-            df_trend = loader.fetch_data(symbol, tf_trend, fetch_bars)
-            
-            # Fallback to yfinance if MT5 data missing
-            if df_entry is None or df_trend is None:
-                yf_ticker = ticker_map.get(symbol)
-                if not yf_ticker:
-                    print(f"Skipping {symbol} - No yfinance mapping")
-                    continue
-                    
-                try:
-                    print(f"DEBUG: Downloading data for {symbol}...")
-                    tf_map = {"M1": "1m", "M5": "5m", "M15": "15m", "M30": "30m", "H1": "1h", "H4": "1h", "D1": "1d"} 
-                    df_entry = yf.download(yf_ticker, period="6mo", interval=tf_map.get(tf_entry, "1h"), progress=False)
-                    df_trend = yf.download(yf_ticker, period="1y", interval=tf_map.get(tf_trend, "1d"), progress=False)
-                    print(f"DEBUG: Data downloaded. Entry={len(df_entry)}, Trend={len(df_trend)}")
-                    if df_entry.empty: continue
-                    df_entry.columns = [c[0].lower() if isinstance(c, tuple) else c.lower() for c in df_entry.columns]
-                    df_trend.columns = [c[0].lower() if isinstance(c, tuple) else c.lower() for c in df_trend.columns]
-                    df_entry.index = df_entry.index.tz_localize(None)
-                    df_trend.index = df_trend.index.tz_localize(None)
-                    # Add 'time' column from index for compatibility
-                    df_entry['time'] = df_entry.index
-                    df_trend['time'] = df_trend.index
-                except: continue
-
-            active_trades = []
-            pending_orders = [] # New: Store pending orders
-            closed_trades = []
-            pip_unit = 0.1 if "XAU" in symbol else 1.0
-            
-            # Filter for Past Week
-            start_date = pd.Timestamp.now() - pd.Timedelta(days=180)
-            # Fetch more for indicators but only trade on the week
-            # Actually we already fetched 2500, let's just filter the loop start
-            
-            if df_entry is not None and not df_entry.empty:
-                # Only set index if 'time' column exists and index is not already datetime
-                if 'time' in df_entry.columns and not isinstance(df_entry.index, pd.DatetimeIndex):
-                    df_entry.set_index('time', inplace=True, drop=False)
-                # print(f"DEBUG: Processing {len(df_entry)} bars for {symbol} {label}...")
-                df_entry.index = pd.to_datetime(df_entry.index)
-            if df_trend is not None and not df_trend.empty:
-                if 'time' in df_trend.columns and not isinstance(df_trend.index, pd.DatetimeIndex):
-                    df_trend.set_index('time', inplace=True, drop=False)
-                df_trend.index = pd.to_datetime(df_trend.index)
-
-            # Define trading window start
-            trading_start = pd.Timestamp.now() - pd.Timedelta(days=180)
-            print(f"   -> Backtesting from {trading_start} to {pd.Timestamp.now()}")
-
-            for i in range(100, len(df_entry)):
-                bar = df_entry.iloc[i]
-                curr_time = bar.name
-                if not isinstance(curr_time, pd.Timestamp):
-                    try: curr_time = pd.to_datetime(curr_time)
-                    except: continue
-                
-                # Filter trades to only those within the past month
-                if curr_time < trading_start:
-                    continue
-                
-                if friday_exit_enabled and curr_time.weekday() == 4 and curr_time.hour >= 21:
-                    pending_orders = [] # Clear pending on Friday
-                    for t in active_trades[:]:
-                        t['pnl'] = (bar['close'] - t['entry']) if t['type'] == 'BUY' else (t['entry'] - bar['close'])
-                        closed_trades.append(t)
-                        active_trades.remove(t)
-                    continue
-
-                # --- 1. Pending Order Management ---
-                # Check if price triggered any pending stop orders
-                for order in pending_orders[:]:
-                    # Expiration check (4 hours = 4 candles for H1, 1 candle for H4?)
-                    # Simplified: timestamp check
-                    if (curr_time - order['placed_time']).total_seconds() > (4 * 3600):
-                        pending_orders.remove(order)
-                        continue
-
-                    triggered = False
-                    if order['type'] == 'BUY_STOP':
-                        if bar['high'] >= order['entry']: # Price crossed up
-                            triggered = True # Trigger at Order Price
-                            # Slippage simulation? Let's assume perfect fill for now
-                    elif order['type'] == 'SELL_STOP':
-                        if bar['low'] <= order['entry']: # Price crossed down
-                            triggered = True
-
-                    if triggered:
-                        # Convert to Active Trade
-                        active_trades.append({
-                            'type': 'BUY' if 'BUY' in order['type'] else 'SELL',
-                            'entry': order['entry'],
-                            'sl': order['sl'],
-                            'tp': order['tp']
-                        })
-                        pending_orders.remove(order)
-
-                # Management
-                trailing_activation = config['risk'].get('trailing_stop_activation_pips', 50) * pip_unit
-                trailing_step = config['risk'].get('trailing_step_pips', 25) * pip_unit
-                
-                for t in active_trades[:]:
-                    exit_price = None
-                    # Verify TP/SL hit FIRST
-                    if t['type'] == 'BUY':
-                        if bar['low'] <= t['sl']: exit_price = t['sl']
-                        elif t['tp'] > 0 and bar['high'] >= t['tp']: exit_price = t['tp']
-                        
-                        # Trailing Stop Update (High of bar - Entry > Activation)
-                        if not exit_price:
-                            profit_dist = bar['high'] - t['entry']
-                            if profit_dist >= trailing_activation:
-                                 new_sl = t['entry'] + (profit_dist - trailing_step) # Very rough
-                                 if new_sl > t['sl']: t['sl'] = new_sl
-
-                    else: # SELL
-                        if bar['high'] >= t['sl']: exit_price = t['sl']
-                        elif t['tp'] > 0 and bar['low'] <= t['tp']: exit_price = t['tp']
-                        
-                        # Trailing Stop Update
-                        if not exit_price:
-                            profit_dist = t['entry'] - bar['low']
-                            if profit_dist >= trailing_activation:
-                                new_sl = t['entry'] - (profit_dist - trailing_step)
-                                if new_sl < t['sl']: t['sl'] = new_sl
-                    
-                    if exit_price:
-                        t['pnl'] = (exit_price - t['entry']) if t['type'] == 'BUY' else (t['entry'] - exit_price)
-                        closed_trades.append(t)
-                        active_trades.remove(t)
-
-                if i % 100 == 0:
-                    pass # Progress pulse
-                if len(active_trades) == 0 and len(pending_orders) == 0:
-                    data_map = {"LowTF": df_entry.iloc[:i+1], "HighTF": df_trend[df_trend.index <= curr_time]}
-                    
-                    if i < 110: # Only debug first 10 trading bars
-                        print(f"   [DEBUG {curr_time}] Entry Bars: {len(data_map['LowTF'])}, Trend Bars: {len(data_map['HighTF'])}")
-                    
-                    signal = strategy.generate_signal(data_map, symbol)
-                    
-                    if signal.signal_type != SignalType.NEUTRAL:
-                        # Logic for Stop Orders vs Market
-                        if signal.is_stop_order:
-                            pending_orders.append({
-                                'type': 'BUY_STOP' if signal.signal_type == SignalType.BUY else 'SELL_STOP',
-                                'entry': signal.price,
-                                'sl': signal.sl_price,
-                                'tp': signal.tp_price,
-                                'placed_time': curr_time
-                            })
-                        else:
-                            # Immediate Market Entry (fallback)
-                            active_trades.append({'type': 'BUY' if signal.signal_type == SignalType.BUY else 'SELL', 'entry': signal.price, 'sl': signal.sl_price, 'tp': signal.tp_price})
-
-            wins = [t for t in closed_trades if t['pnl'] > 0]
-            total_wins += len(wins)
-            total_trades += len(closed_trades)
-            if len(closed_trades) > 0:
-                wr_sym = (len(wins) / len(closed_trades)) * 100
-                print(f"   -> {symbol} ({label}): {len(closed_trades)} Trades | {wr_sym:.1f}% WR")
-            else:
-                print(f"   -> {symbol} ({label}): No trades found in this period.")
-            
-    if total_trades > 0:
-        combined_wr = (total_wins / total_trades) * 100
-        print(f"[FRIDAY EXIT] Total Trades: {total_trades} | Combined Win Rate: {combined_wr:.2f}%")
-        return combined_wr
-    return 0
+    return {
+        flag: _report_mode(pair_results, (flag, smc_filter), "FRIDAY EXIT" if flag else "WEEKEND HOLDING")
+        for flag in friday_modes
+    }
+
+def run_comparative_backtest(friday_exit_enabled=True, prefetched_data=None):
+    """
+    Backtests BASELINE (no SMC filter) against ENHANCED (SMC confluence filter) in one pass:
+    signals are generated once and the enhanced run replays the subset that passes the filter.
+    Returns {"BASELINE": win rate, "ENHANCED": win rate}.
+    """
+    config = load_config()
+    pair_results = _run_modes([(friday_exit_enabled, False), (friday_exit_enabled, True)],
+                              prefetched_data, config)
+    return {
+        "BASELINE": _report_mode(pair_results, (friday_exit_enabled, False), "BASELINE"),
+        "ENHANCED": _report_mode(pair_results, (friday_exit_enabled, True), "SMC ENHANCED"),
+    }
+
+def run_backtest(friday_exit_enabled=True, prefetched_data=None):
+    return run_backtests((friday_exit_enabled,), prefetched_data)[friday_exit_enabled]
 
 if __name__ == "__main__":
-    # Run single 1-month backtest with default settings (Friday Exit = True)
-    wr = run_backtest(friday_exit_enabled=True)
-    
+    # Compare Friday Exit against Weekend Holding on the same bars and signals
+    win_rates = run_backtests((True, False))
+    wr, wr_hold = win_rates[True], win_rates[False]
+
     print("\n" + "="*40)
     print(f"6-MONTH BACKTEST SUMMARY")
-    print(f"Win Rate: {wr:.2f}%")
+    print(f"Friday Exit Win Rate:     {wr:.2f}%")
+    print(f"Weekend Holding Win Rate: {wr_hold:.2f}%")
     print("="*40)
@@ -1,9 +1,9 @@
 import time
 import MetaTrader5 as mt5
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.utils.logger import setup_logger
 from src.utils.config_loader import load_config, load_credentials
-from src.data.mt5_loader import MT5DataLoader
+from src.data.mt5_loader import MT5DataLoader, MT5_LOCK
 from src.data.news_loader import NewsLoader
 from src.strategies.liquidity_wick_strategy import LiquidityWickStrategy
 from src.risk.risk_manager import RiskManager
@@ -11,14 +11,87 @@ from src.execution.execution_engine import ExecutionEngine
 from src.utils.notifications import TelegramNotifier 
 from src.utils.stats import StatsReporter
 from src.utils.journal import TradeJournal
+from src.utils.snapshot_publisher import SnapshotPublisher
 import src.models as models
-from src.strategies.smc_detector import detect_fvg_zones, detect_order_blocks, calculate_confluence_score
+from src.strategies.smc_detector import detect_fvg_zones, detect_order_blocks, calculate_confluence_score, warmup_smc_kernels
 import requests
 import os
+import json
+import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 import argparse
 
+# Index symbols quote 1 point = 1 pip; everything else (Forex/Gold) uses 10 points per pip
+INDEX_SYMBOLS = ["US30", "NAS100", "US100", "US500", "GER30", "DE30", "UK100", "JPN225"]
+# Substring match, so broker variants ("US30.cash", "NAS100m") classify like the root name
+INDEX_SYMBOL_RE = re.compile("|".join(map(re.escape, INDEX_SYMBOLS)))
+
+def _write_json_atomic(path, data):
+    """
+    Writes `data` as indented JSON via a temp file and os.replace, so a dashboard
+    reading the file concurrently sees either the old or the new snapshot, never a torn one.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=4).encode("utf-8")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+# (symbol, order type, lots, price, close price) -> (order_calc_profit result, time fetched)
+_calc_profit_cache = {}
+# Tick value (and so the result) drifts with the account-currency rate; refresh after this long
+CALC_PROFIT_TTL = 60
+
+# An unchanged dashboard is still republished this often, so last_updated shows the bot is alive
+DASHBOARD_HEARTBEAT_SECS = 60
+
+def _calc_profit(order_type, symbol, lots, price, close_price, digits):
+    """
+    mt5.order_calc_profit memoized for CALC_PROFIT_TTL seconds. Prices are rounded to the
+    symbol's digits for the key, so the same signal re-evaluated on later ticks reuses
+    the result instead of another terminal round-trip. Failed (None) results aren't cached.
+    The cache and the terminal call are shared by the symbol threads, so both run under MT5_LOCK.
+    """
+    key = (symbol, order_type, lots, round(price, digits), round(close_price, digits))
+    with MT5_LOCK:
+        now = time.time()
+        cached = _calc_profit_cache.get(key)
+        if cached is not None and now - cached[1] < CALC_PROFIT_TTL:
+            return cached[0]
+        result = mt5.order_calc_profit(order_type, symbol, lots, price, close_price)
+        if result is not None:
+            if len(_calc_profit_cache) >= 512: # Bound memory; entries are cheap to recompute
+                _calc_profit_cache.clear()
+            _calc_profit_cache[key] = (result, now)
+        return result
+
+def _friday_exit_window(now: datetime, exit_hour: int):
+    """
+    Returns (start, end) epoch seconds of the Friday-exit window (Friday `exit_hour`
+    until midnight, local time) that `now` is in or that comes next.
+    """
+    friday = (now + timedelta(days=(4 - now.weekday()) % 7)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (friday + timedelta(hours=exit_hour)).timestamp(), (friday + timedelta(days=1)).timestamp()
+
+def _group_by_symbol(positions):
+    """Groups one positions_get() snapshot by symbol, so each symbol reads its own list without another MT5 call."""
+    by_symbol = defaultdict(list)
+    for pos in positions or ():
+        by_symbol[pos.symbol].append(pos)
+    return by_symbol
+
 def main():
     # Handle Command-line Arguments
     parser = argparse.ArgumentParser(description="Prop-Firm Trading Bot")
@@ -48,6 +121,8 @@ def main():
 
     # Initialize New Strategy
     strategy = LiquidityWickStrategy(config)
+    # Compile the SMC kernels now rather than on the first confluence check
+    warmup_smc_kernels()
     
     # Initialize Notifier
     notifier = TelegramNotifier(
@@ -60,12 +135,10 @@ def main():
         notifier.send_message("🤖 **PropBot Started**\nLiquidity Wick Mode Active")
 
     risk_manager = RiskManager(config)
-    execution_engine = ExecutionEngine(
-        magic_number=config['system']['magic_number'],
-        notifier=notifier
-    )
     
     symbols = config['system']['symbol_list']
+    # Depends only on the symbol name, so classify once instead of per position per tick
+    pip_factors = {s: 1 if INDEX_SYMBOL_RE.search(s.upper()) else 10 for s in symbols}
     
     # Initialize Daily Equity
     account_info = mt5.account_info()
@@ -73,6 +146,12 @@ def main():
         risk_manager.initialize_state(account_info, config['system']['magic_number'])
         logger.info(f"Initial Equity: {account_info.equity}")
 
+    execution_engine = ExecutionEngine(
+        magic_number=config['system']['magic_number'],
+        notifier=notifier,
+        currency=account_info.currency if account_info else None
+    )
+
     # Initialize Stats Reporter
     stats_reporter = StatsReporter(config['system']['magic_number'])
     last_report_time = 0 # Unix timestamp
@@ -83,6 +162,335 @@ def main():
 
     logger.info("Bot Initialized. Entering Main Loop...")
     paused = False
+    # symbol -> (last tick time in ms, its positions' state, paused) as of the last pass
+    last_symbol_state = {}
+    last_symbol_state_lock = threading.Lock()
+
+    def process_symbol(symbol, positions, active_pairs, account):
+        """
+        Trade management and strategy scan for one symbol; symbols run concurrently.
+        Terminal calls go through MT5_LOCK (directly, or inside the data loader and
+        execution engine), so only the strategy and SMC work actually overlaps.
+        """
+        try:
+            # Without a new tick or a change to the symbol's positions, prices, bars and
+            # positions are what the previous pass already acted on. Pausing cuts a pass
+            # short, so a /resume must count as a change too
+            with MT5_LOCK:
+                tick = mt5.symbol_info_tick(symbol)
+            state = None
+            if tick:
+                state = (tick.time_msc, frozenset((p.ticket, p.sl, p.tp) for p in positions or ()), paused)
+                with last_symbol_state_lock:
+                    if last_symbol_state.get(symbol) == state:
+                        return
+                    last_symbol_state[symbol] = state
+
+            # --- MANAGEMENT LOGIC (Trailing & Scaling) ---
+            with MT5_LOCK:
+                symbol_info = mt5.symbol_info(symbol) # Move up for shared use
+
+            if positions and symbol_info:
+                if paused:
+                    return # Skip entry logic if paused
+
+                # Check if we already have a position for this symbol
+                bot_positions = [p for p in positions if p.magic == config['system']['magic_number']]
+                if len(bot_positions) > 0:
+                    # We already have a trade. Manage it (Trailing/BE) but DO NOT look for new entries.
+                    # Run management logic below, then 'continue' to skip Strategy Loop
+                    pass
+                else:
+                    # No bot positions, so we mark to allow entry later?
+                    # Actually, we need to run management code for existing trades (even if we don't own them? No, only ours)
+                    pass
+
+            # --- MANAGEMENT LOGIC (Trailing & Scaling) ---
+            # Logic needs to iterate positions regardless.
+            # Redesign: Iterating positions is fine.
+            # But we must BLOCK the Strategy Entry loop if we have a position.
+
+            has_open_position = False
+            if positions:
+                for pos in positions:
+                    if pos.magic == config['system']['magic_number']:
+                        has_open_position = True
+                        # ... existing management logic checks ...
+                trail_start_pips = config['risk'].get('trailing_stop_activation_pips', 45)
+                be_start_pips = config['risk'].get('breakeven_activation_pips', 20)
+                trail_dist_pips = config['risk'].get('trailing_stop_distance_pips', 25)
+                trail_step_pips = config['risk'].get('trailing_update_step_pips', 5)
+                min_duration = config['risk'].get('min_trade_duration_seconds', 240)
+                point = symbol_info.point
+                # Per-symbol invariants of the BE/trailing checks
+                pip_factor = pip_factors[symbol]
+                trail_dist_points = trail_dist_pips * pip_factor * point
+                step_points = trail_step_pips * pip_factor * point
+
+                for pos in positions:
+                    if pos.type == mt5.ORDER_TYPE_BUY:
+                        current_bid = tick.bid
+                        profit_pips = (current_bid - pos.price_open) / point / pip_factor
+
+                        # Duration Check
+                        duration_seconds = time.time() - pos.time
+                        if duration_seconds < min_duration:
+                            continue 
+
+                        # BE and trailing can both fire on one tick; send only the final SL
+                        target_sl = None
+
+                        # Breakeven Check
+                        if profit_pips >= be_start_pips:
+                            be_level = pos.price_open + (be_start_pips * 0.1 * pip_factor * point) # Secure initial risk
+                            if pos.sl < pos.price_open:
+                                target_sl = be_level
+                                logger.info(f"Moved BUY {pos.ticket} to Breakeven")
+
+                        # Trailing Check
+                        if profit_pips >= trail_start_pips:
+                            # Trail: SL = Current - Trailing Distance
+                            new_sl = current_bid - trail_dist_points
+
+                            # Anti-Spam Step Logic: Only modify if new_sl is > current SL + step
+                            if new_sl > (pos.sl + step_points):
+                                target_sl = new_sl
+
+                        if target_sl is not None:
+                            execution_engine.modify_order(pos.ticket, sl=target_sl, tp=pos.tp)
+
+                    elif pos.type == mt5.ORDER_TYPE_SELL:
+                        current_ask = tick.ask
+                        profit_pips = (pos.price_open - current_ask) / point / pip_factor
+
+                        # Duration Check
+                        duration_seconds = time.time() - pos.time
+                        if duration_seconds < min_duration:
+                            continue
+
+                        # BE and trailing can both fire on one tick; send only the final SL
+                        target_sl = None
+
+                        # Breakeven Check
+                        if profit_pips >= be_start_pips:
+                            be_level = pos.price_open - (be_start_pips * 0.1 * pip_factor * point) 
+                            if pos.sl == 0.0 or pos.sl > pos.price_open:
+                                target_sl = be_level
+                                logger.info(f"Moved SELL {pos.ticket} to Breakeven")
+
+                        # Trailing Check
+                        if profit_pips >= trail_start_pips:
+                            new_sl = current_ask + trail_dist_points
+
+                            # Anti-Spam Step Logic: Only modify if new_sl is < current SL - step
+                            # Or if SL is 0 (first set)
+                            if pos.sl == 0 or new_sl < (pos.sl - step_points):
+                                target_sl = new_sl
+
+                        if target_sl is not None:
+                            execution_engine.modify_order(pos.ticket, sl=target_sl, tp=pos.tp)
+
+
+
+            # --- STRATEGY LOGIC LOOP ---
+            if has_open_position:
+                 # logger.debug(f"Skipping {symbol} - Open Position exists.")
+                 return
+
+            for pair in active_pairs:
+                tf_low = pair['low']
+                tf_high = pair['high']
+                label = pair['label']
+
+                # A. Fetch Data
+                df_low = data_loader.fetch_data(symbol, tf_low, n_bars=100, symbol_info=symbol_info)
+                df_high = data_loader.fetch_data(symbol, tf_high, n_bars=100, symbol_info=symbol_info)
+
+                if df_low is None or df_high is None:
+                    continue
+
+                data_dict = {"LowTF": df_low, "HighTF": df_high}
+
+                # B. Generate Signal
+                signal = strategy.generate_signal(data_dict, symbol)
+
+                if signal.signal_type != models.SignalType.NEUTRAL:
+                    signal.comment = f"{label} {signal.comment}"
+                    logger.info(f"Signal Generated [{label}]: {signal}")
+
+                    # SMC Confluence Filter
+                    smc_enabled = config['strategy'].get('smc_filter_enabled', False)
+                    smc_min_score = config['strategy'].get('smc_min_confluence_score', 20)
+
+                    if smc_enabled and smc_min_score > 0:
+                        try:
+                            fvgs = detect_fvg_zones(df_low)
+                            obs = detect_order_blocks(df_low)
+
+                            confluence_score, smc_zone = calculate_confluence_score(
+                                current_price=df_low.iloc[-1]['close'],
+                                signal_type=signal.signal_type.name,
+                                order_blocks=obs,
+                                fvg_zones=fvgs,
+                                entry_price=signal.price,
+                                stop_loss=signal.sl_price
+                            )
+
+                            if confluence_score < smc_min_score:
+                                logger.info(f"SMC Filter: Skipping {symbol} - Score {confluence_score} < {smc_min_score}")
+                                continue
+
+                            # Log SMC zone details
+                            zone_info = ""
+                            if smc_zone:
+                                zone_info = f" OB={smc_zone.has_ob} FVG={smc_zone.has_fvg}"
+                            logger.info(f"SMC Filter: PASSED - Score {confluence_score}{zone_info}")
+                            signal.comment = f"{signal.comment} [SMC:{confluence_score}]"
+                        except Exception as smc_err:
+                            logger.warning(f"SMC Filter error: {smc_err}")
+
+                    # C. Execution - Initial Entry
+                    # Get Actual Loss Per 1 Lot (The most reliable way across brokers)
+                    # We simulate a 1-lot order and calc profit at the SL price
+                    sl_dist = abs(signal.price - signal.sl_price)
+                    if sl_dist == 0: sl_dist = symbol_info.point * 100
+
+                    order_type_calc = mt5.ORDER_TYPE_BUY if signal.signal_type == models.SignalType.BUY else mt5.ORDER_TYPE_SELL
+                    # Use signal.price as the entry for calculation
+                    price_entry = signal.price
+                    loss_per_lot = _calc_profit(order_type_calc, symbol, 1.0, price_entry, signal.sl_price, symbol_info.digits)
+
+                    # Note: Profit will be negative for a loss, so we take absolute
+                    if loss_per_lot is not None:
+                        loss_per_lot = abs(loss_per_lot)
+                    else:
+                        # Fallback if API fails
+                        loss_per_lot = (sl_dist / symbol_info.trade_tick_size) * symbol_info.trade_tick_value
+
+                    # Size on the equity right now: the iteration's snapshot predates the
+                    # Friday exit and other symbols' fills/closes in this pass
+                    with MT5_LOCK:
+                        sizing_account = mt5.account_info()
+                    sizing_equity = sizing_account.equity if sizing_account else account.equity
+
+                    base_lot = risk_manager.calculate_lot_size(
+                        sizing_equity, 
+                        sl_dist, 
+                        symbol_info.trade_tick_value, 
+                        symbol_info.trade_tick_size,
+                        loss_per_lot_override=loss_per_lot,
+                        symbol=symbol
+                    )
+
+                    if base_lot > 0:
+                        # Check for EXISTING PENDING ORDERS to prevent spam (Duplicate Stop Orders)
+                        with MT5_LOCK:
+                            existing_orders = mt5.orders_get(symbol=symbol)
+                        if existing_orders:
+                            # Filter for our bot's orders
+                            bot_orders = [o for o in existing_orders if o.magic == config['system']['magic_number']]
+                            if len(bot_orders) > 0:
+                                # logic: if we already have a pending order, don't place another.
+                                # Or better: if price is different? For now, simple block.
+                                # logger.debug(f"Skipping {symbol} - Pending Order already exists.")
+                                continue
+
+                        with MT5_LOCK:
+                            tick_info = mt5.symbol_info_tick(symbol)
+                        if not tick_info:
+                            logger.warning(f"Could not fetch tick for {symbol}")
+                            continue
+
+                        spread_points = (tick_info.ask - tick_info.bid) / symbol_info.point
+                        if not risk_manager.check_trade_allowed(account, symbol_info, spread_points):
+                            logger.warning("Trade blocked by Risk Manager rules.")
+                            continue
+
+                        order_type = mt5.ORDER_TYPE_BUY if signal.signal_type == models.SignalType.BUY else mt5.ORDER_TYPE_SELL
+                        price = tick_info.ask if order_type == mt5.ORDER_TYPE_BUY else tick_info.bid
+
+                        # ROI Check - DISABLED (Causing issues with Indices margin calc)
+                        #try:
+                        #    margin = mt5.order_calc_margin(order_type, symbol, base_lot, price)
+                        #    if signal.tp_price > 0:
+                        #        potential_profit = mt5.order_calc_profit(order_type, symbol, base_lot, price, signal.tp_price)
+                        #        if margin and potential_profit:
+                        #            roi_ratio = potential_profit / margin
+                        #            if roi_ratio < 0.30:
+                        #                logger.warning(f"Trade Skipped [{label}]: Low ROI {roi_ratio*100:.1f}%")
+                        #                continue 
+                        #except Exception as e:
+                        #    logger.error(f"Error calculating ROI: {e}")
+                        #    continue
+
+                        if not config['system']['dry_run']:
+                            if signal.is_limit_order:
+                                limit_type = mt5.ORDER_TYPE_BUY_LIMIT if order_type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_SELL_LIMIT
+                                execution_engine.place_limit_order(
+                                    symbol, base_lot, limit_type, price=signal.price, stop_loss=signal.sl_price, take_profit=signal.tp_price,
+                                    comment=signal.comment
+                                )
+                                logger.info(f"Placed {label} LIMIT Order")
+                            elif signal.is_stop_order:
+                                stop_type = mt5.ORDER_TYPE_BUY_STOP if order_type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_SELL_STOP
+                                execution_engine.place_stop_order(
+                                    symbol, base_lot, stop_type, price=signal.price, stop_loss=signal.sl_price, take_profit=signal.tp_price,
+                                    comment=signal.comment
+                                )
+                                logger.info(f"Placed {label} STOP Order")
+                            else:
+                                execution_engine.place_market_order(
+                                    symbol, base_lot, order_type, stop_loss=signal.sl_price, take_profit=signal.tp_price,
+                                    comment=signal.comment, tick=tick_info
+                                )
+                                logger.info(f"Placed {label} MARKET Order")
+                        else:
+                            type_str = "LIMIT" if signal.is_limit_order else ("STOP" if signal.is_stop_order else "MARKET")
+                            logger.info(f"[DRY RUN] Would Place {label} {type_str} {base_lot} Lot at {signal.price}")
+                    else:
+                        logger.warning(f"[{label}] Risk too high or invalid SL distance")
+
+        except Exception as e:
+            import traceback
+            logger.error(f"Error processing {symbol}: {e}")
+            with last_symbol_state_lock:
+                last_symbol_state.pop(symbol, None) # Retry on the next pass
+            logger.error(traceback.format_exc())
+
+    def publish_dashboard(dashboard_data):
+        """Writes the dashboard snapshot to disk and syncs it to the cloud dashboard (if configured)."""
+        dashboard_filename = f"dashboard_data_{config['system']['magic_number']}.json"
+        _write_json_atomic(dashboard_filename, dashboard_data)
+
+        # --- CLOUD SYNC ---
+        dashboard_url = os.environ.get('DASHBOARD_URL')
+        api_key = os.environ.get('DASHBOARD_API_KEY')
+
+        if dashboard_url:
+            try:
+                resp = requests.post(
+                    f"{dashboard_url.rstrip('/')}/api/index",
+                    json=dashboard_data,
+                    headers={"X-API-Key": api_key if api_key else "propbot-secret"},
+                    timeout=5
+                )
+                if resp.status_code == 200:
+                    logger.debug("Cloud Dashboard Updated")
+                else:
+                    logger.warning(f"Cloud update failed: {resp.status_code}")
+            except Exception as cloud_err:
+                logger.warning(f"Cloud sync error: {cloud_err}")
+
+    # Disk and HTTP latency of the export stay off the trading loop
+    dashboard_publisher = SnapshotPublisher(publish_dashboard, name="DashboardPublisher")
+    # Hash of the last published dashboard state, and when it was published
+    last_dashboard_hash = None
+    last_dashboard_publish = 0.0
+    # Symbols are processed concurrently; the compiled strategy/SMC kernels release the GIL
+    # and terminal calls are serialized by MT5_LOCK
+    symbol_executor = ThreadPoolExecutor(max_workers=max(1, min(8, len(symbols))))
+    friday_exit_hour = config['risk'].get('friday_exit_hour', 21)
+    friday_exit_start = friday_exit_end = 0 # Computed on the first pass
 
     try:
         consecutive_failures = 0
@@ -176,8 +584,15 @@ def main():
                     else:
                         notifier.send_message(f"❓ Unknown command: {cmd}\nType /help for the menu.")
             
+            # One position snapshot per iteration, shared by journaling, Friday exit,
+            # trade management and the dashboard export
+            all_positions = mt5.positions_get()
+            positions_by_symbol = _group_by_symbol(all_positions)
+
             # 3. Monitor Closed Trades for Journaling (Only if connected)
-            current_positions = mt5.positions_get(magic=config['system']['magic_number'])
+            current_positions = None
+            if all_positions is not None:
+                current_positions = [p for p in all_positions if p.magic == config['system']['magic_number']]
             
             # CRITICAL GUARD: Only update tickets if positions_get didn't return None (which means error)
             # If it returns empty tuple (), that's fine (no trades).
@@ -198,6 +613,9 @@ def main():
                         if entry_deal and exit_deal:
                             journal.log_trade(exit_deal, entry_deal)
                 
+                if closed_tickets:
+                    # Realized PnL changed; don't serve cached stats from before the close
+                    stats_reporter.invalidate()
                 active_tickets = current_tickets
             else:
                 logger.warning("Journaling: Connection flickered. Skipping closure check to prevent ghost logs.")
@@ -210,7 +628,7 @@ def main():
                 logger.critical(f"RISK BREACH: {reason}. Closing all positions!")
                 execution_engine.close_all_positions()
                 if config['telegram']['enabled']:
-                    notifier.send_message(f"🚨 **RISK BREACH DETECTED**\n{reason}\nAll trades closed. Bot paused.")
+                    notifier.send_message_sync(f"🚨 **RISK BREACH DETECTED**\n{reason}\nAll trades closed. Bot paused.")
                 # Pause bot to prevent further trading
                 time.sleep(600) # Sleep 10 mins
                 continue
@@ -241,16 +659,20 @@ def main():
                 
                 last_report_time = time.time()
             
-            # Friday Exit Check
-            now = datetime.now()
-            exit_hour = config['risk'].get('friday_exit_hour', 21)
-            if now.weekday() == 4 and now.hour >= exit_hour:
+            # Friday Exit Check (the window only moves once a week)
+            now_ts = time.time()
+            if now_ts >= friday_exit_end:
+                friday_exit_start, friday_exit_end = _friday_exit_window(datetime.now(), friday_exit_hour)
+            if now_ts >= friday_exit_start:
                  # Check ONLY our bot's positions
-                 bot_positions = [p for p in mt5.positions_get() if p.magic == config['system']['magic_number']]
+                 bot_positions = [p for p in all_positions or () if p.magic == config['system']['magic_number']]
                  if len(bot_positions) > 0:
                      logger.warning("FRIDAY EXIT TRIGGERED: Closing bot positions.")
                      execution_engine.close_all_positions()
                      time.sleep(60)
+                     # The snapshot predates the close
+                     all_positions = mt5.positions_get()
+                     positions_by_symbol = _group_by_symbol(all_positions)
             
             # News Auto Filter
             if news_loader.is_blocked():
@@ -261,273 +683,14 @@ def main():
             # Main Event Loop
             active_pairs = config['strategy'].get('active_pairs', [{"low": "H4", "high": "D1", "label": "SWING"}])
 
-            for symbol in symbols:
-                try:
-                    # --- MANAGEMENT LOGIC (Trailing & Scaling) ---
-                    positions = mt5.positions_get(symbol=symbol)
-                    symbol_info = mt5.symbol_info(symbol) # Move up for shared use
-
-                    if positions and symbol_info:
-                        if paused:
-                            continue # Skip entry logic if paused
-
-                        # Check if we already have a position for this symbol
-                        bot_positions = [p for p in positions if p.magic == config['system']['magic_number']]
-                        if len(bot_positions) > 0:
-                            # We already have a trade. Manage it (Trailing/BE) but DO NOT look for new entries.
-                            # Run management logic below, then 'continue' to skip Strategy Loop
-                            pass
-                        else:
-                            # No bot positions, so we mark to allow entry later?
-                            # Actually, we need to run management code for existing trades (even if we don't own them? No, only ours)
-                            pass
-
-                    # --- MANAGEMENT LOGIC (Trailing & Scaling) ---
-                    # Logic needs to iterate positions regardless.
-                    # Redesign: Iterating positions is fine.
-                    # But we must BLOCK the Strategy Entry loop if we have a position.
-                    
-                    has_open_position = False
-                    if positions:
-                        for pos in positions:
-                            if pos.magic == config['system']['magic_number']:
-                                has_open_position = True
-                                # ... existing management logic checks ...
-                        trail_start_pips = config['risk'].get('trailing_stop_activation_pips', 45)
-                        be_start_pips = config['risk'].get('breakeven_activation_pips', 20)
-                        trail_dist_pips = config['risk'].get('trailing_stop_distance_pips', 25)
-                        trail_step_pips = config['risk'].get('trailing_update_step_pips', 5)
-                        min_duration = config['risk'].get('min_trade_duration_seconds', 240)
-                        point = symbol_info.point
-                        
-                        for pos in positions:
-                            if pos.type == mt5.ORDER_TYPE_BUY:
-                                current_bid = mt5.symbol_info_tick(symbol).bid
-                                # Dynamic Pip Factor: 10 for Forex/Gold, 1 for Indices
-                                # Indices use 1 point = 1 pip logic
-                                is_index = any(idx in symbol.upper() for idx in ["US30", "NAS100", "US100", "US500", "GER30", "DE30", "UK100", "JPN225"])
-                                pip_factor = 1 if is_index else 10
-                                profit_pips = (current_bid - pos.price_open) / point / pip_factor
-                                
-                                # Duration Check
-                                duration_seconds = time.time() - pos.time
-                                if duration_seconds < min_duration:
-                                    continue 
-
-                                # Breakeven Check
-                                if profit_pips >= be_start_pips:
-                                    be_level = pos.price_open + (be_start_pips * 0.1 * pip_factor * point) # Secure initial risk
-                                    if pos.sl < pos.price_open:
-                                        execution_engine.modify_order(pos.ticket, sl=be_level, tp=pos.tp)
-                                        logger.info(f"Moved BUY {pos.ticket} to Breakeven")
-
-                                # Trailing Check
-                                if profit_pips >= trail_start_pips:
-                                    # Trail: SL = Current - Trailing Distance
-                                    trail_dist_points = (trail_dist_pips * 10 * point) if pip_factor == 10 else (trail_dist_pips * point)
-                                    step_points = (trail_step_pips * 10 * point) if pip_factor == 10 else (trail_step_pips * point)
-                                    new_sl = current_bid - trail_dist_points
-                                    
-                                    # Anti-Spam Step Logic: Only modify if new_sl is > current SL + step
-                                    if new_sl > (pos.sl + step_points):
-                                        execution_engine.modify_order(pos.ticket, sl=new_sl, tp=pos.tp)
-                            
-                            elif pos.type == mt5.ORDER_TYPE_SELL:
-                                current_ask = mt5.symbol_info_tick(symbol).ask
-                                is_index = any(idx in symbol.upper() for idx in ["US30", "NAS100", "US100", "US500", "GER30", "DE30", "UK100", "JPN225"])
-                                pip_factor = 1 if is_index else 10
-                                profit_pips = (pos.price_open - current_ask) / point / pip_factor
-                                
-                                # Duration Check
-                                duration_seconds = time.time() - pos.time
-                                if duration_seconds < min_duration:
-                                    continue
-
-                                # Breakeven Check
-                                if profit_pips >= be_start_pips:
-                                    be_level = pos.price_open - (be_start_pips * 0.1 * pip_factor * point) 
-                                    if pos.sl == 0.0 or pos.sl > pos.price_open:
-                                        execution_engine.modify_order(pos.ticket, sl=be_level, tp=pos.tp)
-                                        logger.info(f"Moved SELL {pos.ticket} to Breakeven")
-
-                                # Trailing Check
-                                if profit_pips >= trail_start_pips:
-                                    trail_dist_points = (trail_dist_pips * 10 * point) if pip_factor == 10 else (trail_dist_pips * point)
-                                    step_points = (trail_step_pips * 10 * point) if pip_factor == 10 else (trail_step_pips * point)
-                                    new_sl = current_ask + trail_dist_points
-                                    
-                                    # Anti-Spam Step Logic: Only modify if new_sl is < current SL - step
-                                    # Or if SL is 0 (first set)
-                                    if pos.sl == 0 or new_sl < (pos.sl - step_points):
-                                        execution_engine.modify_order(pos.ticket, sl=new_sl, tp=pos.tp)
-
-
-
-                    # --- STRATEGY LOGIC LOOP ---
-                    if has_open_position:
-                         # logger.debug(f"Skipping {symbol} - Open Position exists.")
-                         continue
-
-                    for pair in active_pairs:
-                        tf_low = pair['low']
-                        tf_high = pair['high']
-                        label = pair['label']
-                        
-                        # A. Fetch Data
-                        df_low = data_loader.fetch_data(symbol, tf_low, n_bars=100)
-                        df_high = data_loader.fetch_data(symbol, tf_high, n_bars=100)
-                        
-                        if df_low is None or df_high is None:
-                            continue
-                            
-                        data_dict = {"LowTF": df_low, "HighTF": df_high}
-
-                        # B. Generate Signal
-                        signal = strategy.generate_signal(data_dict, symbol)
-                        
-                        if signal.signal_type != models.SignalType.NEUTRAL:
-                            signal.comment = f"{label} {signal.comment}"
-                            logger.info(f"Signal Generated [{label}]: {signal}")
-                            
-                            # SMC Confluence Filter
-                            smc_enabled = config['strategy'].get('smc_filter_enabled', False)
-                            smc_min_score = config['strategy'].get('smc_min_confluence_score', 20)
-                            
-                            if smc_enabled and smc_min_score > 0:
-                                try:
-                                    fvgs = detect_fvg_zones(df_low)
-                                    obs = detect_order_blocks(df_low)
-                                    
-                                    confluence_score, smc_zone = calculate_confluence_score(
-                                        current_price=df_low.iloc[-1]['close'],
-                                        signal_type=signal.signal_type.name,
-                                        order_blocks=obs,
-                                        fvg_zones=fvgs,
-                                        entry_price=signal.price,
-                                        stop_loss=signal.sl_price
-                                    )
-                                    
-                                    if confluence_score < smc_min_score:
-                                        logger.info(f"SMC Filter: Skipping {symbol} - Score {confluence_score} < {smc_min_score}")
-                                        continue
-                                    
-                                    # Log SMC zone details
-                                    zone_info = ""
-                                    if smc_zone:
-                                        zone_info = f" OB={smc_zone.has_ob} FVG={smc_zone.has_fvg}"
-                                    logger.info(f"SMC Filter: PASSED - Score {confluence_score}{zone_info}")
-                                    signal.comment = f"{signal.comment} [SMC:{confluence_score}]"
-                                except Exception as smc_err:
-                                    logger.warning(f"SMC Filter error: {smc_err}")
-                            
-                            # C. Execution - Initial Entry
-                            acc_info = mt5.account_info()
-                            symbol_info = mt5.symbol_info(symbol)
-                            
-                            if not acc_info:
-                                continue
-
-                            # Get Actual Loss Per 1 Lot (The most reliable way across brokers)
-                            # We simulate a 1-lot order and calc profit at the SL price
-                            sl_dist = abs(signal.price - signal.sl_price)
-                            if sl_dist == 0: sl_dist = symbol_info.point * 100
-                            
-                            order_type_calc = mt5.ORDER_TYPE_BUY if signal.signal_type == models.SignalType.BUY else mt5.ORDER_TYPE_SELL
-                            # Use signal.price as the entry for calculation
-                            price_entry = signal.price
-                            loss_per_lot = mt5.order_calc_profit(order_type_calc, symbol, 1.0, price_entry, signal.sl_price)
-                            
-                            # Note: Profit will be negative for a loss, so we take absolute
-                            if loss_per_lot is not None:
-                                loss_per_lot = abs(loss_per_lot)
-                            else:
-                                # Fallback if API fails
-                                loss_per_lot = (sl_dist / symbol_info.trade_tick_size) * symbol_info.trade_tick_value
-
-                            base_lot = risk_manager.calculate_lot_size(
-                                acc_info.equity, 
-                                sl_dist, 
-                                symbol_info.trade_tick_value, 
-                                symbol_info.trade_tick_size,
-                                loss_per_lot_override=loss_per_lot,
-                                symbol=symbol
-                            )
-                            
-                            if base_lot > 0:
-                                # Check for EXISTING PENDING ORDERS to prevent spam (Duplicate Stop Orders)
-                                existing_orders = mt5.orders_get(symbol=symbol)
-                                if existing_orders:
-                                    # Filter for our bot's orders
-                                    bot_orders = [o for o in existing_orders if o.magic == config['system']['magic_number']]
-                                    if len(bot_orders) > 0:
-                                        # logic: if we already have a pending order, don't place another.
-                                        # Or better: if price is different? For now, simple block.
-                                        # logger.debug(f"Skipping {symbol} - Pending Order already exists.")
-                                        continue
-
-                                tick_info = mt5.symbol_info_tick(symbol)
-                                if not tick_info:
-                                    logger.warning(f"Could not fetch tick for {symbol}")
-                                    continue
-                                
-                                spread_points = (tick_info.ask - tick_info.bid) / symbol_info.point
-                                if not risk_manager.check_trade_allowed(acc_info, symbol_info, spread_points):
-                                    logger.warning("Trade blocked by Risk Manager rules.")
-                                    continue
-
-                                order_type = mt5.ORDER_TYPE_BUY if signal.signal_type == models.SignalType.BUY else mt5.ORDER_TYPE_SELL
-                                price = tick_info.ask if order_type == mt5.ORDER_TYPE_BUY else tick_info.bid
-                                
-                                # ROI Check - DISABLED (Causing issues with Indices margin calc)
-                                #try:
-                                #    margin = mt5.order_calc_margin(order_type, symbol, base_lot, price)
-                                #    if signal.tp_price > 0:
-                                #        potential_profit = mt5.order_calc_profit(order_type, symbol, base_lot, price, signal.tp_price)
-                                #        if margin and potential_profit:
-                                #            roi_ratio = potential_profit / margin
-                                #            if roi_ratio < 0.30:
-                                #                logger.warning(f"Trade Skipped [{label}]: Low ROI {roi_ratio*100:.1f}%")
-                                #                continue 
-                                #except Exception as e:
-                                #    logger.error(f"Error calculating ROI: {e}")
-                                #    continue
-
-                                if not config['system']['dry_run']:
-                                    if signal.is_limit_order:
-                                        limit_type = mt5.ORDER_TYPE_BUY_LIMIT if order_type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_SELL_LIMIT
-                                        execution_engine.place_limit_order(
-                                            symbol, base_lot, limit_type, price=signal.price, stop_loss=signal.sl_price, take_profit=signal.tp_price,
-                                            comment=signal.comment
-                                        )
-                                        logger.info(f"Placed {label} LIMIT Order")
-                                    elif signal.is_stop_order:
-                                        stop_type = mt5.ORDER_TYPE_BUY_STOP if order_type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_SELL_STOP
-                                        execution_engine.place_stop_order(
-                                            symbol, base_lot, stop_type, price=signal.price, stop_loss=signal.sl_price, take_profit=signal.tp_price,
-                                            comment=signal.comment
-                                        )
-                                        logger.info(f"Placed {label} STOP Order")
-                                    else:
-                                        execution_engine.place_market_order(
-                                            symbol, base_lot, order_type, stop_loss=signal.sl_price, take_profit=signal.tp_price,
-                                            comment=signal.comment
-                                        )
-                                        logger.info(f"Placed {label} MARKET Order")
-                                else:
-                                    type_str = "LIMIT" if signal.is_limit_order else ("STOP" if signal.is_stop_order else "MARKET")
-                                    logger.info(f"[DRY RUN] Would Place {label} {type_str} {base_lot} Lot at {signal.price}")
-                            else:
-                                logger.warning(f"[{label}] Risk too high or invalid SL distance")
-
-                except Exception as e:
-                    import traceback
-                    logger.error(f"Error processing {symbol}: {e}")
-                    logger.error(traceback.format_exc())
+            # Symbols are independent, so they are processed concurrently; their terminal
+            # calls are serialized by MT5_LOCK while strategy/SMC evaluation overlaps
+            list(symbol_executor.map(
+                lambda symbol: process_symbol(symbol, positions_by_symbol.get(symbol), active_pairs, acc_info),
+                symbols))
 
             # --- DASHBOARD EXPORT ---
             try:
-                import json
-                
                 # Snapshot Data
                 acc = mt5.account_info()
                 daily_stats = stats_reporter.get_stats(since_midnight=True)
@@ -535,7 +698,7 @@ def main():
                 
                 # Active Trades List
                 open_trades = []
-                positions = mt5.positions_get()
+                positions = all_positions
                 if positions:
                     for p in positions:
                         open_trades.append({
@@ -569,29 +732,18 @@ def main():
                     "open_positions": open_trades
                 }
                 
-                dashboard_filename = f"dashboard_data_{config['system']['magic_number']}.json"
-                with open(dashboard_filename, "w") as f:
-                    json.dump(dashboard_data, f, indent=4)
-                
-                # --- CLOUD SYNC ---
-                dashboard_url = os.environ.get('DASHBOARD_URL')
-                api_key = os.environ.get('DASHBOARD_API_KEY')
-                
-                if dashboard_url:
-                    try:
-                        resp = requests.post(
-                            f"{dashboard_url.rstrip('/')}/api/index",
-                            json=dashboard_data,
-                            headers={"X-API-Key": api_key if api_key else "propbot-secret"},
-                            timeout=5
-                        )
-                        if resp.status_code == 200:
-                            logger.debug("Cloud Dashboard Updated")
-                        else:
-                            logger.warning(f"Cloud update failed: {resp.status_code}")
-                    except Exception as cloud_err:
-                        logger.warning(f"Cloud sync error: {cloud_err}")
-                    
+                # Idle iterations (no ticks, no equity change) skip the write and sync
+                dashboard_hash = hash((
+                    dashboard_data["balance"], dashboard_data["equity"], dashboard_data["daily_pnl"],
+                    dashboard_data["daily_trades"], dashboard_data["high_water_mark"],
+                    tuple((t["ticket"], t["profit"], t["sl"], t["tp"]) for t in open_trades)))
+                now = time.time()
+                if dashboard_hash != last_dashboard_hash or now - last_dashboard_publish >= DASHBOARD_HEARTBEAT_SECS:
+                    last_dashboard_hash = dashboard_hash
+                    last_dashboard_publish = now
+                    # File write and cloud sync happen on the publisher thread
+                    dashboard_publisher.submit(dashboard_data)
+
             except Exception as e:
                 logger.error(f"Dashboard Export Failed: {e}")
 
@@ -599,7 +751,10 @@ def main():
 
     except KeyboardInterrupt:
         logger.info("Bot stopping...")
+        symbol_executor.shutdown(wait=True)
         data_loader.shutdown()
+        journal.close()
+        risk_manager.close()
 
 if __name__ == "__main__":
     main()
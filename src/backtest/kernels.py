@@ -0,0 +1,165 @@
+"""
+Backtest Kernels
+Numeric hot loops of the bar-by-bar backtester, compiled with Numba when available.
+"""
+import numpy as np
+from src.utils.njit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def _manage_trades_loop(direction, entry, sl, tp, active, pnl, high, low, trail_activation, trail_step):
+    """
+    Applies one bar of SL/TP/trailing-stop management to the open trades.
+
+    Trades are stored as parallel arrays, with `direction` +1 for BUY and -1 for SELL.
+    SL is checked before TP; if neither is hit
+    the stop trails once profit reaches `trail_activation`. Closed trades get their
+    PnL written and their `active` flag cleared.
+
+    Returns:
+    - Number of trades closed on this bar
+    """
+    n_closed = 0
+    for k in range(active.shape[0]):
+        if not active[k]:
+            continue
+
+        # Direction multiplier folds the BUY/SELL cases into one set of comparisons:
+        # `adverse` is the side that hits the stop, `favorable` the side that hits the target
+        d = direction[k]
+        adverse = low if d > 0 else high
+        favorable = high if d > 0 else low
+
+        if d * (adverse - sl[k]) <= 0:
+            pnl[k] = d * (sl[k] - entry[k])
+        elif tp[k] > 0 and d * (favorable - tp[k]) >= 0:
+            pnl[k] = d * (tp[k] - entry[k])
+        else:
+            profit_dist = d * (favorable - entry[k])
+            if profit_dist >= trail_activation:
+                new_sl = entry[k] + d * (profit_dist - trail_step)
+                if d * (new_sl - sl[k]) > 0:
+                    sl[k] = new_sl
+            continue
+
+        active[k] = False
+        n_closed += 1
+
+    return n_closed
+
+
+def _manage_trades_vectorized(direction, entry, sl, tp, active, pnl, high, low, trail_activation, trail_step):
+    """
+    NumPy-mask version of `_manage_trades_loop` for when numba is unavailable.
+    Evaluates SL/TP hits and trailing updates for all open trades at once.
+    """
+    is_buy = direction > 0
+
+    sl_hit = active & np.where(is_buy, low <= sl, high >= sl)
+    tp_hit = active & ~sl_hit & (tp > 0) & np.where(is_buy, high >= tp, low <= tp)
+    hit = sl_hit | tp_hit
+
+    exit_price = np.where(sl_hit, sl, tp)
+    pnl[hit] = direction[hit] * (exit_price[hit] - entry[hit])
+
+    # Trailing stop for trades that survived this bar
+    profit_dist = np.where(is_buy, high - entry, entry - low)
+    new_sl = entry + direction * (profit_dist - trail_step)
+    trail = (active & ~hit & (profit_dist >= trail_activation)
+             & np.where(is_buy, new_sl > sl, new_sl < sl))
+    sl[trail] = new_sl[trail]
+
+    active[hit] = False
+    return int(hit.sum())
+
+
+# Compiled scalar loop when numba is present, otherwise the vectorized NumPy path
+manage_trades = _manage_trades_loop if NUMBA_AVAILABLE else _manage_trades_vectorized
+
+
+@njit(cache=True)
+def simulate_bars(bars, high, low, close, ts_ns, friday_close,
+                  sig_type, sig_price, sig_sl, sig_tp, sig_is_stop,
+                  trail_activation, trail_step, expiry_ns,
+                  direction, entry, sl, tp, risk, pnl, active):
+    """
+    Walks the given bar positions: Friday exit, pending stop trigger/expiry,
+    SL/TP/trailing management and new entries from the precomputed signals.
+
+    Trades are written into the preallocated trade columns, which must hold at
+    least 2 * len(bars) trades (at most one fill and one market entry per bar).
+    New orders are only placed when nothing is open or pending, so there is at
+    most one pending stop order at a time.
+
+    Returns:
+    - Number of trade slots used
+    """
+    n = 0
+    first_open = 0      # Trades before this slot are all closed
+    n_active = 0
+    has_pending = False
+    pend_buy = False
+    pend_entry = 0.0
+    pend_sl = 0.0
+    pend_tp = 0.0
+    pend_ns = 0
+
+    for b in range(bars.shape[0]):
+        i = bars[b]
+        if friday_close[i]:
+            has_pending = False
+            for k in range(first_open, n):
+                if active[k]:
+                    pnl[k] = direction[k] * (close[i] - entry[k])
+                    active[k] = False
+            first_open = n
+            n_active = 0
+            continue
+
+        # Pending stop order: expire after expiry_ns, otherwise fill at the order price
+        if has_pending:
+            if ts_ns[i] - pend_ns > expiry_ns:
+                has_pending = False
+            elif (high[i] >= pend_entry) if pend_buy else (low[i] <= pend_entry):
+                direction[n] = 1 if pend_buy else -1
+                entry[n] = pend_entry
+                sl[n] = pend_sl
+                tp[n] = pend_tp
+                risk[n] = abs(pend_entry - pend_sl)
+                pnl[n] = 0.0
+                active[n] = True
+                n += 1
+                n_active += 1
+                has_pending = False
+
+        if n_active > 0:
+            # Compiled loop under numba; without it this whole walk is Python and the
+            # NumPy-mask version handles the open trades instead
+            n_active -= manage_trades(direction[first_open:n], entry[first_open:n],
+                                      sl[first_open:n], tp[first_open:n],
+                                      active[first_open:n], pnl[first_open:n],
+                                      high[i], low[i], trail_activation, trail_step)
+            while first_open < n and not active[first_open]:
+                first_open += 1
+
+        if n_active == 0 and not has_pending and sig_type[i] != 0:
+            if sig_is_stop[i]:
+                has_pending = True
+                pend_buy = sig_type[i] == 1
+                pend_entry = sig_price[i]
+                pend_sl = sig_sl[i]
+                pend_tp = sig_tp[i]
+                pend_ns = ts_ns[i]
+            else:
+                # Immediate market entry
+                direction[n] = sig_type[i]
+                entry[n] = sig_price[i]
+                sl[n] = sig_sl[i]
+                tp[n] = sig_tp[i]
+                risk[n] = abs(sig_price[i] - sig_sl[i])
+                pnl[n] = 0.0
+                active[n] = True
+                n += 1
+                n_active += 1
+
+    return n
@@ -0,0 +1,169 @@
+"""
+Backtest Signal Precomputation
+Evaluates the strategy once per bar ahead of the trade simulation.
+"""
+import hashlib
+import inspect
+import sys
+import numpy as np
+import pandas as pd
+from src.models import SignalType
+from src.data.bar_cache import read_cached, write_cached
+
+# Bump when cached signals must be invalidated for a reason the hashed sources can't see
+# (e.g. a behaviour change in a third-party dependency)
+SIGNAL_CACHE_VERSION = 1
+
+# Per-bar signal record. type: 1 = BUY, -1 = SELL, 0 = NEUTRAL
+SIGNAL_DTYPE = np.dtype([
+    ('type', np.int8),
+    ('price', np.float64),
+    ('sl', np.float64),
+    ('tp', np.float64),
+    ('is_stop', np.bool_),
+])
+
+
+def align_trend_index(df_entry: pd.DataFrame, df_trend: pd.DataFrame) -> np.ndarray:
+    """
+    For every entry bar, returns the number of trend bars at or before its timestamp.
+
+    Both indexes are monotonic, so the trend position only ever moves forward as the
+    entry bar advances; one searchsorted over all entry times computes every position
+    at once, replacing a full `df_trend.index <= t` mask per bar.
+    """
+    return np.searchsorted(df_trend.index.values, df_entry.index.values, side='right')
+
+
+def precompute_signals(df_entry: pd.DataFrame, df_trend: pd.DataFrame, strategy, symbol: str,
+                       eligible: np.ndarray) -> np.ndarray:
+    """
+    Runs `strategy.generate_signal` for every eligible entry bar.
+
+    The strategy only sees data up to (and including) the bar being evaluated, so the
+    result at bar i is identical to calling it live inside the simulation loop.
+
+    Parameters:
+    - eligible: Boolean mask of entry bars that may open trades
+
+    Returns:
+    - Structured array (SIGNAL_DTYPE) with one record per entry bar
+    """
+    signals = np.zeros(len(df_entry), dtype=SIGNAL_DTYPE)
+    trend_end = align_trend_index(df_entry, df_trend)
+
+    # Cheap per-bar prefilter; the full strategy only runs where a signal is possible
+    candidates = strategy.candidate_mask(df_entry)
+    trend_views = {}
+    # Strategies that only read recent bars get a fixed-size tail, not a growing prefix
+    tail = strategy.required_bars()
+    # One dict reused for every call; only its values change
+    data_map = {"LowTF": None, "HighTF": None, "HighTFTrend": None}
+    trend_of = getattr(strategy, "trend_of", None)
+
+    for i in np.flatnonzero(eligible):
+        if not candidates[i]:
+            continue
+
+        # Consecutive entry bars usually share a trend position; reuse its slice
+        # and, where the strategy exposes it, the trend read from that slice
+        pos = trend_end[i]
+        cached = trend_views.get(pos)
+        if cached is None:
+            trend_start = 0 if tail is None else max(0, pos - tail)
+            view = df_trend.iloc[trend_start:pos]
+            cached = trend_views[pos] = (view, trend_of(view) if trend_of and len(view) else None)
+        trend_view, trend = cached
+
+        start = 0 if tail is None else max(0, i + 1 - tail)
+        data_map["LowTF"] = df_entry.iloc[start:i+1]
+        data_map["HighTF"] = trend_view
+        data_map["HighTFTrend"] = trend
+        signal = strategy.generate_signal(data_map, symbol)
+        if signal.signal_type == SignalType.NEUTRAL:
+            continue
+
+        signals[i] = (int(signal.signal_type),
+                      signal.price, signal.sl_price, signal.tp_price, signal.is_stop_order)
+
+    return signals
+
+
+def _signal_cache_key(df_entry, df_trend, strategy, symbol, eligible) -> tuple:
+    """
+    Fingerprint of everything a signal array depends on: both bar frames, the
+    eligible mask, the strategy's config and the source of every project module
+    involved in producing it (see _signal_source_modules).
+    """
+    h = hashlib.sha1()
+    h.update(str(SIGNAL_CACHE_VERSION).encode("utf-8"))
+    for df in (df_entry, df_trend):
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(np.packbits(eligible).tobytes())
+    h.update(repr(sorted(strategy.config.get('strategy', {}).items())).encode("utf-8"))
+    for module in _signal_source_modules(strategy):
+        h.update(module.__name__.encode("utf-8"))
+        h.update(inspect.getsource(module).encode("utf-8"))
+    return ("signals", type(strategy).__name__, symbol, h.hexdigest())
+
+
+def _signal_source_modules(strategy) -> list:
+    """
+    This module and the strategy's, plus every `src` module they reach through their
+    imports (base classes, models, rolling/njit helpers...), sorted by name. Editing
+    any of them changes the signal cache key.
+    """
+    pending = [sys.modules[__name__]] + [sys.modules[cls.__module__] for cls in type(strategy).__mro__]
+    seen = {}
+    while pending:
+        module = pending.pop()
+        if module.__name__ in seen or not module.__name__.startswith("src."):
+            continue
+        seen[module.__name__] = module
+        for value in vars(module).values():
+            name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+            if isinstance(name, str) and name.startswith("src.") and name in sys.modules:
+                pending.append(sys.modules[name])
+    return [seen[name] for name in sorted(seen)]
+
+
+def cached_signals(df_entry: pd.DataFrame, df_trend: pd.DataFrame, strategy, symbol: str,
+                   eligible: np.ndarray) -> np.ndarray:
+    """
+    `precompute_signals` backed by the on-disk bar cache, so repeated backtests over
+    the same bars (e.g. A/B runs of trade-management settings) skip signal generation.
+    """
+    key = _signal_cache_key(df_entry, df_trend, strategy, symbol, eligible)
+    cached = read_cached(key)
+    if cached is not None and len(cached) == len(df_entry):
+        return cached.to_records(index=False).astype(SIGNAL_DTYPE).view(np.ndarray)
+
+    signals = precompute_signals(df_entry, df_trend, strategy, symbol, eligible)
+    write_cached(key, pd.DataFrame(signals))
+    return signals
+
+
+def apply_smc_filter(signals: np.ndarray, df_entry: pd.DataFrame, min_score: int,
+                     window: int = 100) -> np.ndarray:
+    """
+    Drops signals whose SMC confluence score is below `min_score`, mirroring the
+    live SMC filter (which scores against zones on the last `window` entry bars).
+    Zones are detected on each signal bar's own trailing window (see SMCZoneTimeline).
+
+    Returns:
+    - Filtered copy of `signals`
+    """
+    from .smc_timeline import SMCZoneTimeline
+
+    filtered = signals.copy()
+    signal_bars = np.flatnonzero(signals['type'] != 0)
+    if signal_bars.size == 0:
+        return filtered
+
+    timeline = SMCZoneTimeline(df_entry, window)
+    for i in signal_bars:
+        sig = signals[i]
+        score = timeline.score(i, 'BUY' if sig['type'] == 1 else 'SELL', sig['price'], sig['sl'])
+        if score < min_score:
+            filtered[i] = 0
+    return filtered
@@ -0,0 +1,81 @@
+"""
+Backtest Trade Book
+Struct-of-arrays storage for simulated trades.
+"""
+import numpy as np
+from .kernels import simulate_bars
+from .signals import SIGNAL_DTYPE
+
+# Prices only need ~7 significant digits; float32 halves the bytes the bar loop moves
+PRICE_DTYPE = np.float32
+
+
+class TradeBook:
+    """
+    Stores trades as parallel NumPy columns instead of a list of dicts.
+
+    Trades are appended into preallocated slots and never removed; closing a trade
+    only clears its `active` flag, so there is no O(n) list removal in the bar loop.
+    """
+
+    def __init__(self, capacity: int = 1024, dtype=PRICE_DTYPE):
+        self.direction = np.zeros(capacity, dtype=np.int8)   # +1 BUY, -1 SELL
+        self.entry = np.zeros(capacity, dtype=dtype)
+        self.sl = np.zeros(capacity, dtype=dtype)
+        self.tp = np.zeros(capacity, dtype=dtype)
+        self.risk = np.zeros(capacity, dtype=dtype)    # |entry - sl| at open, for R multiples
+        self.pnl = np.zeros(capacity, dtype=dtype)
+        self.active = np.zeros(capacity, dtype=np.bool_)
+        self.n = 0          # Slots used
+        self.n_active = 0   # Trades currently open
+        self.first_open = 0 # Every slot before this one is closed
+
+    def simulate(self, bars, high, low, close, ts_ns, friday_close, signals,
+                 trail_activation: float, trail_step: float, expiry_ns: int):
+        """
+        Runs the whole bar walk in one kernel call (see kernels.simulate_bars),
+        appending the resulting trades to the book.
+        """
+        while self.entry.shape[0] - self.n < 2 * len(bars):
+            self._grow()
+        n0 = self.n
+        used = simulate_bars(bars, high, low, close, ts_ns, friday_close,
+                             signals['type'], signals['price'], signals['sl'], signals['tp'], signals['is_stop'],
+                             trail_activation, trail_step, expiry_ns,
+                             self.direction[n0:], self.entry[n0:], self.sl[n0:], self.tp[n0:],
+                             self.risk[n0:], self.pnl[n0:], self.active[n0:])
+        self.n = n0 + used
+        self.n_active = int(self.active[:self.n].sum())
+        open_slots = np.flatnonzero(self.active[:self.n])
+        self.first_open = int(open_slots[0]) if open_slots.size else self.n
+
+    def summary(self):
+        """Returns (wins, trades, total_pnl, total_r) over closed trades in one vectorized pass."""
+        n = self.n
+        closed = ~self.active[:n]
+        # Reductions accumulate in float64 even when prices are stored narrower
+        pnl = self.pnl[:n][closed].astype(np.float64)
+        risk = self.risk[:n][closed].astype(np.float64)
+        r_multiples = np.divide(pnl, risk, out=np.zeros_like(pnl), where=risk > 0)
+        return int((pnl > 0).sum()), int(pnl.shape[0]), float(pnl.sum()), float(r_multiples.sum())
+
+    def _grow(self):
+        for name in ("direction", "entry", "sl", "tp", "risk", "pnl", "active"):
+            col = getattr(self, name)
+            grown = np.zeros(col.shape[0] * 2, dtype=col.dtype)
+            grown[:col.shape[0]] = col
+            setattr(self, name, grown)
+
+
+def warmup_kernels():
+    """
+    Compiles the bar-walk kernel for the production dtypes on a two-bar dummy run.
+
+    Call once in the parent before starting worker processes: forked workers inherit
+    the compiled code, and spawned ones load it from numba's on-disk cache instead of
+    each paying the JIT cost on their first pair.
+    """
+    prices = np.ones(2, dtype=PRICE_DTYPE)
+    TradeBook(capacity=4).simulate(np.arange(2), prices, prices, prices, np.zeros(2, dtype=np.int64),
+                                   np.zeros(2, dtype=np.bool_), np.zeros(2, dtype=SIGNAL_DTYPE),
+                                   1.0, 1.0, 1)
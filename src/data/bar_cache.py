@@ -0,0 +1,42 @@
+import hashlib
+import logging
+import os
+import time
+from typing import Optional
+import pandas as pd
+
+logger = logging.getLogger("PropBot.Data")
+
+# Content-addressed store: one parquet file per hashed request key
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "propbot_bt")
+
+def _cache_path(key: tuple) -> str:
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.parquet")
+
+def read_cached(key: tuple, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """
+    Returns the cached DataFrame for a request key, or None on a miss.
+    Entries written more than `max_age` seconds ago count as a miss.
+    """
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+    if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+        return None
+    try:
+        return pd.read_parquet(path, engine="pyarrow")
+    except Exception as e:
+        logger.warning(f"Bar cache: Failed to read {path}: {e}")
+        return None
+
+def write_cached(key: tuple, df: pd.DataFrame):
+    """
+    Stores a DataFrame under a request key. Failures are logged, never raised.
+    """
+    path = _cache_path(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(path, engine="pyarrow", compression="zstd")
+    except Exception as e:
+        logger.warning(f"Bar cache: Failed to write {path}: {e}")
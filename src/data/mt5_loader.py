@@ -1,15 +1,36 @@
 import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import logging
+import threading
+import time
 from typing import Optional
 
 logger = logging.getLogger("PropBot.Data")
 
+# The MetaTrader5 API is not documented as thread-safe, and symbols are processed on worker
+# threads: every terminal call made off the main loop goes through this lock (re-entrant, so
+# a locked method may call another)
+MT5_LOCK = threading.RLock()
+
 class MT5DataLoader:
+    # String timeframe -> MT5 constant, built once at import
+    _TF_MAP = {
+        "M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5, "M15": mt5.TIMEFRAME_M15,
+        "M30": mt5.TIMEFRAME_M30, "H1": mt5.TIMEFRAME_H1, "H4": mt5.TIMEFRAME_H4,
+        "D1": mt5.TIMEFRAME_D1
+    }
+    # copy_rates field -> DataFrame column (Open, High, Low, Close, Volume conventions)
+    _RATE_COLUMNS = {"tick_volume": "volume", "real_volume": "vol_real"}
+    # Bar length per timeframe, for sizing incremental fetches
+    _TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
+
     def __init__(self, config):
         self.config = config
         self.connected = False
+        # (symbol, timeframe, n_bars) -> (rates, wall time of the fetch)
+        self._rates_cache = {}
 
     def connect(self, credentials):
         """
@@ -17,6 +38,7 @@ class MT5DataLoader:
         """
         # Ensure we start fresh if already initialized
         mt5.shutdown()
+        self._rates_cache.clear()
         
         path = self.config['system'].get('mt5_path')
         if not (mt5.initialize(path=path) if path else mt5.initialize()):
@@ -42,21 +64,18 @@ class MT5DataLoader:
         """Checks if both the class state and the MT5 terminal are connected."""
         if not self.connected:
             return False
-        terminal_info = mt5.terminal_info()
+        with MT5_LOCK:
+            terminal_info = mt5.terminal_info()
         return terminal_info is not None and terminal_info.connected
 
     def get_timeframe_constant(self, tf_str):
         """Converts string timeframe to MT5 constant"""
-        tf_map = {
-            "M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5, "M15": mt5.TIMEFRAME_M15,
-            "M30": mt5.TIMEFRAME_M30, "H1": mt5.TIMEFRAME_H1, "H4": mt5.TIMEFRAME_H4,
-            "D1": mt5.TIMEFRAME_D1
-        }
-        return tf_map.get(tf_str, mt5.TIMEFRAME_M15)
-
-    def fetch_data(self, symbol: str, timeframe: str, n_bars: int = 100) -> Optional[pd.DataFrame]:
+        return self._TF_MAP.get(tf_str, mt5.TIMEFRAME_M15)
+
+    def fetch_data(self, symbol: str, timeframe: str, n_bars: int = 100, symbol_info=None) -> Optional[pd.DataFrame]:
         """
         Fetches OHLCV data for a symbol.
+        Callers that already hold this iteration's `symbol_info` can pass it to skip the lookup.
         """
         if not self.connected:
             logger.error("Not connected to MT5")
@@ -64,46 +83,73 @@ class MT5DataLoader:
 
         tf = self.get_timeframe_constant(timeframe)
         
-        # Check if symbol is available in MarketWatch
-        symbol_info = mt5.symbol_info(symbol)
-        
-        # If not found immediately, try to select it first (it might not be in Market Watch)
-        # If not found immediately, try to select it first (it might not be in Market Watch)
-        if symbol_info is None:
-            if mt5.symbol_select(symbol, True):
-                # Verify it's actually available (sometimes takes milliseconds to propagate)
-                import time
-                for _ in range(5): # Retry up to 5 times
-                    symbol_info = mt5.symbol_info(symbol)
-                    if symbol_info is not None:
-                        break
-                    time.sleep(0.5) 
+        # Terminal calls and the rates cache are shared with the other symbols' threads
+        with MT5_LOCK:
+            # Check if symbol is available in MarketWatch
+            if symbol_info is None:
+                symbol_info = mt5.symbol_info(symbol)
             
-        if symbol_info is None:
-            logger.error(f"Symbol {symbol} not found (Could not select)")
-            return None
-            
-        if not symbol_info.visible:
-            if not mt5.symbol_select(symbol, True):
-                logger.error(f"Failed to select symbol {symbol}")
+            # If not found immediately, try to select it first (it might not be in Market Watch)
+            if symbol_info is None:
+                if mt5.symbol_select(symbol, True):
+                    # Verify it's actually available (sometimes takes milliseconds to propagate)
+                    for _ in range(5): # Retry up to 5 times
+                        symbol_info = mt5.symbol_info(symbol)
+                        if symbol_info is not None:
+                            break
+                        time.sleep(0.5) 
+                
+            if symbol_info is None:
+                logger.error(f"Symbol {symbol} not found (Could not select)")
                 return None
+                
+            if not symbol_info.visible:
+                if not mt5.symbol_select(symbol, True):
+                    logger.error(f"Failed to select symbol {symbol}")
+                    return None
 
-        rates = mt5.copy_rates_from_pos(symbol, tf, 0, n_bars)
+            rates = self._fetch_rates(symbol, timeframe, tf, n_bars)
         
         if rates is None or len(rates) == 0:
             logger.error(f"Failed to get rates for {symbol}")
             return None
 
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        
-        # Rename columns to match standard conventions (Open, High, Low, Close, Volume)
-        df.rename(columns={'tick_volume': 'volume', 'real_volume': 'vol_real'}, inplace=True)
-        
-        return df
+        # Build the frame straight from the structured array's columns; epoch seconds
+        # become datetimes with a NumPy cast instead of pd.to_datetime on a Series
+        columns = {self._RATE_COLUMNS.get(name, name): rates[name] for name in rates.dtype.names}
+        columns['time'] = rates['time'].astype('datetime64[s]').astype('datetime64[ns]')
+        return pd.DataFrame(columns)
+
+    def _fetch_rates(self, symbol: str, timeframe: str, tf, n_bars: int):
+        """
+        copy_rates_from_pos for the latest `n_bars`, transferring only what can have changed.
+
+        Between two polls at most `elapsed / bar length` new bars can form, plus the bar
+        that was still forming at the last fetch. Only those are requested and spliced
+        onto the cached history; a full fetch happens when that many bars would cover
+        the whole window or the new bars don't overlap the cached ones.
+        """
+        key = (symbol, timeframe, n_bars)
+        now = time.time()
+        cached = self._rates_cache.get(key)
+        if cached is not None:
+            rates, fetched_at = cached
+            count = int((now - fetched_at) // self._TF_SECONDS.get(timeframe, 60)) + 2
+            if count < n_bars:
+                new = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+                if new is not None and len(new) > 0 and new['time'][0] <= rates['time'][-1]:
+                    rates = np.concatenate((rates[rates['time'] < new['time'][0]], new))[-n_bars:]
+                    self._rates_cache[key] = (rates, now)
+                    return rates
+
+        rates = mt5.copy_rates_from_pos(symbol, tf, 0, n_bars)
+        if rates is not None and len(rates) > 0:
+            self._rates_cache[key] = (rates, now)
+        return rates
 
     def get_current_price(self, symbol):
-        tick = mt5.symbol_info_tick(symbol)
+        with MT5_LOCK:
+            tick = mt5.symbol_info_tick(symbol)
         if tick:
             return tick.ask, tick.bid
         return None, None
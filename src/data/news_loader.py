@@ -1,19 +1,68 @@
+import bisect
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from datetime import datetime, timedelta
+import os
 import time
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("PropBot.News")
 
+# Last calendar payload and its HTTP validators, so restarts don't start without news
+NEWS_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "propbot", "ff_calendar_thisweek.json")
+
 class NewsLoader:
-    def __init__(self):
+    def __init__(self, cache_file: str = NEWS_CACHE_FILE):
         # Using a public endpoint that provides ForexFactory data in JSON
         # This is a common workaround for bots without scraping
         self.url = "https://nfs.faireconomy.media/ff_calendar_thisweek.json" 
         self.last_update = 0
         self.cached_news = []
-        self.blocked_minutes = set() # Set of "YYYY-MM-DD HH:MM" strings
+        # Blocked windows as sorted, non-overlapping epoch-second intervals [start, end)
+        self.blocked_starts = []
+        self.blocked_ends = []
+        # Validators of the payload in cached_news, replayed so unchanged news comes back as 304
+        self.etag = None
+        self.last_modified = None
+        self.cache_file = cache_file
+        # One kept-alive connection for the hourly refreshes instead of a new TCP+TLS handshake each time
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        self._load_cache()
+
+    def _load_cache(self):
+        """Restores the last saved calendar (if any) so blocking works before the first fetch."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                cached = json.load(f)
+            self.cached_news = cached.get("events", [])
+            self.etag = cached.get("etag")
+            self.last_modified = cached.get("last_modified")
+            self._process_blocked_times()
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable news cache {self.cache_file}: {e}")
+
+    def _save_cache(self):
+        """Writes the calendar atomically, so a crash mid-write never leaves a torn file."""
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"etag": self.etag, "last_modified": self.last_modified, "events": self.cached_news}, f)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to save news cache {self.cache_file}: {e}")
 
     def update_news(self):
         """Fetches news and updates blocked times."""
@@ -21,17 +70,27 @@ class NewsLoader:
             return
 
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
+            headers = {}
+            # Conditional request: an unchanged calendar is a bodyless 304
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
             logger.info("Fetching Economic News...")
-            response = requests.get(self.url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            response = self.session.get(self.url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                self.last_update = time.time()
+                logger.info("News unchanged since last fetch.")
+            elif response.status_code == 200:
+                # orjson decodes the ~150KB calendar several times faster than response.json()
+                data = orjson.loads(response.content) if orjson is not None else response.json()
                 self.cached_news = data
+                self.etag = response.headers.get("ETag")
+                self.last_modified = response.headers.get("Last-Modified")
                 self.last_update = time.time()
                 self._process_blocked_times()
-                logger.info(f"News updated. Found {len(data)} events. Blocked minutes: {len(self.blocked_minutes)}")
+                self._save_cache()
+                logger.info(f"News updated. Found {len(data)} events. Blocked windows: {len(self.blocked_starts)}")
             else:
                 logger.error(f"Failed to fetch news. Status: {response.status_code}")
                 self.last_update = time.time() - 3300 # Retry in 5 mins (3600 - 3300 = 300s)
@@ -45,7 +104,7 @@ class NewsLoader:
         Filters High Impact (Red Folder) USD news.
         Blocks 30 mins before and 30 mins after.
         """
-        self.blocked_minutes.clear()
+        intervals = []
         
         for event in self.cached_news:
             # Structure: {"title":..., "country":"USD", "date":"2025-01-12T14:30:00-04:00", "impact":"High", ...}
@@ -75,29 +134,33 @@ class NewsLoader:
                 # Making it naive (Local Time) - The CORRECT way to convert to system time
                 local_event_time = event_time.astimezone(None).replace(tzinfo=None)
                 
-                # Block Window (-30 to +30 mins)
-                start_block = local_event_time - timedelta(minutes=30)
-                end_block = local_event_time + timedelta(minutes=30)
-                
-                # Populate set
-                curr = start_block
-                while curr <= end_block:
-                    self.blocked_minutes.add(curr.strftime("%Y-%m-%d %H:%M"))
-                    curr += timedelta(minutes=1)
+                # Block Window (-30 to +30 mins), whole minutes: the last minute is blocked until it ends
+                start_block = (local_event_time - timedelta(minutes=30)).replace(second=0, microsecond=0)
+                end_block = start_block + timedelta(minutes=61)
+                intervals.append((start_block.timestamp(), end_block.timestamp()))
                     
             except ValueError:
                 continue
 
+        # Merge overlapping windows so ends stay sorted along with starts
+        starts, ends = [], []
+        for start, end in sorted(intervals):
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.blocked_starts, self.blocked_ends = starts, ends
+
     def is_blocked(self, check_time: datetime = None) -> bool:
         """
         Checks if the given time (or now) is in a blocked window.
         """
-        if not check_time:
-            check_time = datetime.now()
+        ts = check_time.timestamp() if check_time else time.time()
         
         # Ensure we have fresh data
         self.update_news()
         
-        # Check specific minute
-        time_str = check_time.strftime("%Y-%m-%d %H:%M")
-        return time_str in self.blocked_minutes
+        # Last window starting at or before ts
+        i = bisect.bisect_right(self.blocked_starts, ts) - 1
+        return i >= 0 and ts < self.blocked_ends[i]
@@ -1,39 +1,245 @@
 import MetaTrader5 as mt5
+import functools
 import logging
-import math
+from dataclasses import dataclass
+import random
+import re
+import threading
+import time
+from src.data.mt5_loader import MT5_LOCK
 
 logger = logging.getLogger("PropBot.Execution")
 
+# Cached symbol properties (tick size, digits, filling modes) and Market Watch selection are refreshed after this long
+SYMBOL_CACHE_TTL = 60
+
+# Circuit breaker: this many consecutive outage failures open it; it probes again after the cooldown
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN_SECS = 30
+
+# Market orders rejected with a stale price are resent this many times, with backoff
+ORDER_RETRIES = 2
+
+# How long a terminal connectivity check is trusted before new orders re-check it
+TERMINAL_CHECK_SECS = 1.0
+
+# symbol_info.filling_mode bits (SYMBOL_FILLING_* is missing from older MetaTrader5 builds)
+SYMBOL_FILLING_FOK = getattr(mt5, "SYMBOL_FILLING_FOK", 1)
+SYMBOL_FILLING_IOC = getattr(mt5, "SYMBOL_FILLING_IOC", 2)
+
+# Strategy pairs labelled SWING prefix their order comments with the label
+_SWING_RE = re.compile(r"swing", re.IGNORECASE)
+
+# Never notified: waiting on it is a sleep that fully releases MT5_LOCK (even when held
+# recursively) and re-acquires it afterwards, so a retry backoff doesn't stall other threads
+_TERMINAL_BACKOFF = threading.Condition(MT5_LOCK)
+
+def _holds_terminal(method):
+    """Runs a trade operation under MT5_LOCK, so its lookups and sends don't interleave with other threads' terminal calls."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with MT5_LOCK:
+            return method(*args, **kwargs)
+    return wrapper
+
+@dataclass
+class _CBState:
+    state: str = "CLOSED" # CLOSED -> OPEN -> HALF_OPEN -> CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+
 class ExecutionEngine:
-    def __init__(self, magic_number: int, notifier=None):
+    # Retcodes that mean the broker/terminal link is degraded, as opposed to a rejected request
+    # (off-quotes are a fast market, not an outage: they are only retried, see below)
+    _OUTAGE_RETCODES = frozenset((
+        mt5.TRADE_RETCODE_TIMEOUT, mt5.TRADE_RETCODE_CONNECTION,
+        mt5.TRADE_RETCODE_TOO_MANY_REQUESTS,
+    ))
+    # Rejections of the quoted price: the order was definitely not executed, and a fresh price may pass
+    _TRANSIENT_RETCODES = frozenset((
+        mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_PRICE_CHANGED, mt5.TRADE_RETCODE_PRICE_OFF,
+    ))
+
+    def __init__(self, magic_number: int, notifier=None, currency: str = None):
         self.magic_number = magic_number
         self.notifier = notifier
+        # Account currency for notifications; fixed for a session, looked up on first close if not given
+        self._currency = currency
+        # symbol -> (trade_tick_size, digits, filling_mode, time fetched)
+        self._sym_cache = {}
+        # symbol -> time it was last selected into Market Watch
+        self._selected = {}
+        self._breaker = _CBState()
+        # Last terminal connectivity check result, and when it was made
+        self._terminal_ok = True
+        self._terminal_ok_ts = 0.0
+
+    def _order_send(self, request: dict, count_failure: bool = True):
+        """
+        mt5.order_send, serialized across threads (MT5_LOCK), behind a circuit breaker.
+
+        After BREAKER_FAILURE_THRESHOLD consecutive outage failures new orders fail fast
+        (None, no IPC) until the cooldown passes; the next request is then a probe whose
+        success closes the breaker. Requests protecting open positions (closes and SL/TP
+        modifications) are never short-circuited; sent while the breaker is open they
+        bypass it and leave its state alone. With `count_failure` False (retries) an
+        outage result isn't counted towards opening the breaker.
+        """
+        with MT5_LOCK:
+            breaker = self._breaker
+            if breaker.state == "OPEN":
+                if time.time() - breaker.opened_at < BREAKER_COOLDOWN_SECS:
+                    if self._is_protective(request):
+                        return mt5.order_send(request)
+                    logger.warning(f"Circuit breaker open: skipping {request.get('symbol', request.get('position'))} request")
+                    return None
+                breaker.state = "HALF_OPEN"
+
+            result = mt5.order_send(request)
+
+            if result is None or result.retcode in self._OUTAGE_RETCODES:
+                if count_failure:
+                    self._record_failure()
+            else:
+                if breaker.state == "HALF_OPEN":
+                    logger.info("Circuit breaker closed: order_send recovered")
+                breaker.state, breaker.failures = "CLOSED", 0
+            return result
+
+    def _order_send_retry(self, request: dict):
+        """
+        _order_send for market deals, resending requotes and off-quotes up to ORDER_RETRIES
+        times with a fresh price, after an exponential backoff with jitter. The caller holds
+        MT5_LOCK; it is released for the backoff so other threads can use the terminal.
+
+        Only these definite rejections are retried; a None result (reply lost, the order
+        may have gone through) never is, so a retry can't duplicate a fill. Retries don't
+        count towards the circuit breaker's outage threshold.
+        """
+        result = self._order_send(request)
+        for attempt in range(ORDER_RETRIES):
+            if result is None or result.retcode not in self._TRANSIENT_RETCODES:
+                break
+            delay = 0.05 * 2 ** attempt + random.uniform(0, 0.05)
+            logger.warning(f"Order {request['symbol']} rejected ({result.retcode}), retrying in {delay:.2f}s")
+            with MT5_LOCK:
+                _TERMINAL_BACKOFF.wait(delay)
+            tick = mt5.symbol_info_tick(request["symbol"])
+            if not tick:
+                break
+            request["price"] = tick.ask if request["type"] == mt5.ORDER_TYPE_BUY else tick.bid
+            result = self._order_send(request, count_failure=False)
+        return result
+
+    @staticmethod
+    def _is_protective(request: dict) -> bool:
+        """Closes a position or moves its SL/TP, as opposed to opening new exposure."""
+        action = request.get("action")
+        return action == mt5.TRADE_ACTION_SLTP or (action == mt5.TRADE_ACTION_DEAL and "position" in request)
+
+    def _record_failure(self):
+        """Counts a failed send; opens (or re-opens, after a failed probe) the breaker."""
+        breaker = self._breaker
+        breaker.failures += 1
+        if breaker.state == "HALF_OPEN" or breaker.failures >= BREAKER_FAILURE_THRESHOLD:
+            was_open = breaker.state != "CLOSED"
+            breaker.state, breaker.opened_at = "OPEN", time.time()
+            if not was_open:
+                logger.error(f"Circuit breaker opened after {breaker.failures} failed order sends")
+                if self.notifier:
+                    self.notifier.send_message(
+                        f"⚡ **Order Circuit Breaker Open**\n{breaker.failures} consecutive order failures. "
+                        f"New orders paused for {BREAKER_COOLDOWN_SECS}s.")
+
+    def _terminal_alive(self) -> bool:
+        """
+        Whether the terminal is connected to the trade server, checked at most once per
+        TERMINAL_CHECK_SECS, so orders fail fast instead of timing out call by call.
+        """
+        now = time.time()
+        if now - self._terminal_ok_ts > TERMINAL_CHECK_SECS:
+            terminal_info = mt5.terminal_info()
+            self._terminal_ok = terminal_info is not None and terminal_info.connected
+            self._terminal_ok_ts = now
+        return self._terminal_ok
+
+    def _select_symbol(self, symbol: str) -> bool:
+        """mt5.symbol_select, skipped while a previous selection is still fresh."""
+        selected_at = self._selected.get(symbol)
+        if selected_at is not None and time.time() - selected_at < SYMBOL_CACHE_TTL:
+            return True
+        if not mt5.symbol_select(symbol, True):
+            self._selected.pop(symbol, None)
+            return False
+        self._selected[symbol] = time.time()
+        return True
+
+    def _symbol_props(self, symbol: str):
+        """(trade_tick_size, digits, filling_mode, fetched at) for the symbol, or None if unavailable."""
+        cached = self._sym_cache.get(symbol)
+        if cached is None or time.time() - cached[3] >= SYMBOL_CACHE_TTL:
+            symbol_info = mt5.symbol_info(symbol)
+            if not symbol_info:
+                return None
+            cached = (symbol_info.trade_tick_size, symbol_info.digits, symbol_info.filling_mode, time.time())
+            self._sym_cache[symbol] = cached
+        return cached
+
+    def _pick_filling(self, symbol: str, is_pending: bool) -> int:
+        """
+        Filling policy the broker allows for the symbol, instead of one that may be
+        rejected with 10030 (unsupported filling mode). Pending orders use RETURN.
+        """
+        if is_pending:
+            return mt5.ORDER_FILLING_RETURN
+        props = self._symbol_props(symbol)
+        if props is None:
+            return mt5.ORDER_FILLING_IOC
+        filling_mode = props[2]
+        if filling_mode & SYMBOL_FILLING_IOC:
+            filling = mt5.ORDER_FILLING_IOC
+        elif filling_mode & SYMBOL_FILLING_FOK:
+            filling = mt5.ORDER_FILLING_FOK
+        else:
+            filling = mt5.ORDER_FILLING_RETURN
+        logger.debug(f"Filling mode for {symbol}: {filling} (allowed mask {filling_mode})")
+        return filling
 
     def _normalize_price(self, symbol: str, price: float) -> float:
         """
         Rounds price to the nearest tick size for the symbol.
+        Tick size and digits are cached per symbol, so SL/TP/price on one order cost one lookup.
         """
-        symbol_info = mt5.symbol_info(symbol)
-        if not symbol_info:
+        props = self._symbol_props(symbol)
+        if props is None:
             logger.warning(f"Could not fetch symbol info for {symbol} to normalize price. Using raw price.")
             return price
-            
-        tick_size = symbol_info.trade_tick_size
+
+        tick_size, digits = props[0], props[1]
         if tick_size == 0:
             return price
-            
-        return round(price / tick_size) * tick_size
 
-    def place_market_order(self, symbol: str, volume: float, order_type: str, stop_loss: float = 0.0, take_profit: float = 0.0, comment: str = "PropBot", deviation: int = 20) -> bool:
+        # Tick rounding handles ticks coarser than a point (e.g. 0.25 on indices);
+        # rounding to digits then drops the float residue of the multiply
+        return round(round(price / tick_size) * tick_size, digits)
+
+    @_holds_terminal
+    def place_market_order(self, symbol: str, volume: float, order_type: str, stop_loss: float = 0.0, take_profit: float = 0.0, comment: str = "PropBot", deviation: int = 20, tick=None) -> bool:
         """
         places a market order (ORDER_TYPE_BUY or ORDER_TYPE_SELL)
+        Callers that just read the symbol's tick (e.g. for the spread check) can pass it to skip the lookup.
         """
+        if not self._terminal_alive():
+            logger.error(f"Order skipped: MT5 terminal not connected ({symbol})")
+            return False
+
         # Ensure symbol is selected
-        if not mt5.symbol_select(symbol, True):
+        if not self._select_symbol(symbol):
             logger.error(f"Execution: Failed to select symbol {symbol}")
             return False
 
-        tick = mt5.symbol_info_tick(symbol)
+        if tick is None:
+            tick = mt5.symbol_info_tick(symbol)
         if not tick:
             logger.error(f"Execution: Tick data not available for {symbol}")
             return False
@@ -56,11 +262,11 @@ class ExecutionEngine:
             "magic": self.magic_number,
             "comment": comment[:25],
             "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_IOC,
+            "type_filling": self._pick_filling(symbol, is_pending=False),
         }
 
         logger.info(f"Sending Order: {request}")
-        result = mt5.order_send(request)
+        result = self._order_send_retry(request)
         
         if result is None:
             last_error = mt5.last_error()
@@ -78,7 +284,7 @@ class ExecutionEngine:
             
             # Highlight Logic
             header = "🚀 **Trade Executed**"
-            if "SWING" in comment.upper():
+            if _SWING_RE.search(comment):
                 header = "🌊 **SWING TRADE DETECTED** 🌊"
         
             
@@ -88,17 +294,26 @@ class ExecutionEngine:
             
         return True
 
-    def close_position(self, ticket: int, symbol: str) -> bool:
+    @_holds_terminal
+    def close_position(self, ticket: int, symbol: str, position=None, tick=None) -> bool:
         """
         Closes an existing position by ticket.
+        Callers that already hold the position (e.g. from a positions_get snapshot) or a
+        fresh tick can pass them to skip the lookups.
         """
-        positions = mt5.positions_get(ticket=ticket)
-        if not positions:
-            logger.error(f"Position {ticket} not found")
+        pos = position
+        if pos is None:
+            positions = mt5.positions_get(ticket=ticket)
+            if not positions:
+                logger.error(f"Position {ticket} not found")
+                return False
+            pos = positions[0]
+
+        if tick is None:
+            tick = mt5.symbol_info_tick(symbol)
+        if not tick:
+            logger.error(f"Close failed: Tick data not available for {symbol}")
             return False
-            
-        pos = positions[0]
-        tick = mt5.symbol_info_tick(symbol)
         
         order_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
         price = tick.bid if order_type == mt5.ORDER_TYPE_SELL else tick.ask
@@ -114,24 +329,32 @@ class ExecutionEngine:
             "comment": "Close Position",
         }
         
-        result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error(f"Close failed: {result.retcode}")
+        result = self._order_send(request)
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            logger.error(f"Close failed: {result.retcode if result else mt5.last_error()}")
             return False
             
         if self.notifier:
-            acc = mt5.account_info()
-            currency = acc.currency if acc else "$"
+            if self._currency is None:
+                acc = mt5.account_info()
+                if acc:
+                    self._currency = acc.currency
+            currency = self._currency or "$"
             msg = f"🔒 **Position Closed**\nTicket: {ticket}\nProfit: {currency}{result.profit:.2f}"
             self.notifier.send_message(msg)
 
         return True
 
+    @_holds_terminal
     def place_limit_order(self, symbol: str, volume: float, order_type: int, price: float, stop_loss: float = 0.0, take_profit: float = 0.0, comment: str = "PropBot Grid") -> bool:
         """
         Places a pending LIMIT order.
         """
-        if not mt5.symbol_select(symbol, True):
+        if not self._terminal_alive():
+            logger.error(f"Limit Order skipped: MT5 terminal not connected ({symbol})")
+            return False
+
+        if not self._select_symbol(symbol):
             return False
             
         # Normalize
@@ -150,11 +373,11 @@ class ExecutionEngine:
             "magic": self.magic_number,
             "comment": comment[:25],
             "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_RETURN,
+            "type_filling": self._pick_filling(symbol, is_pending=True),
         }
 
         logger.info(f"Sending Limit Order: {request}")
-        result = mt5.order_send(request)
+        result = self._order_send(request)
         
         if result is None:
             last_error = mt5.last_error()
@@ -172,7 +395,7 @@ class ExecutionEngine:
              
              # Highlight Logic
              header = "⏳ **Limit Order Placed**"
-             if "SWING" in comment.upper():
+             if _SWING_RE.search(comment):
                  header = "🌊 **SWING LIMIT ORDER** 🌊"
 
              msg = f"{header}\nSymbol: {symbol}\nSide: {side}\nType: {comment}\nVolume: {volume}\nPrice: {price}\nSL: {stop_loss}"
@@ -180,11 +403,16 @@ class ExecutionEngine:
 
         return True
 
+    @_holds_terminal
     def place_stop_order(self, symbol: str, volume: float, order_type: int, price: float, stop_loss: float = 0.0, take_profit: float = 0.0, comment: str = "PropBot Stop", expiration_hours: int = 4) -> bool:
         """
         Places a pending STOP order (BUY STOP or SELL STOP).
         """
-        if not mt5.symbol_select(symbol, True):
+        if not self._terminal_alive():
+            logger.error(f"Stop Order skipped: MT5 terminal not connected ({symbol})")
+            return False
+
+        if not self._select_symbol(symbol):
             return False
             
         # Normalize
@@ -192,7 +420,6 @@ class ExecutionEngine:
         if stop_loss > 0: stop_loss = self._normalize_price(symbol, stop_loss)
         if take_profit > 0: take_profit = self._normalize_price(symbol, take_profit)
 
-        import time
         expiration_time = int(time.time() + (expiration_hours * 3600))
 
         request = {
@@ -207,11 +434,11 @@ class ExecutionEngine:
             "comment": comment[:25],
             "type_time": mt5.ORDER_TIME_SPECIFIED, 
             "expiration": expiration_time,
-            "type_filling": mt5.ORDER_FILLING_RETURN, 
+            "type_filling": self._pick_filling(symbol, is_pending=True), 
         }
 
         logger.info(f"Sending Stop Order: {request}")
-        result = mt5.order_send(request)
+        result = self._order_send(request)
         
         if result is None:
             last_error = mt5.last_error()
@@ -231,6 +458,7 @@ class ExecutionEngine:
 
         return True
 
+    @_holds_terminal
     def modify_order(self, ticket: int, sl: float, tp: float) -> bool:
         """
         Modifies an existing order/position SL/TP
@@ -248,7 +476,7 @@ class ExecutionEngine:
             "magic": self.magic_number,
         }
         
-        result = mt5.order_send(request)
+        result = self._order_send(request)
         if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
              logger.error(f"Modify Order {ticket} failed")
              return False
@@ -256,6 +484,7 @@ class ExecutionEngine:
         logger.info(f"Order {ticket} Modified: SL={sl}, TP={tp}")
         return True
 
+    @_holds_terminal
     def close_all_positions(self, symbol: str = None) -> int:
         """
         Closes ALL positions (optionally filtered by symbol).
@@ -264,12 +493,15 @@ class ExecutionEngine:
         positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
         if not positions:
             return 0
-        
+
+        # positions_get can't filter by magic; only close our bot's trades
+        mine = [pos for pos in positions if pos.magic == self.magic_number]
+
         count = 0
-        for pos in positions:
-            if pos.magic == self.magic_number: # Only close our bot's trades
-                if self.close_position(pos.ticket, pos.symbol):
-                    count += 1
+        for pos in mine:
+            # Each close fetches its own tick: a price read before earlier closes went out may be stale
+            if self.close_position(pos.ticket, pos.symbol, position=pos):
+                count += 1
         
         if count > 0:
             logger.info(f"System Close Requested: Closed {count} positions.")
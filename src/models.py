@@ -1,13 +1,18 @@
+import sys
 from dataclasses import dataclass
-from enum import Enum
-from typing import Optional
+from enum import IntEnum
+from typing import Any, Optional
 
-class SignalType(Enum):
-    BUY = "BUY"
-    SELL = "SELL"
-    NEUTRAL = "NEUTRAL"
+# Signals are created per bar per symbol; slots drop the per-instance __dict__ (Python 3.10+)
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+class SignalType(IntEnum):
+    # Values are the trade direction, so a signal's sign can be used in price arithmetic
+    BUY = 1
+    SELL = -1
+    NEUTRAL = 0
+
+@dataclass(**_SLOTS)
 class Signal:
     symbol: str
     signal_type: SignalType
@@ -17,8 +22,12 @@ class Signal:
     is_limit_order: bool = False
     is_stop_order: bool = False
     comment: str = ""
+    # Set by filter_signals_by_confluence (slots forbid ad-hoc attributes)
+    confluence_score: Optional[int] = None
+    smc_zone: Optional[Any] = None
 
-@dataclass
+# Not mutated after construction (Signal is: comments get label/SMC tags appended)
+@dataclass(frozen=True, **_SLOTS)
 class TradeRequest:
     symbol: str
     order_type: int # MT5 constant
@@ -1,9 +1,19 @@
+import atexit
+import json
 import logging
+import os
+import threading
+import time
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+from src.utils.snapshot_publisher import SnapshotPublisher
+
 logger = logging.getLogger("PropBot.Risk")
 
+# A HWM that failed to reach the state file is resubmitted at most this often
+HWM_SAVE_INTERVAL_SECS = 30
+
 @dataclass
 class RiskConfig:
     account_equity_risk_pct: float
@@ -30,6 +40,18 @@ class RiskManager:
         self.daily_loss = 0.0
         self.high_water_mark = 0.0
         self.initial_balance = 0.0
+        self.magic_number = None
+        # When the HWM was last handed to the persister
+        self._hwm_last_save_ts = 0.0
+        # HWM value known to be in the state file
+        self._hwm_written = 0.0
+        # File writes happen on a background thread (latest value wins), started by
+        # initialize_state; close() (or exit) flushes the rest
+        self._state_lock = threading.Lock()
+        self._persister = None
+        # Equity at or below which the daily / overall drawdown limit is breached
+        self._daily_limit_equity = 0.0
+        self._overall_limit_equity = 0.0
 
     def initialize_state(self, account_info, magic_number: int):
         """Initializes the manager with current account state and loads saved HWM."""
@@ -38,8 +60,6 @@ class RiskManager:
         self.magic_number = magic_number
         
         # Load HWM from file if exists
-        import json
-        import os
         hwm_file = f"risk_state_{self.magic_number}.json"
         if os.path.exists(hwm_file):
             try:
@@ -51,18 +71,71 @@ class RiskManager:
         else:
             self.high_water_mark = account_info.balance
             
+        self._hwm_written = self.high_water_mark
+        self._hwm_last_save_ts = time.time()
+        if self._persister is None:
+            self._persister = SnapshotPublisher(lambda hwm: self._write_high_water_mark(), name="RiskStatePersister")
+            atexit.register(self.close)
+        self._daily_limit_equity = self.daily_starting_equity * (1 - self.config.max_daily_loss_pct / 100.0)
+        self._update_overall_limit()
         logger.info(f"RiskManager Initialized: Daily Start Equity={self.daily_starting_equity}, HWM={self.high_water_mark}")
 
     def update_high_water_mark(self, current_equity: float):
-        """Updates the high-water mark and saves to file."""
+        """
+        Updates the high-water mark and saves it to file.
+        Every rise is saved immediately: the HWM sets the overall drawdown floor, so a rise
+        lost in a crash would restart the bot against a lower, too lenient limit. Bursts of
+        rises still cost few writes, since the persister only keeps the latest pending value.
+        Called every loop iteration, so a save that didn't reach the file is retried, at
+        most once per HWM_SAVE_INTERVAL_SECS.
+        """
         if current_equity > self.high_water_mark:
             self.high_water_mark = current_equity
+            self._update_overall_limit()
+            self._save_high_water_mark()
+        elif (self._hwm_written < self.high_water_mark
+              and time.time() - self._hwm_last_save_ts >= HWM_SAVE_INTERVAL_SECS):
+            self._save_high_water_mark()
+
+    def _update_overall_limit(self):
+        self._overall_limit_equity = self.high_water_mark * (1 - self.config.max_overall_drawdown_pct / 100.0)
+
+    def _save_high_water_mark(self):
+        """Hands the HWM to the persister thread; the trading loop never waits on the disk."""
+        if self._persister is None:
+            return
+        self._hwm_last_save_ts = time.time()
+        self._persister.submit(self.high_water_mark)
+
+    def close(self):
+        """Stops the persister thread and writes any HWM it had not saved yet."""
+        if self._persister is None:
+            return
+        self._persister.close()
+        self._persister = None
+        atexit.unregister(self.close)
+        self._write_high_water_mark()
+
+    def _write_high_water_mark(self):
+        """
+        Writes the current HWM atomically, so a crash mid-write never loses the saved value.
+        The HWM only rises, so writing the current value covers any queued older one.
+        """
+        if self.magic_number is None:
+            return
+        with self._state_lock:
+            hwm = self.high_water_mark
+            if hwm <= self._hwm_written:
+                return
             try:
-                import json
                 state_file = f"risk_state_{self.magic_number}.json"
-                with open(state_file, "w") as f:
-                    json.dump({"high_water_mark": self.high_water_mark}, f)
+                tmp = state_file + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump({"high_water_mark": hwm}, f)
+                os.replace(tmp, state_file)
+                self._hwm_written = hwm
             except Exception as e:
+                # _hwm_written stays behind, so update_high_water_mark resubmits later
                 logger.error(f"Failed to save HWM: {e}")
 
     def get_drawdown_metrics(self, current_equity: float) -> dict:
@@ -87,15 +160,24 @@ class RiskManager:
         }
 
     def check_emergency_exit(self, account_info) -> Tuple[bool, str]:
-        """Checks if any drawdown limits have been breached."""
-        metrics = self.get_drawdown_metrics(account_info.equity)
-        
+        """
+        Checks if any drawdown limits have been breached.
+        Compares equity against the precomputed limit levels; percentages are only
+        computed for the breach message.
+        """
+        equity = account_info.equity
+        # Same sanity check as get_drawdown_metrics: ~0 equity is a disconnect, not a loss
+        if equity <= 0.1:
+            return False, ""
+
         # Check Daily Limit
-        if metrics['daily_dd_pct'] >= self.config.max_daily_loss_pct:
+        if equity <= self._daily_limit_equity:
+            metrics = self.get_drawdown_metrics(equity)
             return True, f"Daily Drawdown Limit Hit: {metrics['daily_dd_pct']:.2f}%"
 
         # Check Overall Limit (Trailing)
-        if metrics['overall_dd_pct'] >= self.config.max_overall_drawdown_pct:
+        if equity <= self._overall_limit_equity:
+            metrics = self.get_drawdown_metrics(equity)
             return True, f"Overall Trailing Drawdown Limit Hit: {metrics['overall_dd_pct']:.2f}%"
 
         return False, ""
@@ -168,8 +250,8 @@ class RiskManager:
             
         lot_size = risk_amount / loss_per_lot
         
-        # Round to 2 decimals
-        lot_size = floor(lot_size * 100) / 100.0
+        # Round down to 2 decimals (int() truncates, which is floor for a positive lot)
+        lot_size = int(lot_size * 100) / 100.0
         
         if lot_size < 0.01: 
             return 0.0
@@ -182,5 +264,3 @@ class RiskManager:
              
         logger.info(f"Risk Logic: Risking ${risk_amount:.2f} | Loss per Lot: ${loss_per_lot:.2f} | Final Lot: {lot_size}")
         return lot_size
-
-from math import floor
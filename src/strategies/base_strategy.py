@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
 from src.models import Signal
 
@@ -13,3 +14,18 @@ class Strategy(ABC):
         Analyzes the provided dataframe and returns a Signal.
         """
         pass
+
+    def candidate_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Returns a boolean array marking bars of `df` where generate_signal could
+        return a non-NEUTRAL signal. Used by the backtester to skip bars cheaply;
+        the default marks every bar.
+        """
+        return np.ones(len(df), dtype=bool)
+
+    def required_bars(self):
+        """
+        Number of most recent bars generate_signal reads from each frame, or None
+        if it needs the full history. Lets callers pass a short tail instead.
+        """
+        return None
@@ -1,10 +1,27 @@
+import numpy as np
 import pandas as pd
 import logging
+from typing import NamedTuple
 from src.strategies.base_strategy import Strategy
 from src.models import Signal, SignalType
+from src.utils.njit import njit
+from src.utils.rolling import rolling_max, rolling_min
 
 logger = logging.getLogger("PropBot.Strategy")
 
+
+class OHLCArrays(NamedTuple):
+    """A frame's OHLC columns as float64 arrays, fetched once per generate_signal call."""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "OHLCArrays":
+        return cls(*(df[col].to_numpy(dtype=np.float64) for col in cls._fields))
+
+
 class LiquidityWickStrategy(Strategy):
     def __init__(self, config: dict):
         super().__init__("LiquidityWick", config)
@@ -20,19 +37,31 @@ class LiquidityWickStrategy(Strategy):
         Analyzes generic "LowTF" (Entry) and "HighTF" (Trend) data to generate a signal.
         Expects data to be a dictionary: {"LowTF": df_low, "HighTF": df_high}
         Fallback: Checks "H4" and "D1" if generic keys missing.
+        Optional "HighTFTrend" supplies an already-computed trend for the HighTF frame
+        (see trend_of), e.g. when many calls share the same higher-timeframe bars.
         """
-        df_entry = data.get("LowTF", data.get("H4"))
-        df_trend = data.get("HighTF", data.get("D1"))
+        # Fallback keys are only looked up when the generic ones are missing
+        df_entry = data.get("LowTF")
+        if df_entry is None:
+            df_entry = data.get("H4")
+        df_trend = data.get("HighTF")
+        if df_trend is None:
+            df_trend = data.get("D1")
 
         if df_entry is None or df_trend is None:
             return Signal(symbol, SignalType.NEUTRAL, 0.0, 0.0, 0.0, "Insufficient Data")
 
+        # Every entry-TF read below uses these arrays instead of going back to the frame
+        bars = OHLCArrays.from_frame(df_entry)
+
         # 1. Determine Market Structure (Trend TF & Entry TF)
-        trend_major = self._get_trend(df_trend)
-        trend_entry = self._get_trend(df_entry)
+        trend_major = data.get("HighTFTrend")
+        if trend_major is None:
+            trend_major = self._get_trend(df_trend)
+        trend_entry = self._close_trend(bars.close)
         
         # LOGGING
-        logger.debug(f"DEBUG: {symbol} TrendTF: {trend_major}, EntryTF: {trend_entry}")
+        logger.debug(f"DEBUG: {symbol} TrendTF: {trend_major.name}, EntryTF: {trend_entry.name}")
 
         current_trend = SignalType.NEUTRAL
         if trend_major == SignalType.BUY and trend_entry == SignalType.BUY:
@@ -47,93 +76,29 @@ class LiquidityWickStrategy(Strategy):
         if current_trend == SignalType.NEUTRAL:
              return Signal(symbol, SignalType.NEUTRAL, 0.0, 0.0, 0.0, "Structure Neutral")
 
-        # 2. Identify Liquidity (Recent Swing Points on Entry TF)
-        liquidity_level = self._find_recent_liquidity(df_entry, current_trend)
-        
-        if liquidity_level is None:
-             return Signal(symbol, SignalType.NEUTRAL, 0.0, 0.0, 0.0, "No recent liquidity found")
+        # 2-3. Identify Liquidity (window lows/highs on Entry TF) and check the last candle
+        # for a sweep (wick rejection) or a breakout, in one compiled pass over the tail
+        code, support_level, resistance_level, wick_ratio, body_ratio = _entry_setup(
+            *bars, int(current_trend), self.lookback, float(self.wick_threshold_ratio))
+        signal_type = SignalType(code)
         
-        logger.info(f"DEBUG: {symbol} Trend is {current_trend}. Checking for {current_trend} setups...")
-        # logger.debug(f"DEBUG: {symbol} Trend {current_trend}. Liquidity Level: {liquidity_level}")
+        logger.info(f"DEBUG: {symbol} Trend is {current_trend.name}. Checking for {current_trend.name} setups...")
 
-        # 3. Check for Sweep (Wick)
-        last_candle = df_entry.iloc[-1]
-        
-        signal_type = SignalType.NEUTRAL
-        stop_loss = 0.0
-        
+        # Reasons a setup was rejected (NaN ratios mean the candle never reached the level)
         if current_trend == SignalType.BUY:
-            # 1. SWEEP BUY (Reversal at Lows)
-            # Find Support Level
-            support_level = liquidity_level # Already found min()
-            
-            # Check for Sweep (Wick Rejection)
-            if last_candle['low'] < support_level and last_candle['close'] > support_level:
-                # Check Wick Quality
-                body_size = abs(last_candle['close'] - last_candle['open'])
-                lower_wick = last_candle['open'] - last_candle['low'] if last_candle['open'] < last_candle['close'] else last_candle['close'] - last_candle['low']
-                total_range = last_candle['high'] - last_candle['low']
-                
-                ratio = lower_wick / total_range if total_range > 0 else 0
-                if total_range > 0 and ratio >= self.wick_threshold_ratio:
-                    signal_type = SignalType.BUY
-                    stop_loss = last_candle['low'] 
-                    price = last_candle['close']
-                    # Limit logic handled below
-                else:
-                    logger.info(f"DEBUG: {symbol} Low-Test: Ratio {ratio:.2f} < {self.wick_threshold_ratio}")
-            
-            # 2. BREAKOUT BUY (Continuation through Highs)
-            # We need to find Resistance Level
-            resistance_level = df_entry.iloc[-self.lookback:-1]['high'].max()
-            
-            # Check for Breakout (Strong Close above Resistance)
-            if last_candle['close'] > resistance_level and last_candle['open'] < last_candle['close']:
-                # Filter: Strong Body (Momentum)
-                body = last_candle['close'] - last_candle['open']
-                total = last_candle['high'] - last_candle['low']
-                if total > 0 and (body / total) >= 0.50: # Body is >= 50% of candle
-                    signal_type = SignalType.BUY
-                    stop_loss = last_candle['low'] # SL below breakout candle
-                    price = last_candle['close']
-                    # Breakouts are immediate market entries
-                else:
-                     logger.info(f"DEBUG: {symbol} Buy-Breakout: Weak Body {(body/total):.2f} < 0.50")
-            else:
-                 logger.info(f"DEBUG: {symbol} No Buy Setup (Close {last_candle['close']:.2f} !> Res {resistance_level:.2f})")
-        
-        elif current_trend == SignalType.SELL:
-            # 1. SWEEP SELL (Reversal at Highs)
-            resistance_level = liquidity_level # Already found max()
-            
-            if last_candle['high'] > resistance_level and last_candle['close'] < resistance_level:
-                # Check Wick Quality
-                upper_wick = last_candle['high'] - last_candle['open'] if last_candle['open'] > last_candle['close'] else last_candle['high'] - last_candle['close']
-                total_range = last_candle['high'] - last_candle['low']
-                
-                ratio = upper_wick / total_range if total_range > 0 else 0
-                if total_range > 0 and ratio >= self.wick_threshold_ratio:
-                    signal_type = SignalType.SELL
-                    stop_loss = last_candle['high']
-                    price = last_candle['close']
-                else:
-                    logger.info(f"DEBUG: {symbol} High-Test: Ratio {ratio:.2f} < {self.wick_threshold_ratio}")
-            
-            # 2. BREAKOUT SELL (Continuation through Lows)
-            support_level = df_entry.iloc[-self.lookback:-1]['low'].min()
-            
-            if last_candle['close'] < support_level and last_candle['open'] > last_candle['close']:
-                # Filter: Strong Body
-                body = last_candle['open'] - last_candle['close']
-                total = last_candle['high'] - last_candle['low']
-                if total > 0 and (body / total) >= 0.50:
-                    signal_type = SignalType.SELL
-                    stop_loss = last_candle['high']
-                    price = last_candle['close']
-                else:
-                    logger.info(f"DEBUG: {symbol} Sell-Breakout: Weak Body {(body/total):.2f} < 0.50")
-            else:
-                 logger.info(f"DEBUG: {symbol} No Sell Setup (Close {last_candle['close']:.2f} !< Supp {support_level:.2f})")
+            if wick_ratio < self.wick_threshold_ratio:
+                logger.info(f"DEBUG: {symbol} Low-Test: Ratio {wick_ratio:.2f} < {self.wick_threshold_ratio}")
+            if np.isnan(body_ratio):
+                logger.info(f"DEBUG: {symbol} No Buy Setup (Close {bars.close[-1]:.2f} !> Res {resistance_level:.2f})")
+            elif body_ratio < 0.50:
+                logger.info(f"DEBUG: {symbol} Buy-Breakout: Weak Body {body_ratio:.2f} < 0.50")
+        else:
+            if wick_ratio < self.wick_threshold_ratio:
+                logger.info(f"DEBUG: {symbol} High-Test: Ratio {wick_ratio:.2f} < {self.wick_threshold_ratio}")
+            if np.isnan(body_ratio):
+                logger.info(f"DEBUG: {symbol} No Sell Setup (Close {bars.close[-1]:.2f} !< Supp {support_level:.2f})")
+            elif body_ratio < 0.50:
+                logger.info(f"DEBUG: {symbol} Sell-Breakout: Weak Body {body_ratio:.2f} < 0.50")
 
         if signal_type != SignalType.NEUTRAL:
             # VALIDATION: Use STOP ORDERS to confirm breakout.
@@ -142,13 +107,11 @@ class LiquidityWickStrategy(Strategy):
             is_stop_order = True
             is_limit = False
             
-            last_candle = df_entry.iloc[-1]
-            
             # --- VOLATILITY-BASED RISK (ATR) ---
             atr_multiplier = self.config['strategy'].get('atr_multiplier', 1.5)
             entry_multiplier = self.config['strategy'].get('entry_atr_multiplier', 0.1)
             atr_period = self.config['strategy'].get('atr_period', 14)
-            atr_value = self._calculate_atr(df_entry, atr_period)
+            atr_value = self._calculate_atr(bars, atr_period)
             
             # SL Buffer (Safety)
             sl_buffers = self.config['strategy'].get('sl_buffer_map', {})
@@ -164,16 +127,16 @@ class LiquidityWickStrategy(Strategy):
             
             if signal_type == SignalType.BUY:
                  # Buy Stop at High of signal candle + Small Entry Buffer
-                 price = last_candle['high'] + entry_buffer_price
-                 stop_loss = last_candle['low'] - sl_buffer_price
+                 price = bars.high[-1] + entry_buffer_price
+                 stop_loss = bars.low[-1] - sl_buffer_price
             else:
                  # Sell Stop at Low of signal candle - Small Entry Buffer
-                 price = last_candle['low'] - entry_buffer_price
-                 stop_loss = last_candle['high'] + sl_buffer_price
+                 price = bars.low[-1] - entry_buffer_price
+                 stop_loss = bars.high[-1] + sl_buffer_price
             
             # 4. RSI Filter (Optimization for Higher Win Rate)
             rsi_period = self.config['strategy'].get('rsi_period', 14)
-            rsi_value = self._calculate_rsi(df_entry['close'], rsi_period)
+            rsi_value = self._calculate_rsi(bars.close, rsi_period)
             
             # Simple Filter: If Trend is BUY, we want RSI to be somewhat oversold (pullback)
             # or at least NOT overbought.
@@ -192,7 +155,7 @@ class LiquidityWickStrategy(Strategy):
 
 
             # Define Take Profit (Targeting recent structure with Cap)
-            tp_price = self._find_target(df_entry, signal_type, price, stop_loss)
+            tp_price = self._find_target(signal_type, price, stop_loss, resistance_level, support_level)
 
 
             # Check Risk:Reward Ratio (Informational Only)
@@ -204,7 +167,50 @@ class LiquidityWickStrategy(Strategy):
 
         return Signal(symbol, SignalType.NEUTRAL, 0.0, 0.0, 0.0)
 
+    def required_bars(self):
+        """
+        Longest lookback used: SMA trend (period + previous bar), liquidity/target
+        windows, and RSI/ATR (period + one bar for the diff/shift).
+        """
+        cfg = self.config['strategy']
+        return max(self.sma_period + 1, self.lookback,
+                   cfg.get('rsi_period', 14) + 1, cfg.get('atr_period', 14) + 1)
+
+    def candidate_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Every setup needs the last candle to trade outside the previous lookback window:
+        sweeps wick through the window low/high and breakouts close beyond it.
+        Bars where neither extreme is exceeded can never produce a signal.
+        """
+        o, h, l, c = OHLCArrays.from_frame(df)
+        window = max(self.lookback - 1, 1)
+        # Extremes of the window ending on the previous bar (NaN for the first bar)
+        prev_high = np.empty_like(h)
+        prev_low = np.empty_like(l)
+        prev_high[0] = prev_low[0] = np.nan
+        prev_high[1:] = rolling_max(h, window, min_count=1)[:-1]
+        prev_low[1:] = rolling_min(l, window, min_count=1)[:-1]
+        beyond_window = (h > prev_high) | (l < prev_low)
+
+        # The candle itself must also qualify: a long enough wick for a sweep,
+        # or a >= 50% body for a breakout (same ratios as generate_signal)
+        total = h - l
+        safe_total = np.where(total > 0, total, 1.0)
+        wick_up = (h - np.maximum(o, c)) / safe_total
+        wick_dn = (np.minimum(o, c) - l) / safe_total
+        body = np.abs(c - o) / safe_total
+        candle_ok = (total > 0) & ((wick_up >= self.wick_threshold_ratio)
+                                   | (wick_dn >= self.wick_threshold_ratio) | (body >= 0.50))
+        return beyond_window & candle_ok
+
+    def trend_of(self, df: pd.DataFrame) -> SignalType:
+        """Public access to the structure/trend read generate_signal uses for a frame."""
+        return self._get_trend(df)
+
     def _get_trend(self, df: pd.DataFrame) -> SignalType:
+        return self._close_trend(df['close'].to_numpy())
+
+    def _close_trend(self, close: np.ndarray) -> SignalType:
         # Simple Structure: Higher Highs + Higher Lows = Buy.
         # Lower Lows + Lower Highs = Sell.
         # We look at the last 2 major swings.
@@ -223,44 +229,30 @@ class LiquidityWickStrategy(Strategy):
         # Let's try: Is Close > SMA(50)? And is SMA(50) rising?
         # User specifically asked to "identify the current market structure".
         # Let's use SMA 50 as a proxy for trend direction for this MVP.
-        sma = df['close'].rolling(window=self.sma_period).mean()
+        # Consecutive SMAs share all but one close, so SMA[-1] - SMA[-2] has the sign of
+        # close[-1] - close[-1 - period]: two reads instead of a rolling mean over the frame
+        if len(close) < self.sma_period + 1:
+            return SignalType.NEUTRAL
+        slope = close[-1] - close[-1 - self.sma_period]
         
-        if sma.iloc[-1] > sma.iloc[-2]:
+        if slope > 0:
              return SignalType.BUY
-        elif sma.iloc[-1] < sma.iloc[-2]:
+        elif slope < 0:
              return SignalType.SELL
         
         return SignalType.NEUTRAL
 
-    def _find_recent_liquidity(self, df: pd.DataFrame, trend: SignalType) -> float:
-        # If Bullish, we look for recent SELL SIDE Liquidity (previous Lows) to be swept.
-        # If Bearish, we look for recent BUY SIDE Liquidity (previous Highs) to be swept.
-        
-        # Look back N candles to capture the significant High/Low before the shift
-        window = df.iloc[-self.lookback:-1] # Exclude current candle
-        
-        if trend == SignalType.BUY:
-            # We are verifying a BUY setup, so we look for valid Support (Lows)
-            # OR if we are looking for a TARGET for a Sell trade (TP), we look for Lows.
-            return window['low'].min()
-        elif trend == SignalType.SELL:
-             # We are verifying a SELL setup, so we look for Resistance (Highs)
-             # OR if we are looking for a TARGET for a Buy trade (TP), we look for Highs.
-            return window['high'].max()
-            
-        return None
-
-    def _find_target(self, df: pd.DataFrame, signal_type: SignalType, entry_price: float, sl_price: float = 0.0) -> float:
+    def _find_target(self, signal_type: SignalType, entry_price: float, sl_price: float,
+                     window_high: float, window_low: float) -> float:
         """
         Finds the Take Profit target.
         Hybrid Approach:
-        1. Identify Structural Target (Peak High/Low).
+        1. Identify Structural Target (Peak High/Low of the liquidity window, as already
+           computed by _entry_setup).
         2. Identify Conservative Target (e.g., 2.0R or 3.0R).
         3. Take the CLOSER of the two. This respects structure but prevents "Greedy" targets that reduce Win Rate.
         """
         # Look back for Structure
-        window = df.iloc[-self.lookback:-1]
-        
         structure_target = 0.0
         risk = abs(entry_price - sl_price)
         if risk == 0: risk = 0.0010 # Fallback 10 pips equivalent
@@ -282,7 +274,7 @@ class LiquidityWickStrategy(Strategy):
 
         if signal_type == SignalType.BUY:
             # 1. Structural
-            structure_target = window['high'].max()
+            structure_target = window_high
             if structure_target <= entry_price: structure_target = entry_price + (risk * 2) # Fallback
 
             # 2. Conservative Cap
@@ -293,7 +285,7 @@ class LiquidityWickStrategy(Strategy):
         
         elif signal_type == SignalType.SELL:
             # 1. Structural
-            structure_target = window['low'].min()
+            structure_target = window_low
             if structure_target >= entry_price: structure_target = entry_price - (risk * 2)
 
             # 2. Conservative Cap
@@ -305,35 +297,96 @@ class LiquidityWickStrategy(Strategy):
         
         return 0.0
 
-    def _calculate_rsi(self, series, period):
-        if len(series) < period + 1:
+    def _calculate_rsi(self, close, period):
+        """
+        RSI of the last bar: simple mean of gains/losses over the last `period` closes' changes.
+        Only the last period + 1 closes are read, instead of rolling means over the whole series.
+        """
+        if len(close) < period + 1:
             return 50.0 # Neutral fallback
-            
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        if loss.iloc[-1] == 0:
-            return 100.0 if gain.iloc[-1] > 0 else 50.0
-            
+
+        delta = np.diff(close[-(period + 1):])
+        if np.isnan(delta).any():
+            return 50.0
+        gain = delta[delta > 0].sum() / period
+        loss = -delta[delta < 0].sum() / period
+
+        if loss == 0:
+            return 100.0 if gain > 0 else 50.0
+
         rs = gain / loss
-        rsi = 100 - (100 / (1 + rs)).iloc[-1]
-        return rsi if not pd.isna(rsi) else 50.0
+        return 100 - (100 / (1 + rs))
 
-    def _calculate_atr(self, df, period=14):
+    def _calculate_atr(self, bars: OHLCArrays, period=14):
         """Calculates Average True Range."""
-        if len(df) < period + 1:
+        if len(bars.close) < period + 1:
             return 0.0 # Signal to use fallback
             
-        high = df['high']
-        low = df['low']
-        prev_close = df['close'].shift(1)
+        # Only the last `period` true ranges (and the close before them) are needed
+        high = bars.high[-period:]
+        low = bars.low[-period:]
+        prev_close = bars.close[-(period + 1):-1]
         
-        tr = pd.concat([
-            high - low,
-            (high - prev_close).abs(),
-            (low - prev_close).abs()
-        ], axis=1).max(axis=1)
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
         
-        atr = tr.rolling(window=period).mean().iloc[-1]
-        return atr if not pd.isna(atr) else 0.0
+        atr = tr.mean()
+        return atr if not np.isnan(atr) else 0.0
+
+
+@njit(cache=True, nogil=True)
+def _entry_setup(open_, high, low, close, trend, lookback, wick_threshold):
+    """
+    Entry checks of `LiquidityWickStrategy.generate_signal` on the last candle, for a
+    BUY (+1) or SELL (-1) trend. Liquidity is the low/high of the lookback window
+    (excluding the last candle).
+
+    A sweep wicks through the trend-side level (support for BUY, resistance for SELL)
+    and closes back inside with a wick of at least `wick_threshold` of the range;
+    a breakout closes beyond the opposite level with a body of at least 50% of the range.
+
+    Returns:
+    - (signal direction or 0, support, resistance, sweep wick ratio, breakout body ratio);
+      a ratio is NaN when the candle didn't reach that level
+    """
+    n = close.shape[0]
+    start = max(n - lookback, 0)
+    if n - 1 <= start:
+        return 0, np.nan, np.nan, np.nan, np.nan
+    support = low[start:n - 1].min()
+    resistance = high[start:n - 1].max()
+
+    o = open_[n - 1]
+    h = high[n - 1]
+    lo = low[n - 1]
+    c = close[n - 1]
+    total = h - lo
+    signal = 0
+    wick_ratio = np.nan
+    body_ratio = np.nan
+
+    if trend == 1:
+        # 1. SWEEP BUY (Reversal at Lows)
+        if lo < support and c > support:
+            lower_wick = o - lo if o < c else c - lo
+            wick_ratio = lower_wick / total if total > 0 else 0.0
+            if total > 0 and wick_ratio >= wick_threshold:
+                signal = 1
+        # 2. BREAKOUT BUY (Continuation through Highs)
+        if c > resistance and o < c:
+            body_ratio = (c - o) / total if total > 0 else 0.0
+            if total > 0 and body_ratio >= 0.50:
+                signal = 1
+    elif trend == -1:
+        # 1. SWEEP SELL (Reversal at Highs)
+        if h > resistance and c < resistance:
+            upper_wick = h - o if o > c else h - c
+            wick_ratio = upper_wick / total if total > 0 else 0.0
+            if total > 0 and wick_ratio >= wick_threshold:
+                signal = -1
+        # 2. BREAKOUT SELL (Continuation through Lows)
+        if c < support and o > c:
+            body_ratio = (o - c) / total if total > 0 else 0.0
+            if total > 0 and body_ratio >= 0.50:
+                signal = -1
+
+    return signal, support, resistance, wick_ratio, body_ratio
@@ -1,5 +1,6 @@
 # SMC Detector - Smart Money Concepts Detection Module
-from .models import FVG, OrderBlock
+from .models import FVG, OrderBlock, OrderBlockArray
 from .fvg_detector import detect_fvg_zones
-from .order_block import detect_order_blocks
+from .order_block import detect_order_blocks, detect_order_block_arrays
 from .confluence import calculate_confluence_score
+from .warmup import warmup_smc_kernels
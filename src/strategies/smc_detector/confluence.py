@@ -2,14 +2,21 @@
 SMC Detector - Confluence Scoring
 Combines Order Blocks and FVGs to calculate trade quality scores.
 """
+import numpy as np
 import pandas as pd
 from typing import List, Optional, Tuple
+from src.utils.njit import njit
 from .models import FVG, OrderBlock, SMCZone
 
+# Zone type each signal direction is scored against
+_ZONE_TYPE_FOR_SIGNAL = {'BUY': 'bullish', 'SELL': 'bearish'}
+# Zone type -> direction code in the kernel's zone tables
+_ZONE_DIRECTION = {'bullish': 1, 'bearish': -1}
+
 
 def calculate_confluence_score(
     current_price: float,
-    signal_type: str,  # 'BUY' | 'SELL'
+    signal_type: str,  # 'BUY' | 'SELL' (or the SignalType member)
     order_blocks: List[OrderBlock],
     fvg_zones: List[FVG],
     entry_price: float,
@@ -28,7 +35,7 @@ def calculate_confluence_score(
     
     Parameters:
     - current_price: Current market price
-    - signal_type: 'BUY' or 'SELL'
+    - signal_type: 'BUY' or 'SELL' (anything else scores 0)
     - order_blocks: List of detected Order Blocks
     - fvg_zones: List of detected FVG zones
     - entry_price: Proposed entry price
@@ -37,155 +44,171 @@ def calculate_confluence_score(
     Returns:
     - Tuple of (score: int, zone: Optional[SMCZone])
     """
-    score = 0
-    matching_ob = None
-    matching_fvg = None
-    
+    # Resolve the direction once: a BUY only matches bullish zones, a SELL bearish ones
+    signal_type = getattr(signal_type, 'name', signal_type)
+    if signal_type not in _ZONE_TYPE_FOR_SIGNAL:
+        return 0, None
+    return _score_signal(current_price, signal_type, entry_price, stop_loss,
+                         order_blocks, fvg_zones, *_zone_arrays(order_blocks, fvg_zones))
+
+
+def _zone_arrays(order_blocks: List[OrderBlock], fvg_zones: List[FVG]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Zone attributes as the kernel's row-per-zone tables, in list order:
+    OBs as (direction, bottom, top, fresh, impulse), FVGs as (direction, bottom, top, fresh),
+    with direction +1 bullish / -1 bearish / 0 anything else.
+    """
+    ob_table = np.array([(_ZONE_DIRECTION.get(ob.ob_type, 0), ob.bottom, ob.top,
+                          not ob.mitigated, ob.impulse_strength) for ob in order_blocks],
+                        dtype=np.float64).reshape(-1, 5)
+    fvg_table = np.array([(_ZONE_DIRECTION.get(fvg.fvg_type, 0), fvg.bottom, fvg.top, not fvg.filled)
+                          for fvg in fvg_zones], dtype=np.float64).reshape(-1, 4)
+    return ob_table, fvg_table
+
+
+def _score_signal(current_price: float, signal_type: str, entry_price: float, stop_loss: float,
+                  order_blocks: List[OrderBlock], fvg_zones: List[FVG],
+                  ob_table: np.ndarray, fvg_table: np.ndarray) -> Tuple[int, Optional[SMCZone]]:
+    """Scores one 'BUY'/'SELL' signal against prebuilt zone tables and builds its SMCZone."""
     # Define the zone of interest (between entry and SL for validation)
     if signal_type == 'BUY':
-        zone_top = entry_price
-        zone_bottom = stop_loss
+        direction, zone_top, zone_bottom = 1, entry_price, stop_loss
     else:
-        zone_top = stop_loss
-        zone_bottom = entry_price
+        direction, zone_top, zone_bottom = -1, stop_loss, entry_price
+
+    score, ob_idx, fvg_idx = _score_kernel(direction, zone_bottom, zone_top, current_price,
+                                           ob_table, fvg_table)
+    matching_ob = order_blocks[ob_idx] if ob_idx >= 0 else None
+    matching_fvg = fvg_zones[fvg_idx] if fvg_idx >= 0 else None
     
-    # --- Check for Order Block ---
-    for ob in order_blocks:
-        if signal_type == 'BUY' and ob.ob_type == 'bullish':
-            # Check if OB overlaps with our entry zone
-            if _zones_overlap(zone_bottom, zone_top, ob.bottom, ob.top):
-                matching_ob = ob
-                score += 30
-                
-                if not ob.mitigated:
-                    score += 10
-                
-                if ob.impulse_strength >= 2.0:
-                    score += 10
-                break
-                
-        elif signal_type == 'SELL' and ob.ob_type == 'bearish':
-            if _zones_overlap(zone_bottom, zone_top, ob.bottom, ob.top):
-                matching_ob = ob
-                score += 30
-                
-                if not ob.mitigated:
-                    score += 10
-                
-                if ob.impulse_strength >= 2.0:
-                    score += 10
-                break
+    # Build SMCZone result
+    zone = None
+    if matching_ob and matching_fvg:
+        # Use the overlapping area
+        zone = SMCZone(
+            zone_type=signal_type.lower(),
+            top=min(matching_ob.top, matching_fvg.top),
+            bottom=max(matching_ob.bottom, matching_fvg.bottom),
+            has_ob=True,
+            has_fvg=True,
+            confluence_score=score,
+            order_block=matching_ob,
+            fvg=matching_fvg
+        )
+    elif matching_ob:
+        zone = SMCZone(
+            zone_type=signal_type.lower(),
+            top=matching_ob.top,
+            bottom=matching_ob.bottom,
+            has_ob=True,
+            has_fvg=False,
+            confluence_score=score,
+            order_block=matching_ob
+        )
+    elif matching_fvg:
+        zone = SMCZone(
+            zone_type=signal_type.lower(),
+            top=matching_fvg.top,
+            bottom=matching_fvg.bottom,
+            has_ob=False,
+            has_fvg=True,
+            confluence_score=score,
+            fvg=matching_fvg
+        )
     
+    return score, zone
+
+
+@njit(cache=True, nogil=True)
+def _score_kernel(direction, zone_bottom, zone_top, current_price, ob_table, fvg_table):
+    """
+    Scoring of `calculate_confluence_score` over the `_zone_arrays` tables. Only zones
+    of the signal's `direction` are considered; the first of each overlapping the entry
+    zone is the match.
+
+    Returns:
+    - (score capped at 100, index of the matched OB or -1, index of the matched FVG or -1)
+    """
+    score = 0
+    ob_idx = -1
+    fvg_idx = -1
+
+    # --- Check for Order Block ---
+    for k in range(ob_table.shape[0]):
+        # Check if OB overlaps with our entry zone
+        if ob_table[k, 0] == direction and zone_bottom <= ob_table[k, 2] and ob_table[k, 1] <= zone_top:
+            ob_idx = k
+            score += 30
+            if ob_table[k, 3]:
+                score += 10
+            if ob_table[k, 4] >= 2.0:
+                score += 10
+            break
+
     # --- Check for Fair Value Gap ---
-    for fvg in fvg_zones:
-        if signal_type == 'BUY' and fvg.fvg_type == 'bullish':
-            if _zones_overlap(zone_bottom, zone_top, fvg.bottom, fvg.top):
-                matching_fvg = fvg
-                score += 25
-                
-                if not fvg.filled:
-                    score += 10
-                break
-                
-        elif signal_type == 'SELL' and fvg.fvg_type == 'bearish':
-            if _zones_overlap(zone_bottom, zone_top, fvg.bottom, fvg.top):
-                matching_fvg = fvg
-                score += 25
-                
-                if not fvg.filled:
-                    score += 10
-                break
-    
+    for k in range(fvg_table.shape[0]):
+        if fvg_table[k, 0] == direction and zone_bottom <= fvg_table[k, 2] and fvg_table[k, 1] <= zone_top:
+            fvg_idx = k
+            score += 25
+            if fvg_table[k, 3]:
+                score += 10
+            break
+
     # --- Confluence Bonus ---
-    if matching_ob and matching_fvg:
+    if ob_idx >= 0 and fvg_idx >= 0:
         # Check if OB and FVG overlap with each other
-        if _zones_overlap(matching_ob.bottom, matching_ob.top, 
-                          matching_fvg.bottom, matching_fvg.top):
+        if ob_table[ob_idx, 1] <= fvg_table[fvg_idx, 2] and fvg_table[fvg_idx, 1] <= ob_table[ob_idx, 2]:
             score += 20
-    
+
     # --- Price Proximity Bonus ---
-    if matching_ob:
-        if matching_ob.bottom <= current_price <= matching_ob.top:
+    if ob_idx >= 0:
+        if ob_table[ob_idx, 1] <= current_price <= ob_table[ob_idx, 2]:
             score += 15
-    elif matching_fvg:
-        if matching_fvg.bottom <= current_price <= matching_fvg.top:
+    elif fvg_idx >= 0:
+        if fvg_table[fvg_idx, 1] <= current_price <= fvg_table[fvg_idx, 2]:
             score += 15
-    
-    # Build SMCZone result
-    zone = None
-    if matching_ob or matching_fvg:
-        if matching_ob and matching_fvg:
-            # Use the overlapping area
-            zone = SMCZone(
-                zone_type=signal_type.lower(),
-                top=min(matching_ob.top, matching_fvg.top),
-                bottom=max(matching_ob.bottom, matching_fvg.bottom),
-                has_ob=True,
-                has_fvg=True,
-                confluence_score=min(score, 100),
-                order_block=matching_ob,
-                fvg=matching_fvg
-            )
-        elif matching_ob:
-            zone = SMCZone(
-                zone_type=signal_type.lower(),
-                top=matching_ob.top,
-                bottom=matching_ob.bottom,
-                has_ob=True,
-                has_fvg=False,
-                confluence_score=min(score, 100),
-                order_block=matching_ob
-            )
-        elif matching_fvg:
-            zone = SMCZone(
-                zone_type=signal_type.lower(),
-                top=matching_fvg.top,
-                bottom=matching_fvg.bottom,
-                has_ob=False,
-                has_fvg=True,
-                confluence_score=min(score, 100),
-                fvg=matching_fvg
-            )
-    
-    return min(score, 100), zone
-
 
-def _zones_overlap(z1_bottom: float, z1_top: float, 
-                   z2_bottom: float, z2_top: float) -> bool:
-    """Check if two price zones overlap."""
-    return z1_bottom <= z2_top and z2_bottom <= z1_top
+    return min(score, 100), ob_idx, fvg_idx
 
 
 def filter_signals_by_confluence(
     signals: list,
     df: pd.DataFrame,
-    min_score: int = 50
+    min_score: int = 50,
+    order_blocks: Optional[List[OrderBlock]] = None,
+    fvg_zones: Optional[List[FVG]] = None
 ) -> list:
     """
     Filter a list of signals to only include those with sufficient confluence.
     
-    This is a helper for backtesting integration.
+    This is a helper for backtesting integration. Callers that already hold the zones
+    (e.g. from SMCZoneTimeline.zones_at) can pass them in to skip re-detecting on `df`;
+    otherwise the active zones are detected here, and only if there are signals.
     """
-    from .fvg_detector import get_active_fvg_zones
-    from .order_block import get_active_order_blocks
+    if not signals:
+        return []
     
-    fvgs = get_active_fvg_zones(df)
-    obs = get_active_order_blocks(df)
+    if fvg_zones is None:
+        from .fvg_detector import get_active_fvg_zones
+        fvg_zones = get_active_fvg_zones(df)
+    if order_blocks is None:
+        from .order_block import get_active_order_blocks
+        order_blocks = get_active_order_blocks(df)
+    
+    # Zone tables are built once and shared by every signal's kernel call
+    current_price = df['close'].iat[-1]
+    tables = _zone_arrays(order_blocks, fvg_zones)
     
     filtered = []
     for signal in signals:
-        score, zone = calculate_confluence_score(
-            current_price=df.iloc[-1]['close'],
-            signal_type=signal.signal_type.name,
-            order_blocks=obs,
-            fvg_zones=fvgs,
-            entry_price=signal.price,
-            stop_loss=signal.sl_price
-        )
-        
+        signal_type = signal.signal_type.name
+        if signal_type in _ZONE_TYPE_FOR_SIGNAL:
+            score, zone = _score_signal(current_price, signal_type, signal.price, signal.sl_price,
+                                        order_blocks, fvg_zones, *tables)
+        else:
+            score, zone = 0, None
         if score >= min_score:
-            signal.confluence_score = score
-            signal.smc_zone = zone
+            signal.confluence_score, signal.smc_zone = score, zone
             filtered.append(signal)
     
     return filtered
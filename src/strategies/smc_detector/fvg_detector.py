@@ -2,8 +2,11 @@
 SMC Detector - Fair Value Gap Detection
 Detects bullish and bearish FVG patterns (3-candle gaps).
 """
+import numpy as np
 import pandas as pd
 from typing import List
+from src.utils.njit import njit
+from src.utils.rolling import rolling_mean
 from .models import FVG
 
 
@@ -25,64 +28,100 @@ def detect_fvg_zones(df: pd.DataFrame, min_gap_atr_ratio: float = 0.3) -> List[F
         return []
     
     fvg_zones = []
+    # Each column is read once and shared by the scan and the fill marking below
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
     
-    # Calculate ATR for gap significance filtering
-    atr = _calculate_atr(df, period=14)
+    # Scan the candle triples on plain arrays (the kernel tracks the 14-period ATR for
+    # gap significance filtering as it goes); only detected gaps become FVG objects
+    kinds, tops, bottoms, strengths, origins = _fvg_kernel(
+        high, low, df['close'].to_numpy(dtype=np.float64), 14, min_gap_atr_ratio)
+    for k in range(kinds.shape[0]):
+        i = int(origins[k])
+        fvg_zones.append(FVG(
+            fvg_type='bullish' if kinds[k] > 0 else 'bearish',
+            top=tops[k],
+            bottom=bottoms[k],
+            timestamp=df.index[i],
+            origin_index=i,
+            strength=strengths[k]
+        ))
     
-    for i in range(2, len(df)):
-        c1 = df.iloc[i - 2]  # First candle
-        c2 = df.iloc[i - 1]  # Impulse candle (middle)
-        c3 = df.iloc[i]      # Third candle
-        
-        current_atr = atr.iloc[i] if not pd.isna(atr.iloc[i]) else 1.0
-        
-        # Check for Bullish FVG: Gap between C1.high and C3.low
-        if c3['low'] > c1['high']:
-            gap_size = c3['low'] - c1['high']
-            
-            # Filter: Gap must be significant
-            if gap_size >= current_atr * min_gap_atr_ratio:
-                fvg_zones.append(FVG(
-                    fvg_type='bullish',
-                    top=c3['low'],
-                    bottom=c1['high'],
-                    timestamp=c3.name if hasattr(c3, 'name') else df.index[i],
-                    origin_index=i,
-                    strength=min(gap_size / current_atr, 2.0) / 2.0  # Normalize to 0-1
-                ))
-        
-        # Check for Bearish FVG: Gap between C1.low and C3.high
-        if c3['high'] < c1['low']:
-            gap_size = c1['low'] - c3['high']
-            
-            if gap_size >= current_atr * min_gap_atr_ratio:
-                fvg_zones.append(FVG(
-                    fvg_type='bearish',
-                    top=c1['low'],
-                    bottom=c3['high'],
-                    timestamp=c3.name if hasattr(c3, 'name') else df.index[i],
-                    origin_index=i,
-                    strength=min(gap_size / current_atr, 2.0) / 2.0
-                ))
-    
-    # Mark filled FVGs (price has returned)
-    if len(fvg_zones) > 0 and len(df) > fvg_zones[-1].origin_index:
+    # Mark filled FVGs (price has returned): one backward running min/max answers
+    # "did any later candle reach the midpoint" for every FVG
+    if len(fvg_zones) > 0:
+        lowest_after = np.minimum.accumulate(low[::-1])[::-1]
+        highest_after = np.maximum.accumulate(high[::-1])[::-1]
         for fvg in fvg_zones:
-            # Check if any subsequent candle filled the gap
-            subsequent = df.iloc[fvg.origin_index + 1:]
-            if len(subsequent) > 0:
+            idx = fvg.origin_index + 1
+            if idx < len(df):
                 if fvg.fvg_type == 'bullish':
                     # Bullish FVG filled if price drops into the gap
-                    if subsequent['low'].min() <= fvg.midpoint:
-                        fvg.filled = True
+                    fvg.filled = bool(lowest_after[idx] <= fvg.midpoint)
                 else:
                     # Bearish FVG filled if price rises into the gap
-                    if subsequent['high'].max() >= fvg.midpoint:
-                        fvg.filled = True
+                    fvg.filled = bool(highest_after[idx] >= fvg.midpoint)
     
     return fvg_zones
 
 
+@njit(cache=True, nogil=True, error_model="numpy")
+def _fvg_kernel(high, low, close, period, min_ratio):
+    """
+    Finds the 3-candle gaps of `detect_fvg_zones`.
+
+    A Bullish FVG: C3.low > C1.high; a Bearish FVG: C3.high < C1.low (at most one per
+    candle). Gaps smaller than `min_ratio` x ATR are dropped; the ATR (the `_calculate_atr`
+    rolling mean of True Range) is kept as a running window sum in the same pass, and
+    counts as 1.0 until `period` bars are in.
+
+    Returns:
+    - Parallel arrays (kind +1/-1, top, bottom, strength, origin index) of the FVGs found
+    """
+    n = high.shape[0]
+    kinds = np.empty(n, np.int8)
+    tops = np.empty(n, np.float64)
+    bottoms = np.empty(n, np.float64)
+    strengths = np.empty(n, np.float64)
+    origins = np.empty(n, np.int64)
+    tr_window = np.zeros(period, np.float64)
+    tr_sum = 0.0
+    k = 0
+    for i in range(n):
+        if i == 0:
+            tr = high[0] - low[0]
+        else:
+            tr = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        tr_sum += tr - tr_window[i % period]
+        tr_window[i % period] = tr
+        if i < 2:
+            continue
+        current_atr = tr_sum / period if i >= period - 1 else 1.0
+
+        if low[i] > high[i - 2]:
+            top = low[i]
+            bottom = high[i - 2]
+            kind = 1
+        elif high[i] < low[i - 2]:
+            top = low[i - 2]
+            bottom = high[i]
+            kind = -1
+        else:
+            continue
+
+        # Filter: Gap must be significant
+        gap_size = top - bottom
+        if gap_size >= current_atr * min_ratio:
+            kinds[k] = kind
+            tops[k] = top
+            bottoms[k] = bottom
+            strengths[k] = min(gap_size / current_atr, 2.0) / 2.0  # Normalize to 0-1
+            origins[k] = i
+            k += 1
+
+    return kinds[:k], tops[:k], bottoms[:k], strengths[:k], origins[:k]
+
+
 def get_active_fvg_zones(df: pd.DataFrame, lookback: int = 50) -> List[FVG]:
     """
     Get only unfilled (active) FVG zones within the lookback period.
@@ -98,14 +137,12 @@ def get_active_fvg_zones(df: pd.DataFrame, lookback: int = 50) -> List[FVG]:
 
 def _calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Calculate Average True Range."""
-    high = df['high']
-    low = df['low']
-    prev_close = df['close'].shift(1)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
     
-    tr = pd.concat([
-        high - low,
-        (high - prev_close).abs(),
-        (low - prev_close).abs()
-    ], axis=1).max(axis=1)
+    # True Range as a per-element max on arrays (the first bar has no previous close)
+    tr = high - low
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])))
     
-    return tr.rolling(window=period).mean()
+    return pd.Series(rolling_mean(tr, period), index=df.index)
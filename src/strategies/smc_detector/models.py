@@ -2,11 +2,17 @@
 SMC Detector - Data Models
 Fair Value Gaps (FVG) and Order Blocks (OB) data structures.
 """
+import sys
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+import numpy as np
 
-@dataclass
+# Zones are created per detected gap/block on every scan; slots drop the per-instance
+# __dict__ (Python 3.10+). Not frozen: detection marks filled/mitigated in place.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class FVG:
     """Fair Value Gap - Price inefficiency/imbalance zone."""
     fvg_type: str        # 'bullish' | 'bearish'
@@ -26,7 +32,7 @@ class FVG:
         return abs(self.top - self.bottom)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class OrderBlock:
     """Order Block - Institutional entry zone."""
     ob_type: str         # 'bullish' | 'bearish'
@@ -36,6 +42,7 @@ class OrderBlock:
     origin_index: int    # Index of OB candle
     impulse_strength: float = 0.0  # ATR multiple of impulse move
     mitigated: bool = False  # Has price returned and broken through?
+    formed_index: int = -1   # Index of the impulse candle that confirmed the OB
 
     @property
     def midpoint(self) -> float:
@@ -47,7 +54,39 @@ class OrderBlock:
         return abs(self.top - self.bottom)
 
 
-@dataclass
+@dataclass(**_SLOTS)
+class OrderBlockArray:
+    """
+    Order Blocks of one scan as parallel arrays (one entry per block, in detection order),
+    so bulk filtering is a boolean mask instead of a loop over OrderBlock objects.
+    """
+    ob_type: np.ndarray           # int8: +1 bullish, -1 bearish
+    top: np.ndarray               # float64
+    bottom: np.ndarray            # float64
+    origin_index: np.ndarray      # int64
+    impulse_strength: np.ndarray  # float64
+    mitigated: np.ndarray         # bool
+    formed_index: np.ndarray      # int64
+
+    def __len__(self) -> int:
+        return len(self.ob_type)
+
+    def to_list(self, index, mask: Optional[np.ndarray] = None) -> List[OrderBlock]:
+        """OrderBlock objects for the selected entries; `index` is the scanned frame's index."""
+        picks = range(len(self)) if mask is None else np.flatnonzero(mask)
+        return [OrderBlock(
+                    ob_type='bullish' if self.ob_type[k] > 0 else 'bearish',
+                    top=self.top[k],
+                    bottom=self.bottom[k],
+                    timestamp=index[self.origin_index[k]],
+                    origin_index=int(self.origin_index[k]),
+                    impulse_strength=self.impulse_strength[k],
+                    mitigated=bool(self.mitigated[k]),
+                    formed_index=int(self.formed_index[k]))
+                for k in picks]
+
+
+@dataclass(**_SLOTS)
 class SMCZone:
     """Combined SMC Zone with confluence score."""
     zone_type: str       # 'bullish' | 'bearish'
@@ -2,9 +2,17 @@
 SMC Detector - Order Block Detection
 Detects institutional Order Blocks based on impulse moves and BOS.
 """
+import numpy as np
 import pandas as pd
 from typing import List
-from .models import OrderBlock
+from src.utils.njit import njit
+from src.utils.rolling import rolling_max, rolling_mean, rolling_min
+from .models import OrderBlock, OrderBlockArray
+
+_EMPTY_OBS = OrderBlockArray(
+    ob_type=np.empty(0, np.int8), top=np.empty(0), bottom=np.empty(0),
+    origin_index=np.empty(0, np.int64), impulse_strength=np.empty(0),
+    mitigated=np.empty(0, bool), formed_index=np.empty(0, np.int64))
 
 
 def detect_order_blocks(df: pd.DataFrame, 
@@ -26,151 +34,150 @@ def detect_order_blocks(df: pd.DataFrame,
     Returns:
     - List of OrderBlock objects
     """
+    return detect_order_block_arrays(df, atr_period, impulse_multiplier, bos_lookback).to_list(df.index)
+
+
+def detect_order_block_arrays(df: pd.DataFrame,
+                              atr_period: int = 14,
+                              impulse_multiplier: float = 1.5,
+                              bos_lookback: int = 5) -> OrderBlockArray:
+    """
+    Same scan as `detect_order_blocks`, returning the blocks as an OrderBlockArray
+    (parallel NumPy arrays) without building OrderBlock objects.
+    """
     if len(df) < atr_period + bos_lookback + 5:
-        return []
-    
-    order_blocks = []
-    atr = _calculate_atr(df, atr_period)
-    
-    for i in range(atr_period + bos_lookback, len(df)):
-        current = df.iloc[i]
-        current_atr = atr.iloc[i] if not pd.isna(atr.iloc[i]) else 1.0
-        
-        # --- Check for BULLISH impulse (Break of Structure up) ---
-        if _is_bullish_bos(df, i, bos_lookback):
-            impulse_size = current['close'] - current['open']
-            
-            # Validate impulse strength
-            if impulse_size > current_atr * impulse_multiplier:
-                # Find last bearish candle before impulse
-                ob_candle = _find_last_opposing_candle(df, i, is_bullish=True)
-                
-                if ob_candle is not None:
-                    ob_idx, ob_row = ob_candle
-                    order_blocks.append(OrderBlock(
-                        ob_type='bullish',
-                        top=ob_row['high'],
-                        bottom=ob_row['low'],
-                        timestamp=ob_row.name if hasattr(ob_row, 'name') else df.index[ob_idx],
-                        origin_index=ob_idx,
-                        impulse_strength=impulse_size / current_atr
-                    ))
-        
-        # --- Check for BEARISH impulse (Break of Structure down) ---
-        if _is_bearish_bos(df, i, bos_lookback):
-            impulse_size = current['open'] - current['close']
-            
-            if impulse_size > current_atr * impulse_multiplier:
-                # Find last bullish candle before impulse
-                ob_candle = _find_last_opposing_candle(df, i, is_bullish=False)
-                
-                if ob_candle is not None:
-                    ob_idx, ob_row = ob_candle
-                    order_blocks.append(OrderBlock(
-                        ob_type='bearish',
-                        top=ob_row['high'],
-                        bottom=ob_row['low'],
-                        timestamp=ob_row.name if hasattr(ob_row, 'name') else df.index[ob_idx],
-                        origin_index=ob_idx,
-                        impulse_strength=impulse_size / current_atr
-                    ))
-    
-    # Mark mitigated OBs (price has returned and broken through)
-    _mark_mitigated_obs(df, order_blocks)
-    
-    return order_blocks
+        return _EMPTY_OBS
+    
+    # Scan for impulses on plain arrays (the kernel tracks the ATR as it goes)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    # Swing high/low of the `bos_lookback` candles before each bar, in one rolling pass each
+    recent_high = np.full(len(df), np.nan)
+    recent_low = np.full(len(df), np.nan)
+    recent_high[1:] = rolling_max(high, bos_lookback)[:-1]
+    recent_low[1:] = rolling_min(low, bos_lookback)[:-1]
+    kinds, origins, formed, strengths = _ob_kernel(
+        df['open'].to_numpy(dtype=np.float64), high, low, close,
+        recent_high, recent_low, atr_period, atr_period + bos_lookback, impulse_multiplier)
+    top = high[origins]
+    bottom = low[origins]
+    
+    return OrderBlockArray(
+        ob_type=kinds,
+        top=top,
+        bottom=bottom,
+        origin_index=origins,
+        impulse_strength=strengths,
+        # Mitigated OBs: price has returned and broken through
+        mitigated=_mitigated_mask(close, kinds, top, bottom, origins),
+        formed_index=formed
+    )
 
 
 def get_active_order_blocks(df: pd.DataFrame, lookback: int = 100) -> List[OrderBlock]:
     """
     Get only unmitigated (active) Order Blocks within the lookback period.
     """
-    all_obs = detect_order_blocks(df)
+    obs = detect_order_block_arrays(df)
     
     # Filter to recent and unmitigated
-    active = [ob for ob in all_obs 
-              if not ob.mitigated and ob.origin_index >= len(df) - lookback]
+    active = ~obs.mitigated & (obs.origin_index >= len(df) - lookback)
     
-    return active
+    return obs.to_list(df.index, active)
 
 
-def _is_bullish_bos(df: pd.DataFrame, i: int, lookback: int) -> bool:
-    """Check if candle at index i creates a Break of Structure (upward)."""
-    if i < lookback:
-        return False
-    
-    # Find recent swing high
-    recent_high = df.iloc[i - lookback:i]['high'].max()
-    
-    # BOS = current candle closes above recent swing high
-    return df.iloc[i]['close'] > recent_high
-
-
-def _is_bearish_bos(df: pd.DataFrame, i: int, lookback: int) -> bool:
-    """Check if candle at index i creates a Break of Structure (downward)."""
-    if i < lookback:
-        return False
-    
-    # Find recent swing low
-    recent_low = df.iloc[i - lookback:i]['low'].min()
-    
-    # BOS = current candle closes below recent swing low
-    return df.iloc[i]['close'] < recent_low
+@njit(cache=True, nogil=True, error_model="numpy")
+def _ob_kernel(open_, high, low, close, recent_high, recent_low, atr_period, start, impulse_multiplier,
+               max_lookback=5):
+    """
+    Finds the Order Blocks of `detect_order_blocks` from bar `start` on.
 
+    A candle closing above `recent_high` (the preceding swing high: Break of Structure up) with
+    a body over `impulse_multiplier` x ATR makes the last bearish candle among the
+    `max_lookback` before it a bullish OB; mirrored for bearish. The ATR (the
+    `_calculate_atr` rolling mean of True Range) is kept as a running window sum in the
+    same pass, and counts as 1.0 until `atr_period` bars are in.
 
-def _find_last_opposing_candle(df: pd.DataFrame, i: int, is_bullish: bool, max_lookback: int = 5):
-    """
-    Find the last opposing candle before the impulse.
-    
-    For bullish OB: Find last bearish candle
-    For bearish OB: Find last bullish candle
+    Returns:
+    - Parallel arrays (kind +1/-1, OB candle index, impulse candle index, impulse strength)
     """
-    for j in range(i - 1, max(0, i - max_lookback - 1), -1):
-        candle = df.iloc[j]
-        
-        if is_bullish:
-            # Looking for bearish candle (close < open)
-            if candle['close'] < candle['open']:
-                return (j, candle)
+    n = close.shape[0]
+    kinds = np.empty(2 * n, np.int8)
+    origins = np.empty(2 * n, np.int64)
+    formed = np.empty(2 * n, np.int64)
+    strengths = np.empty(2 * n, np.float64)
+    tr_window = np.zeros(atr_period, np.float64)
+    tr_sum = 0.0
+    k = 0
+    for i in range(n):
+        if i == 0:
+            tr = high[0] - low[0]
         else:
-            # Looking for bullish candle (close > open)
-            if candle['close'] > candle['open']:
-                return (j, candle)
-    
-    return None
+            tr = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        tr_sum += tr - tr_window[i % atr_period]
+        tr_window[i % atr_period] = tr
+        if i < start:
+            continue
+        current_atr = tr_sum / atr_period if i >= atr_period - 1 else 1.0
+
+        # --- Check for BULLISH impulse (Break of Structure up) ---
+        if close[i] > recent_high[i]:
+            impulse_size = close[i] - open_[i]
+            # Validate impulse strength
+            if impulse_size > current_atr * impulse_multiplier:
+                # Find last bearish candle before impulse
+                for j in range(i - 1, max(0, i - max_lookback - 1), -1):
+                    if close[j] < open_[j]:
+                        kinds[k] = 1
+                        origins[k] = j
+                        formed[k] = i
+                        strengths[k] = impulse_size / current_atr
+                        k += 1
+                        break
+
+        # --- Check for BEARISH impulse (Break of Structure down) ---
+        if close[i] < recent_low[i]:
+            impulse_size = open_[i] - close[i]
+            if impulse_size > current_atr * impulse_multiplier:
+                # Find last bullish candle before impulse
+                for j in range(i - 1, max(0, i - max_lookback - 1), -1):
+                    if close[j] > open_[j]:
+                        kinds[k] = -1
+                        origins[k] = j
+                        formed[k] = i
+                        strengths[k] = impulse_size / current_atr
+                        k += 1
+                        break
 
+    return kinds[:k], origins[:k], formed[:k], strengths[:k]
 
-def _mark_mitigated_obs(df: pd.DataFrame, order_blocks: List[OrderBlock]):
-    """Mark Order Blocks that have been mitigated (price returned and broke through)."""
-    for ob in order_blocks:
-        if ob.origin_index >= len(df) - 1:
-            continue
-            
-        subsequent = df.iloc[ob.origin_index + 1:]
-        
-        if len(subsequent) == 0:
-            continue
-        
-        if ob.ob_type == 'bullish':
-            # Bullish OB mitigated if price closes below OB low
-            if (subsequent['close'] < ob.bottom).any():
-                ob.mitigated = True
-        else:
-            # Bearish OB mitigated if price closes above OB high
-            if (subsequent['close'] > ob.top).any():
-                ob.mitigated = True
+
+def _mitigated_mask(close: np.ndarray, kinds: np.ndarray, top: np.ndarray,
+                    bottom: np.ndarray, origins: np.ndarray) -> np.ndarray:
+    """Which Order Blocks have been mitigated (price returned and broke through)."""
+    # Lowest/highest close from each bar to the end: one backward running min/max
+    # answers "did any later close break through" for every OB
+    n = len(close)
+    lowest_after = np.minimum.accumulate(close[::-1])[::-1]
+    highest_after = np.maximum.accumulate(close[::-1])[::-1]
+    after = origins + 1
+    has_after = after < n
+    after = np.minimum(after, n - 1)
+    
+    # Bullish OB mitigated if price closes below OB low; bearish if it closes above OB high
+    broken = np.where(kinds > 0, lowest_after[after] < bottom, highest_after[after] > top)
+    return has_after & broken
 
 
 def _calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Calculate Average True Range."""
-    high = df['high']
-    low = df['low']
-    prev_close = df['close'].shift(1)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
     
-    tr = pd.concat([
-        high - low,
-        (high - prev_close).abs(),
-        (low - prev_close).abs()
-    ], axis=1).max(axis=1)
+    # True Range as a per-element max on arrays (the first bar has no previous close)
+    tr = high - low
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])))
     
-    return tr.rolling(window=period).mean()
+    return pd.Series(rolling_mean(tr, period), index=df.index)
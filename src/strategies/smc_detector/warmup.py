@@ -0,0 +1,29 @@
+"""
+SMC Detector - Kernel Warm-up
+Compiles the detection and scoring kernels before the first real scan.
+"""
+import numpy as np
+import pandas as pd
+from .confluence import calculate_confluence_score
+from .fvg_detector import detect_fvg_zones
+from .order_block import detect_order_block_arrays
+
+
+def warmup_smc_kernels(n_bars: int = 40):
+    """
+    Runs the FVG, Order Block and confluence kernels once on a small synthetic frame.
+
+    Call once at start-up (before forking workers or entering the trading loop) so the
+    first real scan doesn't pay the JIT compile; numba's on-disk cache makes this a load
+    rather than a compile on later runs.
+    """
+    close = 100.0 + np.sin(np.arange(n_bars, dtype=np.float64))
+    df = pd.DataFrame({
+        'open': np.roll(close, 1),
+        'high': close + 1.0,
+        'low': close - 1.0,
+        'close': close,
+    }, index=pd.date_range('2024-01-01', periods=n_bars, freq='15min'))
+    fvgs = detect_fvg_zones(df)
+    obs = detect_order_block_arrays(df).to_list(df.index)
+    calculate_confluence_score(close[-1], 'BUY', obs, fvgs, close[-1], close[-1] - 1.0)
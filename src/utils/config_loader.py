@@ -1,22 +1,41 @@
+import copy
 import yaml
 import os
 import logging
 from dotenv import load_dotenv
 
+# libyaml's C parser when PyYAML was built with it; same safe subset of YAML either way
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - depends on the PyYAML build
+    from yaml import SafeLoader
+
+# Parsed config per file, keyed on its path and (mtime, size) so an edited file is re-read
+_config_cache = {}
+
 def load_config(config_path="config.yaml"):
     """
     Loads configuration from a YAML file.
+    Unchanged files are parsed once; every call returns its own copy, so callers
+    can modify the result freely.
     """
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Config file not found: {config_path}")
     
+    stat = os.stat(config_path)
+    key = os.path.abspath(config_path)
+    cached = _config_cache.get(key)
+    if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return copy.deepcopy(cached[1])
+    
     with open(config_path, "r") as f:
         try:
-            config = yaml.safe_load(f)
-            return config
+            config = yaml.load(f, Loader=SafeLoader)
         except yaml.YAMLError as e:
             logging.error(f"Error parsing config file: {e}")
             raise e
+    _config_cache[key] = ((stat.st_mtime_ns, stat.st_size), config)
+    return copy.deepcopy(config)
 
 def load_credentials(env_path=".env"):
     """
@@ -1,45 +1,55 @@
 import csv
-import os
 import logging
-from datetime import datetime
+import time
 
 logger = logging.getLogger("PropBot.Journal")
 
+# Trading session for each hour of the day (London 08-13, London/NY 13-17, New York 17-22)
+_SESSION_BY_HOUR = tuple(
+    "London" if 8 <= h < 13 else
+    "London/NY" if 13 <= h < 17 else
+    "New York" if 17 <= h < 22 else
+    "Asia/Sydney"
+    for h in range(24))
+
+
+def _format_time(t: time.struct_time) -> str:
+    """'%Y-%m-%d %H:%M:%S' without going through strftime."""
+    return (f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} "
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}")
+
 class TradeJournal:
     def __init__(self, filename: str = "trades.csv"):
         self.filename = filename
+        # Append handle kept open between trades (line-buffered, so every row reaches the
+        # file as it is written); opened on the first trade
+        self._fh = None
+        self._writer = None
         self._initialize_csv()
 
     def _initialize_csv(self):
         """Creates the CSV file with headers if it doesn't exist."""
-        if not os.path.exists(self.filename):
-            headers = [
-                "Ticket", "Symbol", "Type", "Entry Time", "Exit Time", 
-                "Duration (Min)", "Volume", "Entry Price", "Exit Price", 
-                "Profit", "Commission", "Swap", "Total PnL", "Session", "Comment"
-            ]
-            try:
-                with open(self.filename, mode='w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers)
-                logger.info(f"Journal: Created new trade log at {self.filename}")
-            except Exception as e:
-                logger.error(f"Journal: Failed to initialize CSV: {e}")
+        headers = [
+            "Ticket", "Symbol", "Type", "Entry Time", "Exit Time", 
+            "Duration (Min)", "Volume", "Entry Price", "Exit Price", 
+            "Profit", "Commission", "Swap", "Total PnL", "Session", "Comment"
+        ]
+        try:
+            # Exclusive create: two bot instances starting together can't both write the header
+            with open(self.filename, mode='x', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+            logger.info(f"Journal: Created new trade log at {self.filename}")
+        except FileExistsError:
+            pass
+        except Exception as e:
+            logger.error(f"Journal: Failed to initialize CSV: {e}")
 
-    def _get_session(self, dt: datetime) -> str:
+    def _get_session(self, hour: int) -> str:
         """Determines the trading session based on UTC time."""
         # Note: MT5 time is usually Broker time. We assume internal logic uses UTC or UTC+2/3.
         # For simplicity, we use the hour of the entry time.
-        hour = dt.hour
-        if 8 <= hour < 13:
-            return "London"
-        elif 13 <= hour < 17:
-            return "London/NY"
-        elif 17 <= hour < 22:
-            return "New York"
-        elif 22 <= hour or hour < 8:
-            return "Asia/Sydney"
-        return "Unknown"
+        return _SESSION_BY_HOUR[hour]
 
     def log_trade(self, deal_exit, deal_entry):
         """
@@ -49,24 +59,24 @@ class TradeJournal:
         """
         try:
             # Entry Info
-            entry_time = datetime.fromtimestamp(deal_entry.time)
-            exit_time = datetime.fromtimestamp(deal_exit.time)
+            entry_time = time.localtime(deal_entry.time)
+            exit_time = time.localtime(deal_exit.time)
             
             # Duration in Minutes
-            duration = (exit_time - entry_time).total_seconds() / 60
+            duration = (deal_exit.time - deal_entry.time) / 60
             
             # Type String
             trade_type = "BUY" if deal_entry.type == 0 else "SELL" # 0=BUY, 1=SELL
             
             # Determine Session
-            session = self._get_session(entry_time)
+            session = self._get_session(entry_time.tm_hour)
             
             row = [
                 deal_exit.position_id,
                 deal_exit.symbol,
                 trade_type,
-                entry_time.strftime("%Y-%m-%d %H:%M:%S"),
-                exit_time.strftime("%Y-%m-%d %H:%M:%S"),
+                _format_time(entry_time),
+                _format_time(exit_time),
                 round(duration, 2),
                 deal_exit.volume,
                 deal_entry.price,
@@ -79,11 +89,27 @@ class TradeJournal:
                 deal_entry.comment
             ]
             
-            with open(self.filename, mode='a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+            if self._fh is None:
+                self._fh = open(self.filename, mode='a', newline='', buffering=1)
+                self._writer = csv.writer(self._fh)
+            try:
+                self._writer.writerow(row)
+            except Exception:
+                # Reopen on the next trade rather than reusing a handle in an unknown state
+                self.close()
+                raise
             
             logger.info(f"Journal: Logged trade for ticket {deal_exit.position_id} to CSV.")
             
         except Exception as e:
             logger.error(f"Journal: Error logging trade: {e}")
+
+    def close(self):
+        """Closes the append handle; the next logged trade reopens it."""
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception as e:
+                logger.error(f"Journal: Error closing trade log: {e}")
+            self._fh = None
+            self._writer = None
@@ -1,17 +1,28 @@
+import atexit
 import logging
+import queue
 import sys
 import os
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logger(name="PropBot", log_level=logging.INFO, log_file=None):
+def setup_logger(name="PropBot", log_level=logging.INFO, log_file=None, queued=True):
     """
     Sets up a logger with console and file handlers.
+    Records are handed to a queue and written by a background listener thread, so
+    logging never blocks the caller on console/file I/O; the listener is stopped
+    (draining the queue) at exit. With queued=False the handlers are attached directly,
+    for processes that exit without running atexit hooks (e.g. pool workers).
     """
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
     
-    # Avoid adding handlers multiple times
+    # Avoid adding handlers multiple times. Handlers inherited through fork are replaced:
+    # the listener thread that drains their queue does not exist in the child
     if logger.handlers:
-        return logger
+        if getattr(logger, 'handler_pid', os.getpid()) == os.getpid():
+            return logger
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
 
     # Formatter
     formatter = logging.Formatter(
@@ -22,12 +33,26 @@ def setup_logger(name="PropBot", log_level=logging.INFO, log_file=None):
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # File Handler
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    logger.handler_pid = os.getpid()
+    if not queued:
+        for handler in handlers:
+            logger.addHandler(handler)
+        logger.queue_listener = None
+        return logger
+
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.queue_listener = listener
 
     return logger
@@ -0,0 +1,16 @@
+"""
+Optional Numba support.
+Exposes `njit` so numeric kernels can be JIT-compiled when numba is installed,
+and fall back to plain Python functions when it is not.
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports bare and parameterized use)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,9 +1,31 @@
 
 import requests
 import logging
+import queue
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger("PropBot.Notifications")
 
+# Messages queued within this window of each other go out as one sendMessage call,
+# as long as the combined text stays under Telegram's 4096-character limit
+# (send_message_sync alerts are always sent on their own)
+COALESCE_WINDOW_SECS = 0.5
+MAX_MESSAGE_CHARS = 4096
+
+class _Receipt:
+    """Delivery outcome of a send_message_sync call, filled in by the sender thread."""
+    __slots__ = ("done", "sent")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.sent = False
+
 class TelegramNotifier:
     def __init__(self, token: str, chat_id: str, enabled: bool = True):
         self.token = token
@@ -11,6 +33,15 @@ class TelegramNotifier:
         self.enabled = enabled
         self.base_url = f"https://api.telegram.org/bot{self.token}"
         self.last_update_id = 0
+        # Kept-alive connections to the Bot API: one for polling on the caller's thread and
+        # one owned by the sender thread (a Session shouldn't be shared across threads)
+        self._poll_session = requests.Session()
+        self._send_session = requests.Session()
+        # Outgoing messages, sent in order by a daemon thread started on first use; bounded
+        # so an unreachable Telegram can't grow it without limit
+        self._outbox = queue.Queue(maxsize=256)
+        self._sender = None
+        self._sender_lock = threading.Lock()
 
     def get_updates(self):
         """
@@ -26,9 +57,10 @@ class TelegramNotifier:
         
         try:
             # logger.info(f"Polling Telegram (offset: {offset})...") 
-            response = requests.get(url, params=params, timeout=5)
+            response = self._poll_session.get(url, params=params, timeout=5)
             if response.status_code == 200:
-                data = response.json()
+                # orjson decodes the update batch (large after downtime) faster than response.json()
+                data = orjson.loads(response.content) if orjson is not None else response.json()
                 updates = data.get("result", [])
                 
                 # if updates:
@@ -58,24 +90,106 @@ class TelegramNotifier:
 
     def send_message(self, message: str):
         """
-        Sends a message to the configured Telegram chat.
+        Queues a message for the configured Telegram chat and returns immediately;
+        a background thread delivers queued messages in order, combining those sent
+        within COALESCE_WINDOW_SECS of each other into one Telegram message.
         """
         if not self.enabled or not self.token or not self.chat_id:
             logger.debug("Telegram notifications disabled or missing credentials.")
             return
+        self._ensure_sender()
+        self._enqueue(message, None)
+
+    def send_message_sync(self, message: str, timeout: float = 5.0) -> bool:
+        """
+        Like send_message, but waits up to `timeout` seconds for delivery (for critical
+        alerts). Messages queued earlier go out first; this one is sent on its own, never
+        coalesced. Returns True only if Telegram accepted it in time.
+        """
+        if not self.enabled or not self.token or not self.chat_id:
+            logger.debug("Telegram notifications disabled or missing credentials.")
+            return False
+        self._ensure_sender()
+        receipt = _Receipt()
+        if not self._enqueue(message, receipt):
+            return False
+        return receipt.done.wait(timeout) and receipt.sent
 
+    def _enqueue(self, message: str, receipt) -> bool:
+        try:
+            self._outbox.put_nowait((message, receipt))
+            return True
+        except queue.Full:
+            logger.warning("Telegram outbox full; dropping message.")
+            return False
+
+    def _ensure_sender(self):
+        with self._sender_lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send_loop, name="TelegramSender", daemon=True)
+                self._sender.start()
+
+    def _send_loop(self):
+        carried = None
+        while True:
+            message, receipt = carried if carried is not None else self._outbox.get()
+            carried = None
+            parts, size = [message], len(message)
+
+            # Collect whatever else arrives within the window into the same message;
+            # synchronous (critical) messages always go out alone
+            deadline = time.monotonic() + COALESCE_WINDOW_SECS
+            while receipt is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._outbox.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item[1] is not None or size + 2 + len(item[0]) > MAX_MESSAGE_CHARS:
+                    carried = item # Starts the next batch
+                    break
+                parts.append(item[0])
+                size += 2 + len(item[0])
+
+            sent = False
+            try:
+                sent = self._post_message("\n\n".join(parts))
+            finally:
+                if receipt is not None:
+                    receipt.sent = sent
+                    receipt.done.set()
+
+    def _post_message(self, message: str, parse_mode: str = "Markdown") -> bool:
+        """
+        Blocking sendMessage call; only runs on the sender thread. Returns True if
+        Telegram accepted the message. A 400 (typically unbalanced `*`/`_` in one of the
+        coalesced alerts) is retried once as plain text, so the rest still get through.
+        """
         url = f"{self.base_url}/sendMessage"
         payload = {
             "chat_id": self.chat_id,
             "text": message,
-            "parse_mode": "Markdown"
         }
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
 
         try:
-            response = requests.post(url, json=payload, timeout=10)
+            if orjson is not None:
+                response = self._send_session.post(
+                    url, data=orjson.dumps(payload),
+                    headers={"Content-Type": "application/json"}, timeout=10)
+            else:
+                response = self._send_session.post(url, json=payload, timeout=10)
+            if response.status_code == 400 and parse_mode:
+                logger.warning(f"Telegram rejected the message as {parse_mode} ({response.text}); resending as plain text")
+                return self._post_message(message, parse_mode=None)
             if response.status_code != 200:
                 logger.error(f"Failed to send Telegram message: {response.text}")
-            else:
-                logger.info("Telegram notification sent.")
+                return False
+            logger.info("Telegram notification sent.")
+            return True
         except Exception as e:
             logger.error(f"Error sending Telegram message: {e}")
+            return False
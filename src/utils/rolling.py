@@ -0,0 +1,41 @@
+"""
+Optional Bottleneck support for rolling window reductions.
+Uses bottleneck's single-pass C moving-window functions when it is installed,
+and pandas rolling windows when it is not. Inputs and outputs are float arrays;
+the first `window - 1` results are NaN unless `min_count` allows fewer values.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import bottleneck as bn
+    BOTTLENECK_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    bn = None
+    BOTTLENECK_AVAILABLE = False
+
+
+def rolling_mean(values: np.ndarray, window: int, min_count: int = None) -> np.ndarray:
+    """Mean over the trailing `window` values (at least `min_count`, default `window`)."""
+    return _rolling(values, window, min_count, "mean")
+
+
+def rolling_max(values: np.ndarray, window: int, min_count: int = None) -> np.ndarray:
+    """Max over the trailing `window` values (at least `min_count`, default `window`)."""
+    return _rolling(values, window, min_count, "max")
+
+
+def rolling_min(values: np.ndarray, window: int, min_count: int = None) -> np.ndarray:
+    """Min over the trailing `window` values (at least `min_count`, default `window`)."""
+    return _rolling(values, window, min_count, "min")
+
+
+def _rolling(values: np.ndarray, window: int, min_count, how: str) -> np.ndarray:
+    min_count = window if min_count is None else min_count
+    if bn is None:
+        return getattr(pd.Series(values).rolling(window, min_periods=min_count), how)().to_numpy()
+    n = len(values)
+    if min_count > n:
+        return np.full(n, np.nan)
+    # Bottleneck rejects windows longer than the input; no result can span more than n values
+    return getattr(bn, "move_" + how)(values, min(window, n), min_count=min_count)
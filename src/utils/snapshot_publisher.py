@@ -0,0 +1,52 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger("PropBot.Publisher")
+
+# Queued by close() to stop the writer thread
+_STOP = object()
+
+class SnapshotPublisher:
+    """
+    Publishes snapshots (e.g. dashboard state) on a daemon thread.
+
+    Only the newest unpublished snapshot is kept: if the writer falls behind, a new
+    submit replaces the pending one instead of queueing behind it, so slow disk or
+    network I/O never blocks the caller and never builds a backlog.
+    """
+    def __init__(self, publish, name: str = "SnapshotPublisher"):
+        self._publish = publish
+        self._name = name
+        self._queue = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot):
+        """Hands a snapshot to the writer thread without blocking."""
+        while True:
+            try:
+                self._queue.put_nowait(snapshot)
+                return
+            except queue.Full:
+                # Drop the stale pending snapshot; the writer may have taken it meanwhile
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self, timeout: float = 5.0):
+        """Publishes the pending snapshot, if any, then stops the writer thread."""
+        # Blocks until the writer has taken the pending snapshot, so it isn't replaced
+        self._queue.put(_STOP, timeout=timeout)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            snapshot = self._queue.get()
+            if snapshot is _STOP:
+                return
+            try:
+                self._publish(snapshot)
+            except Exception as e:
+                logger.error(f"{self._name} publish failed: {e}")
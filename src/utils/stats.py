@@ -1,12 +1,25 @@
 import MetaTrader5 as mt5
 from datetime import datetime, timedelta
 import logging
+import time
+import numpy as np
 
 logger = logging.getLogger("PropBot.Stats")
 
+# Stats computed within this many seconds are reused without asking MT5 again
+STATS_CACHE_TTL_SECS = 30
+
 class StatsReporter:
     def __init__(self, magic_number: int):
         self.magic_number = magic_number
+        # Fixed-start window ("midnight" / "all") -> (from_date, deal count, stats)
+        self._stats_cache = {}
+        # Window ("midnight" or day count) -> (monotonic time computed, stats)
+        self._recent = {}
+
+    def invalidate(self):
+        """Drops recently computed stats, e.g. after a trade closes."""
+        self._recent.clear()
 
     def get_stats(self, days: int = 0, since_midnight: bool = False) -> dict:
         """
@@ -14,7 +27,13 @@ class StatsReporter:
         days > 0: Rolling window (e.g., last 24h).
         since_midnight=True: From 00:00 today (overrides days).
         days=0: All Time.
+        The same window asked for again within STATS_CACHE_TTL_SECS is served from memory.
         """
+        key = "midnight" if since_midnight else max(days, 0)
+        recent = self._recent.get(key)
+        if recent is not None and time.monotonic() - recent[0] < STATS_CACHE_TTL_SECS:
+            return dict(recent[1])
+
         now = datetime.now()
         
         # Determine FROM date
@@ -25,11 +44,26 @@ class StatsReporter:
         else:
             from_date = datetime(2020, 1, 1) # Arbitrary start for "All Time"
 
+        # FIX: Add buffer to 'to_date' to account for Server Time being ahead of Local Time
+        to_date = now + timedelta(days=1)
+
+        # Deals are only ever appended, so for a fixed window start (midnight / all time)
+        # an unchanged deal count means unchanged stats; the count is far cheaper than the deals
+        window = "midnight" if since_midnight else ("all" if days <= 0 else None)
+        deal_count = None
+        if window:
+            try:
+                deal_count = mt5.history_deals_total(from_date, to_date)
+            except Exception as e:
+                logger.error(f"Failed to count history: {e}")
+            cached = self._stats_cache.get(window)
+            if deal_count is not None and cached is not None and cached[:2] == (from_date, deal_count):
+                self._recent[key] = (time.monotonic(), cached[2])
+                return dict(cached[2])
+
         # Fetch History
         # We want 'Deals' (actual executions), filtering by ENTRY_OUT (Closures)
         try:
-            # FIX: Add buffer to 'to_date' to account for Server Time being ahead of Local Time
-            to_date = now + timedelta(days=1)
             deals = mt5.history_deals_get(from_date, to_date, group="*")
         except Exception as e:
             logger.error(f"Failed to fetch history: {e}")
@@ -38,36 +72,36 @@ class StatsReporter:
         if deals is None:
             return None
 
-        total_trades = 0
-        wins = 0
-        losses = 0
-        total_profit = 0.0
-        
-        for deal in deals:
-            # Check Magical Number
-            if deal.magic != self.magic_number:
-                continue
-                
-            # We only care about exits (Profit realization)
-            if deal.entry == mt5.DEAL_ENTRY_OUT or deal.entry == mt5.DEAL_ENTRY_OUT_BY:
-                total_trades += 1
-                total_profit += deal.profit + deal.swap + deal.commission
-                
-                if deal.profit > 0:
-                    wins += 1
-                else:
-                    # Including 0 as loss or break-even (usually counts against win-rate in prop firms)
-                    losses += 1
+        # Deal fields as arrays, so the filtering and totals run as array operations
+        n = len(deals)
+        magic = np.fromiter((deal.magic for deal in deals), dtype=np.int64, count=n)
+        entry = np.fromiter((deal.entry for deal in deals), dtype=np.int64, count=n)
+        profit = np.fromiter((deal.profit for deal in deals), dtype=np.float64, count=n)
+        swap = np.fromiter((deal.swap for deal in deals), dtype=np.float64, count=n)
+        commission = np.fromiter((deal.commission for deal in deals), dtype=np.float64, count=n)
+
+        # Check Magical Number; we only care about exits (Profit realization)
+        closed = (magic == self.magic_number) & ((entry == mt5.DEAL_ENTRY_OUT) | (entry == mt5.DEAL_ENTRY_OUT_BY))
+
+        total_trades = int(np.count_nonzero(closed))
+        total_profit = float((profit[closed] + swap[closed] + commission[closed]).sum())
+        wins = int(np.count_nonzero(profit[closed] > 0))
+        # Including 0 as loss or break-even (usually counts against win-rate in prop firms)
+        losses = total_trades - wins
 
         win_rate = (wins / total_trades * 100) if total_trades > 0 else 0.0
 
-        return {
+        stats = {
             "trades": total_trades,
             "wins": wins,
             "losses": losses,
             "win_rate": win_rate,
             "profit": total_profit
         }
+        if window and deal_count is not None:
+            self._stats_cache[window] = (from_date, deal_count, stats)
+        self._recent[key] = (time.monotonic(), stats)
+        return dict(stats)
 
     def format_report(self, daily: dict, total: dict) -> str:
         """Formats stats into a readable string for Logs/Telegram"""
@@ -0,0 +1,92 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.backtest.kernels import _manage_trades_loop, _manage_trades_vectorized
+from src.backtest.trade_book import TradeBook
+from src.backtest.signals import SIGNAL_DTYPE, align_trend_index
+
+def check_manage_trades(manage_trades):
+    # Trade 0: BUY stopped out. Trade 1: SELL hits TP. Trade 2: BUY trails its stop.
+    direction = np.array([1, -1, 1], dtype=np.int8)
+    entry = np.array([100.0, 100.0, 100.0])
+    sl = np.array([99.0, 107.0, 95.0])
+    tp = np.array([110.0, 98.5, 0.0])
+    active = np.ones(3, dtype=np.bool_)
+    pnl = np.zeros(3)
+
+    closed = manage_trades(direction, entry, sl, tp, active, pnl, 106.0, 98.0, 5.0, 2.5)
+
+    assert closed == 2
+    assert list(active) == [False, False, True]
+    assert pnl[0] == -1.0
+    assert pnl[1] == 1.5
+    # Profit distance 6.0 >= 5.0 activation -> SL = 100 + (6.0 - 2.5)
+    assert sl[2] == 103.5
+
+def test_manage_trades_loop():
+    check_manage_trades(_manage_trades_loop)
+
+def test_manage_trades_vectorized():
+    check_manage_trades(_manage_trades_vectorized)
+
+def test_trade_book_simulate():
+    # Bar 0 places a buy stop, bar 1 fills it, bar 2 hits TP,
+    # bar 3 opens a market sell and the Friday close on bar 4 exits it.
+    high = np.array([100.5, 101.5, 104.5, 100.5, 99.0])
+    low = np.array([99.5, 100.5, 101.0, 99.5, 97.5])
+    close = np.array([100.0, 101.0, 104.0, 100.0, 98.0])
+    ts_ns = np.arange(5, dtype=np.int64) * 3600 * 1_000_000_000
+    friday_close = np.array([False, False, False, False, True])
+    signals = np.zeros(5, dtype=SIGNAL_DTYPE)
+    signals[0] = (1, 101.0, 99.0, 104.0, True)
+    signals[3] = (-1, 100.0, 102.0, 0.0, False)
+
+    book = TradeBook(capacity=1)
+    book.simulate(np.arange(5), high, low, close, ts_ns, friday_close, signals,
+                  50.0, 25.0, 4 * 3600 * 1_000_000_000)
+
+    assert book.n == 2 and book.n_active == 0 and book.first_open == 2
+    assert list(book.pnl[:2]) == [3.0, 2.0]
+    assert book.summary() == (2, 2, 5.0, 2.5)
+
+def test_pending_order_expiry():
+    # A buy stop placed on bar 0 is only reachable 5 hours later, after it expired
+    hour_ns = 3600 * 1_000_000_000
+    high = np.array([100.5, 100.6, 102.0])
+    low = np.array([99.5, 99.6, 100.0])
+    ts_ns = np.array([0, 1, 5], dtype=np.int64) * hour_ns
+    signals = np.zeros(3, dtype=SIGNAL_DTYPE)
+    signals[0] = (1, 101.0, 99.0, 104.0, True)
+
+    book = TradeBook()
+    book.simulate(np.arange(3), high, low, low, ts_ns, np.zeros(3, dtype=np.bool_), signals,
+                  50.0, 25.0, 4 * hour_ns)
+    assert book.n == 0
+
+    # Same bars one hour apart: filled on bar 2 (2h after placement)
+    book = TradeBook()
+    book.simulate(np.arange(3), high, low, low, np.arange(3, dtype=np.int64) * hour_ns,
+                  np.zeros(3, dtype=np.bool_), signals, 50.0, 25.0, 4 * hour_ns)
+    assert book.n == 1 and book.entry[0] == 101.0
+
+def test_align_trend_index():
+    # Entry bars before, on and between 4h trend bars
+    df_trend = pd.DataFrame(index=pd.date_range("2024-01-01 04:00", periods=3, freq="4h"))
+    df_entry = pd.DataFrame(index=pd.DatetimeIndex(["2024-01-01 03:00", "2024-01-01 04:00",
+                                                    "2024-01-01 07:00", "2024-01-01 13:00"]))
+
+    trend_end = align_trend_index(df_entry, df_trend)
+    expected = [(df_trend.index <= t).sum() for t in df_entry.index]
+    assert list(trend_end) == expected == [0, 1, 1, 3]
+
+if __name__ == "__main__":
+    test_manage_trades_loop()
+    test_manage_trades_vectorized()
+    test_trade_book_simulate()
+    test_pending_order_expiry()
+    test_align_trend_index()
+    print("Verification Passed! Trade management kernel is working correctly.")
@@ -1,18 +1,18 @@
 import os
 import sys
+import tempfile
+from pathlib import Path
 from unittest.mock import MagicMock
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.utils.journal import TradeJournal
 
-def test_journal():
+def test_journal(tmp_path):
     print("Starting TradeJournal Verification...")
     
-    # Remove existing test file if exists
-    test_file = "test_trades.csv"
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    # Write into a scratch directory rather than the current working directory
+    test_file = str(tmp_path / "test_trades.csv")
         
     journal = TradeJournal(filename=test_file)
     
@@ -53,7 +53,7 @@ def test_journal():
     return False
 
 if __name__ == "__main__":
-    if test_journal():
+    if test_journal(Path(tempfile.mkdtemp())):
         print("\nVerification Passed! Journaling is working correctly.")
     else:
         print("\nVerification Failed.")
@@ -0,0 +1,42 @@
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.logger import setup_logger
+
+LOGGER_NAME = "PropBot.TestWorker"
+
+def _init_worker(log_file):
+    setup_logger(LOGGER_NAME, logging.INFO, log_file=log_file, queued=False)
+
+def _log_from_worker(message):
+    logging.getLogger(LOGGER_NAME).info(message)
+    return os.getpid()
+
+def test_worker_records_reach_handler(tmp_path):
+    # The parent's queued logger is inherited by forked workers without its listener thread
+    parent_logger = setup_logger(LOGGER_NAME, logging.INFO)
+    try:
+        log_file = tmp_path / "worker.log"
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(start_method)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                 initializer=_init_worker, initargs=(str(log_file),)) as executor:
+            worker_pid = executor.submit(_log_from_worker, "FROM WORKER").result()
+
+        assert worker_pid != os.getpid()
+        assert "FROM WORKER" in log_file.read_text()
+    finally:
+        # The listener itself is stopped at exit
+        for handler in list(parent_logger.handlers):
+            parent_logger.removeHandler(handler)
+
+if __name__ == "__main__":
+    test_worker_records_reach_handler(Path(tempfile.mkdtemp()))
+    print("Verification Passed! Worker log records reach their handlers.")
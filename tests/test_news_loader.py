@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.data.news_loader import NewsLoader
+
+def make_loader(events):
+    loader = NewsLoader(cache_file=None)
+    loader.last_update = time.time()  # Skip the network fetch
+    loader.cached_news = events
+    loader._process_blocked_times()
+    return loader
+
+def local_iso(ts: str) -> str:
+    # Event times as offset-aware strings in the local timezone
+    return datetime.fromisoformat(ts).astimezone().isoformat()
+
+def test_blocked_window_bounds():
+    loader = make_loader([
+        {"country": "USD", "impact": "High", "date": local_iso("2025-01-15T14:30:00")},
+        {"country": "EUR", "impact": "High", "date": local_iso("2025-01-15T10:00:00")},
+        {"country": "USD", "impact": "Low", "date": local_iso("2025-01-15T18:00:00")},
+    ])
+
+    assert not loader.is_blocked(datetime(2025, 1, 15, 13, 59, 59))
+    assert loader.is_blocked(datetime(2025, 1, 15, 14, 0))
+    assert loader.is_blocked(datetime(2025, 1, 15, 14, 30))
+    # The +30 minute is blocked in full, as with per-minute matching
+    assert loader.is_blocked(datetime(2025, 1, 15, 15, 0, 59))
+    assert not loader.is_blocked(datetime(2025, 1, 15, 15, 1))
+    # Non-USD and non-High events don't block
+    assert not loader.is_blocked(datetime(2025, 1, 15, 10, 0))
+    assert not loader.is_blocked(datetime(2025, 1, 15, 18, 0))
+
+def test_overlapping_windows_merge():
+    loader = make_loader([
+        {"country": "USD", "impact": "High", "date": local_iso("2025-01-15T14:45:00")},
+        {"country": "USD", "impact": "High", "date": local_iso("2025-01-15T14:30:00")},
+    ])
+
+    assert len(loader.blocked_starts) == 1
+    assert loader.is_blocked(datetime(2025, 1, 15, 15, 10))
+    assert not loader.is_blocked(datetime(2025, 1, 15, 15, 16))
+
+def test_conditional_fetch_and_disk_cache():
+    events = [{"country": "USD", "impact": "High", "date": local_iso("2025-01-15T14:30:00")}]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, "news.json")
+
+        ok = MagicMock(status_code=200, headers={"ETag": '"v1"'}, content=json.dumps(events).encode())
+        ok.json.return_value = events
+        first = NewsLoader(cache_file=cache_file)
+        with patch.object(first.session, "get", return_value=ok):
+            first.update_news()
+
+        # A restart has the calendar before any request and revalidates with the ETag
+        loader = NewsLoader(cache_file=cache_file)
+        assert loader.blocked_starts
+        with patch.object(loader.session, "get", return_value=MagicMock(status_code=304)) as get:
+            assert loader.is_blocked(datetime(2025, 1, 15, 14, 30))
+        assert get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert loader.last_update > 0
+
+if __name__ == "__main__":
+    test_blocked_window_bounds()
+    test_overlapping_windows_merge()
+    test_conditional_fetch_and_disk_cache()
+    print("Verification Passed! News blackout windows are correct.")
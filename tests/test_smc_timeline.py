@@ -0,0 +1,93 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.backtest.smc_timeline import SMCZoneTimeline
+from src.backtest.signals import SIGNAL_DTYPE, apply_smc_filter
+from src.backtest.trade_book import TradeBook
+from src.strategies.smc_detector import detect_fvg_zones, detect_order_blocks, calculate_confluence_score
+
+def make_bars(n=300, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 2, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.exponential(2, n)
+    low = np.minimum(open_, close) - rng.exponential(2, n)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close},
+                        index=pd.date_range('2026-01-01', periods=n, freq='h'))
+
+def test_timeline_matches_prefix_detection():
+    # With an unbounded window, every bar must score exactly like detecting on the prefix
+    df = make_bars()
+    timeline = SMCZoneTimeline(df, window=len(df))
+    close = df['close'].to_numpy()
+
+    for t in range(120, len(df), 15):
+        prefix = df.iloc[:t + 1]
+        obs, fvgs = detect_order_blocks(prefix), detect_fvg_zones(prefix)
+        for signal_type, entry, sl in (('BUY', close[t] + 1, close[t] - 8), ('SELL', close[t] - 1, close[t] + 8)):
+            expected, _ = calculate_confluence_score(close[t], signal_type, obs, fvgs, entry, sl)
+            assert timeline.score(t, signal_type, entry, sl) == expected
+
+def test_timeline_matches_live_window():
+    # With the live 100-bar window, every bar must score exactly like detecting on the
+    # trailing 100 bars (ATR warm-up and all), as main.py does
+    df = make_bars(seed=11)
+    timeline = SMCZoneTimeline(df, window=100)
+    close = df['close'].to_numpy()
+
+    for t in range(100, len(df), 7):
+        live_df = df.iloc[t + 1 - 100:t + 1]
+        obs, fvgs = detect_order_blocks(live_df), detect_fvg_zones(live_df)
+        for signal_type, entry, sl in (('BUY', close[t] + 1, close[t] - 8), ('SELL', close[t] - 1, close[t] + 8)):
+            expected, _ = calculate_confluence_score(close[t], signal_type, obs, fvgs, entry, sl)
+            assert timeline.score(t, signal_type, entry, sl) == expected
+
+def test_enhanced_trades_subset_of_baseline():
+    # The SMC-enhanced run replays a subset of the baseline signals, so every trade it
+    # takes must come from a baseline signal that passes the live-window score
+    df = make_bars(n=400, seed=3)
+    close = df['close'].to_numpy()
+    rng = np.random.default_rng(3)
+    signals = np.zeros(len(df), dtype=SIGNAL_DTYPE)
+    for i in rng.choice(np.arange(100, len(df)), 60, replace=False):
+        d = 1 if rng.random() < 0.5 else -1
+        signals[i] = (d, close[i], close[i] - d * 8, close[i] + d * 16, False)
+
+    enhanced = apply_smc_filter(signals, df, min_score=20)
+    kept = np.flatnonzero(enhanced['type'] != 0)
+    assert 0 < kept.size < 60
+    assert set(kept) <= set(np.flatnonzero(signals['type'] != 0))
+    assert (enhanced[kept] == signals[kept]).all()
+    for i in kept:
+        live_df = df.iloc[i + 1 - 100:i + 1]
+        score, _ = calculate_confluence_score(close[i], 'BUY' if signals[i]['type'] == 1 else 'SELL',
+                                              detect_order_blocks(live_df), detect_fvg_zones(live_df),
+                                              signals[i]['price'], signals[i]['sl'])
+        assert score >= 20
+
+    bars = np.arange(100, len(df))
+    ts_ns = df.index.asi8
+    no_friday = np.zeros(len(df), dtype=bool)
+    high, low = df['high'].to_numpy(), df['low'].to_numpy()
+    books = {}
+    for name, sigs in (('baseline', signals), ('enhanced', enhanced)):
+        books[name] = TradeBook()
+        books[name].simulate(bars, high, low, close, ts_ns, no_friday, sigs, 50.0, 25.0, 4 * 3600 * 10**9)
+    assert books['baseline'].n > 0
+    # The book stores prices at PRICE_DTYPE precision
+    book = books['enhanced']
+    baseline_entries = {(int(s['type']), book.entry.dtype.type(s['price']), book.sl.dtype.type(s['sl']))
+                        for s in signals[signals['type'] != 0]}
+    assert book.n > 0
+    for k in range(book.n):
+        assert (int(book.direction[k]), book.entry[k], book.sl[k]) in baseline_entries
+
+if __name__ == "__main__":
+    test_timeline_matches_prefix_detection()
+    test_timeline_matches_live_window()
+    test_enhanced_trades_subset_of_baseline()
+    print("Verification Passed! SMC zone timeline matches live detection.")
@@ -105,7 +105,7 @@ def test_strategy():
              print("FAIL: Decision is LIMIT (Ratio 0.5 <= 0.6, Should be Market)")
 
     else:
-        print(f"FAIL: Expected BUY, Got {signal.signal_type}. Reason: {signal.comment}")
+        print(f"FAIL: Expected BUY, Got {signal.signal_type.name}. Reason: {signal.comment}")
 
 if __name__ == "__main__":
     test_strategy()